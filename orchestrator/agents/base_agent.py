@@ -4,6 +4,8 @@ AI Factory - Base Agent
 Ortak agent mantığı
 """
 
+import os
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
 
@@ -11,9 +13,12 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config_loader import get_projects_path, load_agent_prompt, load_yaml
-from llm_client import LLMClient
+from context_packer import ContextPacker
+import event_log
+from source_index import scan as scan_sources
+from llm_client import LLMCancelled, LLMClient
 from state_manager import (
-    load_state, save_state, update_last_event, 
+    load_state, update_state, update_last_event, 
     update_phase, update_actors, update_next_action,
     set_blocked
 )
@@ -32,6 +37,18 @@ class BaseAgent(ABC):
         
         # Agent prompt yükle
         self.system_prompt = load_agent_prompt(self.agent_type, project_name)
+        
+        # Son build_prompt'un context paketleme raporu (ContextPacker.report)
+        self.context_report = None
+        
+        # src/ snapshot'ı (ilk ihtiyaçta taranır)
+        self.source_snapshot = None
+        
+        # Bu run'da yazılan dosyalar {relative_path: content}
+        self.written_files = {}
+        
+        # Son LLM çağrısının sonucu (event log için token / failover bilgisi)
+        self.llm_result = None
     
     def get_project_file(self, relative_path: str) -> str:
         """Proje dosyası içeriğini oku"""
@@ -41,12 +58,87 @@ class BaseAgent(ABC):
         with open(file_path, 'r', encoding='utf-8') as f:
             return f.read()
     
-    def save_project_file(self, relative_path: str, content: str):
-        """Proje dosyasına yaz"""
-        file_path = self.project_path / relative_path
+    def save_project_file(self, relative_path: str, content: str) -> bool:
+        """
+        Proje dosyasına atomik olarak yaz (temp + rename)
+        
+        Path LLM çıktısından gelir: proje dizini dışına çıkan (mutlak, '..',
+        symlink) path'ler yazılmaz.
+        
+        Returns:
+            Yazıldı mı
+        """
+        project_root = self.project_path.resolve()
+        file_path = (project_root / relative_path).resolve()
+        if file_path == project_root or project_root not in file_path.parents:
+            print(f"⚠️ Skipping file outside project: {relative_path}")
+            return False
         file_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
+        tmp_path = file_path.with_name(f'.{file_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
             f.write(content)
+        os.replace(tmp_path, file_path)
+        self.written_files[relative_path] = content
+        return True
+    
+    def report_file_progress(self, on_progress, relative_path: str, content: str):
+        """Yazılan dosyayı on_progress'e bildir"""
+        if on_progress:
+            on_progress({
+                'type': 'file',
+                'path': relative_path,
+                'bytes': len(content.encode('utf-8')),
+                'count': len(self.written_files)
+            })
+    
+    def make_token_handler(self, on_token=None, on_progress=None):
+        """
+        LLM'e verilecek token callback'i
+        
+        Varsayılan: çağıranın on_token'ı (None ise stream edilmez).
+        Çıktıyı akarken işleyen agent'lar (DevAgent) override eder.
+        """
+        return on_token
+    
+    def get_source_snapshot(self) -> dict:
+        """src/ snapshot'ı (run başına bir kez taranır, bkz. source_index.scan)"""
+        if self.source_snapshot is None:
+            self.source_snapshot = scan_sources(self.project_path)
+        return self.source_snapshot
+    
+    def get_source_files(self, suffixes: list = None) -> list:
+        """
+        src/ altındaki metin dosyaları
+        
+        Returns:
+            [(relative_path, content, mtime), ...]
+        """
+        files = self.get_source_snapshot()['files']
+        if suffixes:
+            files = [f for f in files if Path(f[0]).suffix in suffixes]
+        return files
+    
+    def new_context_packer(self, *reserved_parts: str) -> ContextPacker:
+        """Bu agent'ın LLM config'i için packer (reserved: system prompt, başlık, görev)"""
+        return ContextPacker(self.llm_config, ''.join(reserved_parts))
+    
+    def pack_context(self, packer: ContextPacker) -> str:
+        """Packer'ı çalıştır ve raporu sakla"""
+        context = packer.pack()
+        self.context_report = packer.report
+        return context
+    
+    def generate(self, prompt: str, state: dict, on_token=None, on_progress=None) -> dict:
+        """
+        Prompt'tan LLM çıktısı üret
+        
+        Varsayılan tek çağrı; birden fazla çağrıyla üreten agent'lar
+        (DevAgent plan + dosya başına üretim) override eder.
+        
+        Returns:
+            LLMClient.call ile aynı format
+        """
+        return self.llm_client.call(prompt, on_token=self.make_token_handler(on_token, on_progress))
     
     @abstractmethod
     def build_prompt(self, state: dict) -> str:
@@ -69,10 +161,31 @@ class BaseAgent(ABC):
         """
         pass
     
-    def run(self) -> dict:
+    def mark_failed(self, action: str, model: str, failover: list = None):
+        """Hata sonrası state: last_event failure + blocked (agent_error)"""
+        def apply_failure(state):
+            state = update_last_event(
+                state,
+                f"{self.agent_type}_agent",
+                action,
+                'failure',
+                model,
+                failover=failover
+            )
+            return set_blocked(state, 'agent_error')
+        
+        update_state(self.project_name, apply_failure)
+    
+    def run(self, on_token=None, on_progress=None) -> dict:
         """
         Agent'ı çalıştır
         
+        Args:
+            on_token: Verilirse LLM çıktısı stream edilir ve her parça
+                      bu callback'e iletilir (CLI --stream, web SSE)
+            on_progress: callable(event dict); dosya yazıldıkça
+                         {'type': 'file', 'path': str, 'bytes': int, 'count': int}
+        
         Returns:
             {
                 'success': bool,
@@ -81,6 +194,56 @@ class BaseAgent(ABC):
                 'error': str or None
             }
         """
+        started = time.monotonic()
+        outcome = None
+        try:
+            outcome = self._run(on_token, on_progress)
+            return outcome
+        except BaseException as e:
+            # İptal (LLMCancelled, job kuyruğunun JobCancelled'ı) ve beklenmeyen
+            # hatalar da loglanır; exception çağırana aynen iletilir
+            cancel_event = self.llm_client.cancel_event
+            cancelled = isinstance(e, (LLMCancelled, KeyboardInterrupt)) or bool(cancel_event and cancel_event.is_set())
+            outcome = {
+                'success': False,
+                'message': f"{self.agent_type}_agent {'cancelled' if cancelled else 'raised'}: {str(e) or type(e).__name__}",
+                'model': (self.llm_result or {}).get('model') or self.llm_config.get('model'),
+                'error': str(e) or type(e).__name__,
+                'result': 'cancelled' if cancelled else 'error'
+            }
+            raise
+        finally:
+            self.record_run(outcome, time.monotonic() - started)
+    
+    def record_run(self, outcome: dict, duration: float):
+        """
+        Koşuyu projenin event log'una ekle (hata koşuyu bozmaz)
+        
+        result: success | failure | cancelled | error (exception ile biten koşu)
+        """
+        llm_result = self.llm_result or {}
+        token_info = llm_result.get('token_info') or {}
+        try:
+            event_log.append(
+                self.project_path, 'agent_run',
+                agent=f"{self.agent_type}_agent",
+                action=outcome['message'],
+                result=outcome.get('result') or ('success' if outcome['success'] else 'failure'),
+                model=outcome.get('model'),
+                provider=self.llm_config.get('provider'),
+                duration=round(duration, 3),
+                error=outcome.get('error'),
+                prompt_tokens=token_info.get('prompt_tokens'),
+                cached=llm_result.get('cached'),
+                attempts=llm_result.get('attempts'),
+                failover=llm_result.get('failover') or None,
+                files=len(self.written_files)
+            )
+        except OSError as e:
+            print(f"⚠️ Could not write event log: {e}")
+    
+    def _run(self, on_token=None, on_progress=None) -> dict:
+        """run() gövdesi"""
         # State yükle
         try:
             state = load_state(self.project_name)
@@ -96,23 +259,18 @@ class BaseAgent(ABC):
         prompt = self.build_prompt(state)
         
         # LLM çağrısı
-        result = self.llm_client.call(prompt)
+        result = self.generate(prompt, state, on_token, on_progress)
+        self.llm_result = result
         
         if not result['success']:
             # Hata durumunda state güncelle
-            state = update_last_event(
-                state, 
-                f"{self.agent_type}_agent",
-                f"{self.agent_type} generation failed",
-                'failure',
-                result['model']
-            )
-            state = set_blocked(state, 'agent_error')
-            save_state(self.project_name, state)
+            self.mark_failed(f"{self.agent_type} generation failed", result['model'], result.get('failover'))
             
             return {
                 'success': False,
-                'message': f"LLM call failed: {result['error']}",
+                'message': f"LLM call failed: {result['error']}" + (
+                    f" ({len(self.written_files)} completed files kept)" if self.written_files else ''
+                ),
                 'model': result['model'],
                 'error': result['error']
             }
@@ -121,15 +279,7 @@ class BaseAgent(ABC):
         try:
             processed = self.process_output(result['content'], state)
         except Exception as e:
-            state = update_last_event(
-                state,
-                f"{self.agent_type}_agent",
-                f"{self.agent_type} output processing failed",
-                'failure',
-                result['model']
-            )
-            state = set_blocked(state, 'agent_error')
-            save_state(self.project_name, state)
+            self.mark_failed(f"{self.agent_type} output processing failed", result['model'])
             
             return {
                 'success': False,
@@ -138,43 +288,49 @@ class BaseAgent(ABC):
                 'error': str(e)
             }
         
-        # Dosyaları kaydet
+        # Dosyaları kaydet (stream sırasında aynen yazılmış olanlar atlanır)
         for relative_path, content in processed.get('files', []):
-            self.save_project_file(relative_path, content)
-        
-        # State güncellemeleri
-        if processed.get('state_updates'):
-            state = processed['state_updates'](state)
+            if self.written_files.get(relative_path) == content:
+                continue
+            if self.save_project_file(relative_path, content):
+                self.report_file_progress(on_progress, relative_path, content)
         
-        # Phase güncelle
-        if processed.get('next_phase'):
-            state = update_phase(state, processed['next_phase'])
-        
-        # Actors güncelle
-        next_agent = processed.get('next_agent', 'human')
-        awaiting_human = next_agent == 'human'
-        state = update_actors(state, next_agent, awaiting_human)
-        
-        # Next action güncelle
-        if processed.get('next_action'):
-            state = update_next_action(
+        # State güncellemeleri: agent çalışırken state başkası tarafından
+        # değişmiş olabilir (web, diğer agent'lar); güncel state'e kilit altında uygulanır
+        def apply_result(state):
+            if processed.get('state_updates'):
+                state = processed['state_updates'](state)
+            
+            # Phase güncelle
+            if processed.get('next_phase'):
+                state = update_phase(state, processed['next_phase'])
+            
+            # Actors güncelle
+            next_agent = processed.get('next_agent', 'human')
+            awaiting_human = next_agent == 'human'
+            state = update_actors(state, next_agent, awaiting_human)
+            
+            # Next action güncelle
+            if processed.get('next_action'):
+                state = update_next_action(
+                    state,
+                    next_agent,
+                    processed['next_action'],
+                    requires_human_approval=True
+                )
+            
+            # Last event güncelle
+            return update_last_event(
                 state,
-                next_agent,
-                processed['next_action'],
-                requires_human_approval=True
+                f"{self.agent_type}_agent",
+                f"{self.agent_type} completed successfully",
+                'success',
+                result['model'],
+                failover=result.get('failover')
             )
         
-        # Last event güncelle
-        state = update_last_event(
-            state,
-            f"{self.agent_type}_agent",
-            f"{self.agent_type} completed successfully",
-            'success',
-            result['model']
-        )
-        
         # State kaydet
-        save_state(self.project_name, state)
+        update_state(self.project_name, apply_result)
         
         return {
             'success': True,
@@ -4,13 +4,33 @@ AI Factory - Dev Agent
 PRP'den kod üretimi
 """
 
+import json
 import re
-from pathlib import Path
+from pathlib import PurePosixPath, Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base_agent import BaseAgent
+from context_packer import PRIORITY_FAILING_TESTS, PRIORITY_REQUIRED, failing_test_lines
+from patching import apply_patch_output
+from stream_extractor import StreamingFileExtractor
+from async_llm_client import AsyncLLMClient, run_bounded
 from state_manager import update_version, increment_revision
+from token_utils import estimate_tokens
+
+
+OUTPUT_MODES = ('auto', 'patch', 'full')
+
+FANOUT_MODES = ('auto', 'on', 'off')
+
+# auto modda beklenen kod çıktısı ~ PRP token'ları x bu oran; max_output_tokens'ı
+# aşmıyorsa tek çağrı yeterli (fan-out N+1 istek, her biri tam context)
+FANOUT_OUTPUT_RATIO = 3
+
+# Manifest'ten alınacak en fazla dosya
+MAX_PLANNED_FILES = 25
+
+FILE_PATTERN = r'###\s*FILE:\s*(.+?)\n```[\w]*\n(.*?)```'
 
 
 class DevAgent(BaseAgent):
@@ -18,82 +38,291 @@ class DevAgent(BaseAgent):
     
     agent_type = 'dev'
     
+    # build_prompt'ta belirlenir
+    output_mode = 'full'
+    
+    # Full modda stream ayrıştırıcısı (make_token_handler)
+    stream_extractor = None
+    
+    # Patch modda generate()'in uyguladığı dosyalar [(path, content), ...]
+    patch_files = None
+    
+    def get_output_mode(self) -> str:
+        """
+        Çıktı modu (llm config `dev_output_mode`)
+        
+        auto: src/ boşsa full, mevcut kod varsa patch
+        patch: sadece değişiklikler (SEARCH/REPLACE blokları)
+        full: her dosyanın tam içeriği
+        """
+        mode = self.llm_config.get('dev_output_mode', 'auto')
+        if mode not in OUTPUT_MODES:
+            mode = 'auto'
+        if mode == 'auto':
+            mode = 'patch' if self.get_source_files() else 'full'
+        return mode
+    
     def build_prompt(self, state: dict) -> str:
         """Kod üretim prompt'u oluştur"""
+        self.output_mode = self.get_output_mode()
+        return self._build_prompt(state, self.output_mode)
+    
+    def _build_prompt(self, state: dict, mode: str, only_files: list = None) -> str:
+        """
+        Args:
+            mode: 'patch' | 'full'
+            only_files: full modda sadece bu dosyaları iste (patch fallback)
+        """
+        
+        if mode == 'patch':
+            task = "".join([
+                "\n## Task\n",
+                "Implement the PRP above by changing the existing code.\n",
+                "Output ONLY the changes, as SEARCH/REPLACE blocks under a file header:\n\n",
+                "```\n",
+                "### FILE: src/filename.py\n",
+                "<<<<<<< SEARCH\n",
+                "exact lines copied from the existing file\n",
+                "=======\n",
+                "replacement lines\n",
+                ">>>>>>> REPLACE\n",
+                "```\n\n",
+                "Rules:\n",
+                "- SEARCH must match the existing file exactly (including indentation) and only once\n",
+                "- Keep SEARCH short: just enough lines to be unique\n",
+                "- Use several blocks for several changes in the same file\n",
+                "- For a NEW file, output the header followed by a fenced code block with the complete content\n",
+                "- Do not repeat unchanged files\n"
+            ])
+        else:
+            task_parts = [
+                "\n## Task\n",
+                "Generate the implementation code based on the PRP above.\n",
+                "Use the following format for each file:\n\n",
+                "```\n",
+                "### FILE: src/filename.py\n",
+                "```python\n",
+                "# code here\n",
+                "```\n",
+                "```\n\n",
+            ]
+            if only_files:
+                task_parts.append("Output the complete content of ONLY these files:\n")
+                task_parts.extend(f"- {path}\n" for path in only_files)
+            else:
+                task_parts.append("Output ALL necessary files with their complete content.\n")
+            task = "".join(task_parts)
+        
+        return self._assemble_prompt(state, task)
+    
+    def _assemble_prompt(self, state: dict, task: str) -> str:
+        """Başlık + bütçeye paketlenmiş PRP/kod + görev"""
         
         # PRP dosyasını oku
         prp = self.get_project_file('prp/prp.md')
         
-        # Mevcut kod (varsa, güncelleme için)
-        # src/ altındaki dosyaları listele
-        src_path = self.project_path / 'src'
-        existing_code = []
-        
-        if src_path.exists():
-            for file_path in src_path.rglob('*'):
-                if file_path.is_file():
-                    relative = file_path.relative_to(self.project_path)
-                    try:
-                        content = file_path.read_text(encoding='utf-8')
-                        existing_code.append((str(relative), content))
-                    except:
-                        pass
-        
-        prompt_parts = [
+        header_parts = [
             self.system_prompt,
             "\n\n---\n\n",
             "## Project Information\n",
             f"Project ID: {state.get('meta', {}).get('project_id', self.project_name)}\n",
         ]
         
-        if prp:
-            prompt_parts.extend([
-                "\n## PRP Document\n",
-                "```markdown\n",
-                prp,
-                "\n```\n"
-            ])
-        else:
-            prompt_parts.extend([
+        if not prp:
+            header_parts.extend([
                 "\n## PRP\n",
                 "ERROR: No PRP document found. Cannot generate code without PRP.\n"
             ])
-            return "".join(prompt_parts)
-        
-        if existing_code:
-            prompt_parts.append("\n## Existing Code\n")
-            for rel_path, content in existing_code:
-                prompt_parts.extend([
-                    f"\n### {rel_path}\n",
-                    "```\n",
-                    content,
-                    "\n```\n"
-                ])
-        
-        prompt_parts.extend([
+            return "".join(header_parts)
+        
+        header = "".join(header_parts)
+        
+        # Test'ten geri dönüldüyse başarısız testler ve ilgili dosyalar öne alınır
+        failing = "\n".join(failing_test_lines(self.get_project_file('reports/test_results.md')))
+        
+        packer = self.new_context_packer(header, task)
+        packer.add('PRP Document', prp, PRIORITY_REQUIRED, fence='markdown', required=True)
+        packer.add_source_files(self.get_source_files(), group='Existing Code', failing_text=failing,
+                                changed=self.get_source_snapshot()['changed'])
+        packer.add('Failing Tests', failing, PRIORITY_FAILING_TESTS)
+        
+        return header + self.pack_context(packer) + task
+    
+    def make_token_handler(self, on_token=None, on_progress=None):
+        """
+        Full modda çıktıyı akarken ayrıştır
+        
+        Kapanış fence'i gelen her dosya hemen (atomik) yazılır; stream
+        yarıda kesilse de tamamlanan dosyalar diskte kalır. Bu yüzden
+        çağıran stream istemese de LLM çağrısı stream edilir.
+        """
+        if self.output_mode != 'full':
+            return on_token
+        
+        def on_file(relative_path, content):
+            if self.save_project_file(relative_path, content):
+                self.report_file_progress(on_progress, relative_path, content)
+        
+        extractor = StreamingFileExtractor(on_file)
+        
+        def handler(chunk):
+            extractor.feed(chunk)
+            if on_token:
+                on_token(chunk)
+        
+        self.stream_extractor = extractor
+        return handler
+    
+    # ----- plan + dosya başına üretim -----
+    
+    def use_fanout(self) -> bool:
+        """
+        Plan + paralel dosya üretimi kullanılsın mı (llm config `dev_fanout`)
+        
+        auto: full modda ve beklenen çıktı max_output_tokens'ı aşıyorsa
+        on: full modda her zaman
+        off: tek çağrı
+        """
+        fanout = self.llm_config.get('dev_fanout', 'auto')
+        # YAML tırnaksız on/off'u boolean okur
+        if fanout is True:
+            fanout = 'on'
+        elif fanout is False:
+            fanout = 'off'
+        if fanout not in FANOUT_MODES:
+            fanout = 'auto'
+        if fanout == 'off' or self.output_mode != 'full':
+            return False
+        if fanout == 'auto':
+            return self._expected_output_tokens() > self.llm_config.get('max_output_tokens', 2048)
+        return True
+    
+    def _expected_output_tokens(self) -> int:
+        """Full modda tek yanıtın tahmini boyutu (PRP'den ya da yeniden yazılacak src/'den)"""
+        model = self.llm_config.get('model')
+        prp_tokens = estimate_tokens(self.get_project_file('prp/prp.md'), model)
+        source_tokens = sum(estimate_tokens(content, model) for _, content, _ in self.get_source_files())
+        return max(prp_tokens * FANOUT_OUTPUT_RATIO, source_tokens)
+    
+    def generate(self, prompt: str, state: dict, on_token=None, on_progress=None) -> dict:
+        """
+        Fan-out açıksa: manifest çağrısı + dosya başına eşzamanlı çağrılar
+        
+        Manifest alınamazsa tek çağrılı normal üretime düşülür.
+        Patch modda patch uygulanır; uygulanamazsa full-file fallback çağrısı
+        da burada yapılır (iptal / hata / stream normal LLM yolundan geçer).
+        """
+        if self.output_mode == 'patch':
+            return self._generate_patch(prompt, state, on_token, on_progress)
+        
+        if not self.use_fanout() or not self.get_project_file('prp/prp.md'):
+            return super().generate(prompt, state, on_token, on_progress)
+        
+        manifest, plan_result = self._plan_files(state)
+        if not manifest:
+            return super().generate(prompt, state, on_token, on_progress)
+        
+        return self._generate_files(manifest, state, on_token, on_progress, plan_result=plan_result)
+    
+    def _plan_files(self, state: dict) -> list:
+        """
+        Ucuz planlama çağrısı
+        
+        Returns:
+            ([{'path': str, 'purpose': str}, ...] (alınamazsa boş liste), LLM sonucu)
+        """
+        task = "".join([
+            "\n## Task\n",
+            "Plan the implementation of the PRP above. Do NOT write any code yet.\n",
+            "List every file that must be created or rewritten as a JSON array:\n\n",
+            "```json\n",
+            '[{"path": "src/filename.py", "purpose": "one line: responsibility and public functions/classes"}]\n',
+            "```\n\n",
+            "Output ONLY the JSON array.\n"
+        ])
+        result = self.llm_client.call(self._assemble_prompt(state, task))
+        if not result['success']:
+            return [], result
+        return parse_manifest(result['content']), result
+    
+    def _file_task(self, manifest: list, entry: dict) -> str:
+        """Tek dosya görevi (paylaşılan plan özeti dahil)"""
+        parts = [
+            "\n## File Plan\n",
+            "The project is generated file by file, in parallel. All planned files:\n",
+        ]
+        parts.extend(f"- {item['path']}: {item['purpose']}\n" for item in manifest)
+        parts.extend([
             "\n## Task\n",
-            "Generate the implementation code based on the PRP above.\n",
-            "Use the following format for each file:\n\n",
+            f"Generate ONLY the file `{entry['path']}` ({entry['purpose']}).\n",
+            "Use exactly the names and interfaces described in the file plan for the other files.\n",
+            "Use the following format:\n\n",
             "```\n",
-            "### FILE: src/filename.py\n",
-            "```python\n",
-            "# code here\n",
+            f"### FILE: {entry['path']}\n",
             "```\n",
-            "```\n\n",
-            "Output ALL necessary files with their complete content.\n"
+            "# complete file content\n",
+            "```\n",
+            "```\n"
         ])
+        return "".join(parts)
+    
+    def _generate_files(self, manifest: list, state: dict, on_token=None, on_progress=None,
+                        plan_result: dict = None) -> dict:
+        """
+        Manifest'teki dosyaları eşzamanlılık limitiyle üret ve geldikçe yaz
         
-        return "".join(prompt_parts)
+        Sonuç plan + dosya çağrılarından birleştirilir (model, token, attempts, failover).
+        """
+        client = AsyncLLMClient(self.llm_config)
+        client.cancel_event = self.llm_client.cancel_event
+        client.bypass_cache = self.llm_client.bypass_cache
+        limit = int(self.llm_config.get('dev_fanout_concurrency', 4))
+        blocks = {}
+        errors = []
+        results = [plan_result] if plan_result else []
+        
+        # Context paketleme / tokenizasyon senkron; event loop'u bloklamaması için önceden
+        prompts = {entry['path']: self._assemble_prompt(state, self._file_task(manifest, entry))
+                   for entry in manifest}
+        
+        async def generate_file(entry):
+            result = await client.acall(prompts[entry['path']])
+            results.append(result)
+            if not result['success']:
+                errors.append(f"{entry['path']}: {result['error']}")
+                return
+            
+            content = extract_single_file(result['content'], entry['path'])
+            if content is None:
+                errors.append(f"{entry['path']}: no code block in response")
+                return
+            
+            if not self.save_project_file(entry['path'], content):
+                errors.append(f"{entry['path']}: path outside project")
+                return
+            self.report_file_progress(on_progress, entry['path'], content)
+            blocks[entry['path']] = f"### FILE: {entry['path']}\n```\n{content}\n```\n\n"
+            if on_token:
+                on_token(blocks[entry['path']])
+        
+        run_bounded([lambda entry=entry: generate_file(entry) for entry in manifest], limit)
+        
+        # Dosyalar manifest sırasıyla birleştirilir; process_output tek çağrı çıktısı gibi ayrıştırır
+        content = "".join(blocks[item['path']] for item in manifest if item['path'] in blocks)
+        error = None
+        if errors:
+            error = f"Per-file generation failed for {len(errors)}/{len(manifest)} files: " + "; ".join(errors)
+        
+        return combine_results(results, not errors, content, error)
     
-    def process_output(self, output: str, state: dict) -> dict:
-        """Kod çıktısını işle ve dosyalara ayır"""
+    def _parse_full_output(self, output: str) -> list:
+        """Full mod çıktısını [(path, content), ...] listesine ayır"""
         
         files = []
         
         # FILE: pattern'i ile dosyaları ayır
         # Format: ### FILE: path/to/file.py
-        file_pattern = r'###\s*FILE:\s*(.+?)\n```[\w]*\n(.*?)```'
-        matches = re.findall(file_pattern, output, re.DOTALL)
+        matches = re.findall(FILE_PATTERN, output, re.DOTALL)
         
         if matches:
             for file_path, content in matches:
@@ -110,18 +339,68 @@ class DevAgent(BaseAgent):
                 # Son çare: tüm çıktıyı kaydet
                 files.append(('src/main.py', output.strip()))
         
-        # Versiyon güncelle
-        current_version = state.get('version', {}).get('code', '0.0.0')
-        try:
-            parts = current_version.split('.')
-            parts[-1] = str(int(parts[-1]) + 1)
-            new_version = '.'.join(parts)
-        except:
-            new_version = '0.1.0'
+        return files
+    
+    def _generate_patch(self, prompt: str, state: dict, on_token=None, on_progress=None) -> dict:
+        """
+        Patch çağrısı; çıktı snapshot'a uygulanır ve sonuç self.patch_files'a yazılır
+        
+        Uygulanamayan dosyalar (ya da hiç ayrıştırılamayan çıktı) için
+        full modda ikinci bir çağrı yapılır. Dönen sonuç iki çağrının
+        attempts / failover / token bilgisini birleştirir.
+        """
+        result = super().generate(prompt, state, on_token, on_progress)
+        if not result['success']:
+            return result
+        
+        snapshot = {path: content for path, content, _ in self.get_source_files()}
+        patch = apply_patch_output(result['content'], snapshot)
+        files = patch['files']
+        
+        if not patch['failed'] and (files or patch['unchanged']):
+            self.patch_files = files
+            return result
+        
+        only_files = sorted(patch['failed']) or None
+        fallback = self.llm_client.call(self._build_prompt(state, 'full', only_files=only_files), on_token=on_token)
+        combined = combine_results([result, fallback], fallback['success'], fallback['content'], fallback['error'])
+        if not fallback['success']:
+            combined['error'] = (f"Patch apply failed ({patch['failed'] or 'no blocks'}) "
+                                 f"and full-file fallback failed: {fallback['error']}")
+            return combined
+        
+        regenerated = self._parse_full_output(fallback['content'])
+        if only_files:
+            # Fallback sadece başarısız dosyaları yazar; uygulanan patch'ler korunur
+            regenerated_paths = {path for path, _ in regenerated}
+            files = [f for f in files if f[0] not in regenerated_paths] + regenerated
+        else:
+            files = regenerated
+        self.patch_files = files
+        return combined
+    
+    def process_output(self, output: str, state: dict) -> dict:
+        """Kod çıktısını işle ve dosyalara ayır"""
+        
+        if self.output_mode == 'patch':
+            # generate() patch'i (gerekirse fallback ile) uyguladı
+            files = self.patch_files or []
+        else:
+            if self.stream_extractor:
+                # Son satırda newline olmadan kapanan fence
+                self.stream_extractor.finish()
+            files = self._parse_full_output(output)
         
         def state_updates(s):
-            s = update_version(s, 'code', new_version)
-            return s
+            # Versiyon güncel state'ten artırılır (eşzamanlı koşuların artışı kaybolmaz)
+            current_version = s.get('version', {}).get('code', '0.0.0')
+            try:
+                parts = current_version.split('.')
+                parts[-1] = str(int(parts[-1]) + 1)
+                new_version = '.'.join(parts)
+            except (AttributeError, ValueError):
+                new_version = '0.1.0'
+            return update_version(s, 'code', new_version)
         
         return {
             'files': files,
@@ -130,3 +409,77 @@ class DevAgent(BaseAgent):
             'next_agent': 'test_agent',
             'next_action': 'generate and run tests'
         }
+
+
+def combine_results(results: list, success: bool, content: str, error: str = None) -> dict:
+    """
+    Birden fazla LLM çağrısının sonucunu tek LLMClient.call sonucu gibi birleştir
+    
+    model: kullanılan modeller (ilk kullanım sırasıyla, virgülle); attempts ve
+    prompt_tokens toplanır, failover listeleri birleştirilir.
+    """
+    models = []
+    for result in results:
+        if result.get('model') and result['model'] not in models:
+            models.append(result['model'])
+    token_infos = [r['token_info'] for r in results if r.get('token_info')]
+    token_info = None
+    if token_infos:
+        token_info = dict(token_infos[0], prompt_tokens=sum(t.get('prompt_tokens') or 0 for t in token_infos))
+    return {
+        'type': 'result',
+        'success': success,
+        'content': content,
+        'model': ', '.join(models) or None,
+        'error': error,
+        'token_info': token_info,
+        'cached': bool(results) and all(r.get('cached') for r in results),
+        'attempts': sum(r.get('attempts') or 0 for r in results),
+        'failover': [entry for r in results for entry in (r.get('failover') or [])]
+    }
+
+
+def parse_manifest(output: str) -> list:
+    """
+    Planlama çıktısından dosya listesi
+
+    Returns:
+        [{'path': str, 'purpose': str}, ...]; güvensiz path'ler ve tekrarlar atlanır
+    """
+    match = re.search(r'```(?:json)?\s*\n(.*?)```', output, re.DOTALL)
+    text = match.group(1) if match else output[output.find('['):output.rfind(']') + 1]
+    try:
+        items = json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return []
+    if not isinstance(items, list):
+        return []
+
+    manifest = []
+    seen = set()
+    for item in items:
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            continue
+        path = item['path'].strip()
+        if path.startswith('./'):
+            path = path[2:]
+        pure = PurePosixPath(path)
+        if not path or pure.is_absolute() or '..' in pure.parts or path in seen:
+            continue
+        seen.add(path)
+        manifest.append({'path': path, 'purpose': str(item.get('purpose') or '').strip()})
+    return manifest[:MAX_PLANNED_FILES]
+
+
+def extract_single_file(output: str, path: str):
+    """Tek dosya yanıtından içerik (başlık eşleşmezse ilk kod bloğu; yoksa None)"""
+    matches = re.findall(FILE_PATTERN, output, re.DOTALL)
+    for file_path, content in matches:
+        if file_path.strip().strip('`') == path:
+            return content.strip()
+    if matches:
+        return matches[0][1].strip()
+    block = re.search(r'```[\w+-]*\n(.*?)```', output, re.DOTALL)
+    return block.group(1).strip() if block else None
@@ -9,6 +9,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base_agent import BaseAgent
+from context_packer import PRIORITY_LOW, PRIORITY_REQUIRED
 from state_manager import update_version
 
 
@@ -23,57 +24,17 @@ class DocAgent(BaseAgent):
         # PRP dosyasını oku
         prp = self.get_project_file('prp/prp.md')
         
-        # Kod dosyalarını oku
-        src_path = self.project_path / 'src'
-        code_files = []
-        
-        if src_path.exists():
-            for file_path in src_path.rglob('*'):
-                if file_path.is_file():
-                    relative = file_path.relative_to(self.project_path)
-                    try:
-                        content = file_path.read_text(encoding='utf-8')
-                        code_files.append((str(relative), content))
-                    except:
-                        pass
-        
         # Test sonuçları
         test_results = self.get_project_file('reports/test_results.md')
         
-        prompt_parts = [
+        header = "".join([
             self.system_prompt,
             "\n\n---\n\n",
             "## Project Information\n",
             f"Project ID: {state.get('meta', {}).get('project_id', self.project_name)}\n",
-        ]
-        
-        if prp:
-            prompt_parts.extend([
-                "\n## PRP Document\n",
-                "```markdown\n",
-                prp,
-                "\n```\n"
-            ])
-        
-        if code_files:
-            prompt_parts.append("\n## Source Code\n")
-            for rel_path, content in code_files:
-                prompt_parts.extend([
-                    f"\n### {rel_path}\n",
-                    "```\n",
-                    content,
-                    "\n```\n"
-                ])
-        
-        if test_results:
-            prompt_parts.extend([
-                "\n## Test Results\n",
-                "```\n",
-                test_results,
-                "\n```\n"
-            ])
+        ])
         
-        prompt_parts.extend([
+        task = "".join([
             "\n## Task\n",
             "Generate architecture documentation based on the PRP and code above.\n",
             "Include:\n",
@@ -85,20 +46,26 @@ class DocAgent(BaseAgent):
             "Output ONLY the documentation in Markdown format.\n"
         ])
         
-        return "".join(prompt_parts)
+        # Doküman için kod iskeleti yeterli olabilir; test sonuçları en düşük öncelik
+        packer = self.new_context_packer(header, task)
+        packer.add('PRP Document', prp, PRIORITY_REQUIRED, fence='markdown', required=True)
+        packer.add_source_files(self.get_source_files(), group='Source Code', referenced_boost=False,
+                                changed=self.get_source_snapshot()['changed'])
+        packer.add('Test Results', test_results, PRIORITY_LOW)
+        
+        return header + self.pack_context(packer) + task
     
     def process_output(self, output: str, state: dict) -> dict:
         """Dokümantasyon çıktısını işle"""
         
-        # Versiyon güncelle
-        current_version = state.get('version', {}).get('docs', '0.0')
-        try:
-            major, minor = current_version.split('.')
-            new_version = f"{major}.{int(minor) + 1}"
-        except:
-            new_version = '1.0'
-        
         def state_updates(s):
+            # Versiyon güncel state'ten artırılır (eşzamanlı koşuların artışı kaybolmaz)
+            current_version = s.get('version', {}).get('docs', '0.0')
+            try:
+                major, minor = current_version.split('.')
+                new_version = f"{major}.{int(minor) + 1}"
+            except (AttributeError, ValueError):
+                new_version = '1.0'
             return update_version(s, 'docs', new_version)
         
         return {
@@ -68,17 +68,14 @@ class PRPAgent(BaseAgent):
     def process_output(self, output: str, state: dict) -> dict:
         """PRP çıktısını işle"""
         
-        # Mevcut versiyon
-        current_version = state.get('version', {}).get('prp', '0.0')
-        
-        # Versiyon artır
-        try:
-            major, minor = current_version.split('.')
-            new_version = f"{major}.{int(minor) + 1}"
-        except:
-            new_version = '1.0'
-        
         def state_updates(s):
+            # Versiyon güncel state'ten artırılır (eşzamanlı koşuların artışı kaybolmaz)
+            current_version = s.get('version', {}).get('prp', '0.0')
+            try:
+                major, minor = current_version.split('.')
+                new_version = f"{major}.{int(minor) + 1}"
+            except (AttributeError, ValueError):
+                new_version = '1.0'
             return update_version(s, 'prp', new_version)
         
         return {
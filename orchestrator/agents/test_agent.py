@@ -4,13 +4,19 @@ AI Factory - Test Agent
 Test üretimi ve çalıştırma (sadece pass/fail raporu - A1 kararı)
 """
 
-import re
-import subprocess
+import json
+from datetime import datetime
 from pathlib import Path
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from agents.base_agent import BaseAgent
+from context_packer import PRIORITY_REQUIRED, failing_test_lines
+from spec_runner import is_enabled as is_spec_runner_enabled, parse_specs, run_specs
+from test_impact import (CACHE_FILENAME as IMPACT_CACHE_FILENAME, CACHEABLE_STATUSES, is_full_run,
+                         load_cache as load_impact_cache, plan as plan_specs, save_cache as save_impact_cache)
+from test_results import RESULTS_FILE, append_history, new_run, render_markdown
+from syntax_checker import CACHE_FILENAME as SYNTAX_CACHE_FILENAME, check_files, format_error
 
 
 class TestAgent(BaseAgent):
@@ -18,6 +24,9 @@ class TestAgent(BaseAgent):
     
     agent_type = 'test'
     
+    # Syntax / spec cache'lerini yok say (runner full_run, --full-run)
+    full_run = False
+    
     def build_prompt(self, state: dict) -> str:
         """Test üretim prompt'u oluştur"""
         
@@ -25,47 +34,16 @@ class TestAgent(BaseAgent):
         prp = self.get_project_file('prp/prp.md')
         
         # Kod dosyalarını oku
-        src_path = self.project_path / 'src'
-        code_files = []
-        
-        if src_path.exists():
-            for file_path in src_path.rglob('*'):
-                if file_path.is_file() and file_path.suffix in ['.py', '.js', '.ts', '.sh']:
-                    relative = file_path.relative_to(self.project_path)
-                    try:
-                        content = file_path.read_text(encoding='utf-8')
-                        code_files.append((str(relative), content))
-                    except:
-                        pass
-        
-        prompt_parts = [
+        code_files = self.get_source_files(['.py', '.js', '.ts', '.sh'])
+        
+        header = "".join([
             self.system_prompt,
             "\n\n---\n\n",
             "## Project Information\n",
             f"Project ID: {state.get('meta', {}).get('project_id', self.project_name)}\n",
-        ]
-        
-        if prp:
-            prompt_parts.extend([
-                "\n## PRP Document\n",
-                "```markdown\n",
-                prp,
-                "\n```\n"
-            ])
-        
-        if code_files:
-            prompt_parts.append("\n## Source Code\n")
-            for rel_path, content in code_files:
-                prompt_parts.extend([
-                    f"\n### {rel_path}\n",
-                    "```\n",
-                    content,
-                    "\n```\n"
-                ])
-        else:
-            prompt_parts.append("\n## Source Code\nNo source code found in src/\n")
+        ])
         
-        prompt_parts.extend([
+        task = "".join([
             "\n## Task\n",
             "Generate test specifications based on the PRP and code above.\n",
             "Use the following format:\n\n",
@@ -73,63 +51,128 @@ class TestAgent(BaseAgent):
             "## Test Specifications\n\n",
             "### Test 1: [Test Name]\n",
             "- Input: [input description]\n",
-            "- Expected: [expected output]\n",
-            "- Command: [command to run, if applicable]\n\n",
+            "- Expected: [expected output; exact output text in `backticks`]\n",
+            "- Command: [shell command run from the project root, e.g. `python3 src/main.py`; N/A for manual tests]\n",
+            "- Exit code: [optional, expected exit code when it is not 0]\n\n",
             "### Test 2: ...\n",
             "```\n\n",
+            "Commands may be executed automatically (no stdin, 30s timeout). A test passes when\n",
+            "the exit code matches and the backticked Expected text appears in stdout.\n",
             "Output ONLY the test specifications in Markdown format.\n"
         ])
         
-        return "".join(prompt_parts)
+        if not code_files:
+            task = "\n## Source Code\nNo source code found in src/\n" + task
+        
+        # Önceki koşuda başarısız olan dosyalar öne alınır
+        failing = "\n".join(failing_test_lines(self.get_project_file('reports/test_results.md')))
+        
+        packer = self.new_context_packer(header, task)
+        packer.add('PRP Document', prp, PRIORITY_REQUIRED, fence='markdown', required=True)
+        packer.add_source_files(code_files, group='Source Code', failing_text=failing,
+                                changed=self.get_source_snapshot()['changed'])
+        
+        return header + self.pack_context(packer) + task
+    
+    def _is_full_run(self) -> bool:
+        return self.full_run or is_full_run()
+    
+    def _check_syntax(self) -> list:
+        """
+        src/ altındaki .py dosyalarını derle
+        
+        Returns:
+            syntax_checker.check_files sonucu
+        """
+        files = [(path, content) for path, content, _ in self.get_source_files(['.py'])]
+        
+        # Snapshot'a girmeyen .py dosyaları (büyük / UTF-8 değil) ham baytlarıyla
+        # kontrol edilir; geçersiz kodlama ya da null bayt hata olarak raporlanır
+        for path in sorted(self.get_source_snapshot()['skipped']):
+            if path.endswith('.py'):
+                files.append((path, (self.project_path / path).read_bytes()))
+        
+        cache_path = None if self._is_full_run() else self.project_path / 'state' / SYNTAX_CACHE_FILENAME
+        return check_files(files, cache_path=cache_path)
     
-    def _run_tests(self, test_specs: str) -> str:
-        """Test'leri çalıştır ve sonuçları döndür"""
-        
-        results = ["# Test Results\n"]
-        results.append(f"Project: {self.project_name}\n")
-        results.append(f"Date: {__import__('datetime').datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        # Basit test: Python dosyası varsa syntax kontrolü
-        src_path = self.project_path / 'src'
-        passed = 0
-        failed = 0
-        
-        if src_path.exists():
-            for py_file in src_path.rglob('*.py'):
-                relative = py_file.relative_to(self.project_path)
-                try:
-                    # Syntax check
-                    result = subprocess.run(
-                        ['python3', '-m', 'py_compile', str(py_file)],
-                        capture_output=True,
-                        text=True,
-                        timeout=30
-                    )
-                    if result.returncode == 0:
-                        results.append(f"✅ PASS: {relative} - Syntax OK\n")
-                        passed += 1
-                    else:
-                        results.append(f"❌ FAIL: {relative} - Syntax Error\n")
-                        results.append(f"   Error: {result.stderr[:200]}\n")
-                        failed += 1
-                except subprocess.TimeoutExpired:
-                    results.append(f"⚠️ TIMEOUT: {relative}\n")
-                    failed += 1
-                except Exception as e:
-                    results.append(f"❌ ERROR: {relative} - {str(e)}\n")
-                    failed += 1
-        
-        # Özet
-        total = passed + failed
-        results.append(f"\n## Summary\n")
-        results.append(f"- Total: {total}\n")
-        results.append(f"- Passed: {passed}\n")
-        results.append(f"- Failed: {failed}\n")
-        
-        if total > 0:
-            results.append(f"- Pass Rate: {passed/total:.1%}\n")
-        
-        return "".join(results), passed, failed
+    def _run_specs(self, test_specs: str) -> list:
+        """
+        Spesifikasyon komutlarını çalıştır; kodu ve spec'i değişmeyenler cache'ten gelir
+        
+        Returns:
+            [(spec_runner.run_spec sonucu, cached, touched), ...]
+        """
+        snapshot = self.get_source_snapshot()
+        contents = {path: None for path in snapshot['hashes']}
+        contents.update((path, content) for path, content, _ in snapshot['files'])
+        
+        cache_path = self.project_path / 'state' / IMPACT_CACHE_FILENAME
+        cache = load_impact_cache(cache_path)
+        items = plan_specs(parse_specs(test_specs), contents, snapshot['hashes'],
+                           self.project_path, cache, full_run=self._is_full_run())
+        
+        fresh = iter(run_specs([item['spec'] for item in items if item['cached'] is None], self.project_path))
+        results = []
+        current = {}
+        for item in items:
+            result = item['cached'] or next(fresh)
+            if result['status'] in CACHEABLE_STATUSES:
+                current[item['key']] = result
+            results.append((result, item['cached'] is not None, item['touched']))
+        
+        reused = sum(1 for _, cached, _ in results if cached)
+        if reused:
+            print(f"♻️ {reused}/{len(results)} spec tests unchanged, using cached results")
+        
+        # Sadece güncel spesifikasyonların sonuçları tutulur
+        if current != cache:
+            save_impact_cache(cache_path, current)
+        return results
+    
+    def _run_tests(self, test_specs: str) -> list:
+        """
+        Test'leri çalıştır
+        
+        Returns:
+            test_results kayıt formatında test listesi
+        """
+        tests = []
+        
+        # Python dosyalarının syntax kontrolü (süreç içi, hash cache'li)
+        for check in self._check_syntax():
+            error = check['error'] or {}
+            tests.append({
+                'id': f"syntax:{check['path']}",
+                'kind': 'syntax',
+                'name': 'Syntax Check',
+                'target': check['path'],
+                'status': 'passed' if check['ok'] else 'failed',
+                'duration': check['duration'],
+                'message': format_error(check['error']) or None,
+                'error': check['error'],
+                'source_line': (error.get('text') or '').strip() or None,
+                'cached': check['cached']
+            })
+        
+        # Spesifikasyonlardaki komutlar (opt-in, paralel)
+        if is_spec_runner_enabled(self.project_path):
+            for spec, cached, touched in self._run_specs(test_specs):
+                tests.append({
+                    'id': spec['id'],
+                    'kind': 'spec',
+                    'name': spec['name'],
+                    'target': spec['command'],
+                    'status': spec['status'],
+                    'duration': spec['duration'],
+                    'message': spec['reason'],
+                    'expected': spec['expected'],
+                    'exit_code': spec['exit_code'],
+                    'output': (spec['stderr'] or spec['stdout']).strip() or None,
+                    'touched': touched,
+                    'cached': cached
+                })
+        
+        return tests
     
     def process_output(self, output: str, state: dict) -> dict:
         """Test çıktısını işle"""
@@ -138,12 +181,14 @@ class TestAgent(BaseAgent):
         files = [('tests/test_specs.md', output.strip())]
         
         # Testleri çalıştır
-        test_results, passed, failed = self._run_tests(output)
-        files.append(('reports/test_results.md', test_results))
-        
-        # Pass rate hesapla
-        total = passed + failed
-        pass_rate = passed / total if total > 0 else 0
+        started_at = datetime.now()
+        run = new_run(self.project_name, self.llm_config.get('model'), started_at, self._run_tests(output))
+        files.append((RESULTS_FILE, json.dumps(run, indent=2, ensure_ascii=False)))
+        files.append(('reports/test_results.md', render_markdown(run)))
+        append_history(self.project_path, run)
+        
+        failed = run['summary']['failed']
+        pass_rate = run['summary']['pass_rate']
         
         def state_updates(s):
             if 'health' not in s:
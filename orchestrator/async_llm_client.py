@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Async LLM Client
+asyncio tabanlı LLM çağrısı + eşzamanlılık limitli gather
+
+Birden fazla çağrı yapan agent'lar (dosya başına kod, modül başına
+doküman) istekleri paralel atar; toplam süre en yavaş çağrı kadar olur.
+
+Provider soyutlaması (_build_request_body / _parse_response), cache,
+rate limit, retry adımları (_prepare_call / _acquire_permit /
+_finish_attempt) ve failover LLMClient ile ortaktır. HTTP katmanı
+aiohttp kuruluysa native async, değilse paylaşılan requests havuzu
+üzerinden thread'e devredilir.
+"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Iterable, List, Union
+
+try:
+    import aiohttp
+except ImportError:  # opsiyonel bağımlılık
+    aiohttp = None
+
+from http_pool import get_pool_config
+from llm_client import LLMClient, get_retry_policy, parse_retry_after
+
+
+# (event loop id, provider) -> aiohttp.ClientSession
+_sessions = {}
+
+
+def _get_session(provider: str):
+    """Aktif event loop için provider session'ı (aiohttp)"""
+    key = (id(asyncio.get_running_loop()), provider)
+    session = _sessions.get(key)
+    if session is None or session.closed:
+        pool = get_pool_config(provider)
+        connector = aiohttp.TCPConnector(
+            limit=int(pool['pool_connections']) * int(pool['pool_maxsize']),
+            limit_per_host=int(pool['pool_maxsize'])
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[key] = session
+    return session
+
+
+async def close_sessions():
+    """Aktif event loop'a ait aiohttp session'larını kapat"""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _sessions if k[0] == loop_id]:
+        await _sessions.pop(key).close()
+
+
+class AsyncLLMClient(LLMClient):
+    """asyncio LLM client (streaming desteklemez, tam yanıt döner)"""
+
+    async def acall(self, prompt: str) -> dict:
+        """
+        LLM çağrısı yap (retry + failover dahil)
+
+        Returns:
+            LLMClient.call ile aynı format
+        """
+        failover = []
+        attempts = 0
+        result = None
+
+        for profile_name, client in self._failover_chain():
+            if isinstance(client, Exception):
+                failover.append({'profile': profile_name, 'model': None, 'error': str(client)})
+                continue
+
+            result = await client._acall_with_retry(prompt)
+            attempts += result['attempts']
+            if result['success']:
+                break
+
+            failover.append({
+                'profile': profile_name,
+                'model': client.model,
+                'error': (result['error'] or '')[:300]
+            })
+
+        result['attempts'] = attempts
+        result['failover'] = failover
+        return result
+
+    async def _acall_with_retry(self, prompt: str) -> dict:
+        """
+        LLMClient._retry_events'in async karşılığı (aynı adımlar)
+
+        Cache diski, rate limit (SQLite + bekleme) ve backoff beklemesi
+        bloklayıcı olduğundan thread'e devredilir; event loop serbest kalır.
+        """
+        call = await asyncio.to_thread(self._prepare_call, prompt)
+        if call['result']:
+            return call['result']
+
+        result = None
+        for attempt in range(1, call['max_attempts'] + 1):
+            result = await asyncio.to_thread(self._acquire_permit, call, attempt)
+            if result:
+                break
+
+            result = await self._attempt(call['base_url'], prompt, call['token_check'])
+            delay = await asyncio.to_thread(self._finish_attempt, call, attempt, result)
+            if delay is None:
+                break
+            # cancel_event.wait thread'de; iptal beklemeyi keser
+            await asyncio.to_thread(self._wait, delay)
+
+        return result
+
+    async def _attempt(self, base_url: str, prompt: str, token_check: dict) -> dict:
+        """Tek HTTP denemesi (retry kararı için 'retryable' / 'retry_after' taşır)"""
+        if aiohttp is None:
+            return await asyncio.to_thread(self._sync_attempt, base_url, prompt, token_check)
+
+        headers = self._get_headers()
+        body = self._build_request_body(prompt, token_check['effective_max_output'])
+        policy = get_retry_policy(self.config)
+
+        try:
+            async with _get_session(self.provider).post(
+                base_url,
+                headers=headers,
+                json=body,
+                timeout=aiohttp.ClientTimeout(total=120)
+            ) as response:
+                if response.status != 200:
+                    text = await response.text()
+                    result = self._result(False, '', f"API error {response.status}: {text[:500]}", token_check)
+                    result['status_code'] = response.status
+                    result['retryable'] = response.status in policy['retry_on_status']
+                    result['retry_after'] = parse_retry_after(response.headers.get('Retry-After'))
+                    return result
+
+                response_json = await response.json(content_type=None)
+                return self._result(True, self._parse_response(response_json), None, token_check)
+
+        except asyncio.TimeoutError:
+            result = self._result(False, '', 'Request timeout (120s)', token_check)
+            result['retryable'] = True
+            return result
+        except aiohttp.ClientConnectionError as e:
+            result = self._result(False, '', f"Request failed: {str(e)}", token_check)
+            result['retryable'] = True
+            return result
+        except aiohttp.ClientError as e:
+            return self._result(False, '', f"Request failed: {str(e)}", token_check)
+        except (json.JSONDecodeError, ValueError) as e:
+            return self._result(False, '', f"Invalid JSON response: {str(e)}", token_check)
+
+    def _sync_attempt(self, base_url: str, prompt: str, token_check: dict) -> dict:
+        """aiohttp yoksa: senkron tek deneme (thread içinde çalışır)"""
+        result = None
+        for event in self._attempt_events(base_url, prompt, token_check, stream=False):
+            result = event
+        return result
+
+
+async def gather_bounded(tasks: Iterable[Union[Awaitable, Callable[[], Awaitable]]], limit: int = 4) -> List:
+    """
+    asyncio.gather + eşzamanlılık limiti
+
+    Args:
+        tasks: Coroutine'ler ya da coroutine döndüren fonksiyonlar
+               (fonksiyon verilirse coroutine ancak slot açılınca oluşturulur)
+        limit: Aynı anda çalışacak en fazla görev
+
+    Returns:
+        Sonuçlar, giriş sırasıyla
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(task):
+        async with semaphore:
+            if callable(task):
+                task = task()
+            return await task
+
+    return await asyncio.gather(*(run(task) for task in tasks))
+
+
+def run_bounded(tasks, limit: int = 4) -> List:
+    """
+    Senkron koddan (agent'lar) gather_bounded çalıştır
+
+    Kendi event loop'unu açar ve bitince aiohttp session'larını kapatır.
+    """
+    async def main():
+        try:
+            return await gather_bounded(tasks, limit)
+        finally:
+            if aiohttp is not None:
+                await close_sessions()
+
+    return asyncio.run(main())
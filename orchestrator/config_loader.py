@@ -2,11 +2,29 @@
 """
 AI Factory - Config Loader
 Profile çözümleme ve LLM config okuma
+
+Orchestrator ve web aynı çözümleme yolunu kullanır: llm.profiles.yaml
+bir kez okunup schemas/llm.schema.yaml'a göre doğrulanır ve
+ProfileRegistry'ye derlenir. Dosya (mtime / size / inode) değişmedikçe
+profile lookup'ları sözlük erişimidir.
 """
 
 import os
-import yaml
+import threading
 from pathlib import Path
+from typing import List, Optional
+
+import yaml_io
+from config_schema import validate as validate_schema
+
+
+# Uzun ömürlü süreçler (daemon, web) için stat bazlı dosya cache'i
+# {path: ((mtime_ns, size, inode), value)}
+_file_cache = {}
+_file_cache_lock = threading.Lock()
+
+# (profiles verisi, şema, ProfileRegistry); kaynaklar aynı nesneyse tekrar derlenmez
+_registry_cache = None
 
 
 def get_control_plane_path() -> Path:
@@ -23,21 +41,166 @@ def load_yaml(file_path: Path) -> dict:
     """YAML dosyası yükle"""
     if not file_path.exists():
         return {}
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+    with open(file_path, 'rb') as f:
+        return yaml_io.safe_load(f) or {}
 
 
 def save_yaml(file_path: Path, data: dict):
-    """YAML dosyası kaydet"""
+    """YAML dosyası kaydet (geçici dosya + rename; okuyan yarım dosya görmez)"""
     file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        yaml.dump(data, f, default_flow_style=False, allow_unicode=True, sort_keys=False)
+    tmp_path = file_path.with_name(f".{file_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        yaml_io.dump(data, f)
+    os.replace(tmp_path, file_path)
+
+
+def _load_cached(file_path: Path, loader):
+    """
+    Dosyayı mtime / size / inode değişmedikçe tekrar okumadan döndür
+    
+    inode: rename ile değiştirilen dosyalar (save_yaml, editörler) aynı
+    mtime'a denk gelse de yakalanır.
+    Dönen değer paylaşılır; çağıranlar değiştirmeden önce kopyalamalı.
+    """
+    try:
+        stat = file_path.stat()
+    except FileNotFoundError:
+        return None
+    
+    key = str(file_path)
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cached = _file_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    value = loader(file_path)
+    with _file_cache_lock:
+        _file_cache[key] = (signature, value)
+    return value
+
+
+def _read_text(file_path: Path) -> str:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def get_profiles_path() -> Path:
+    return get_control_plane_path() / 'config' / 'llm.profiles.yaml'
+
+
+def get_llm_schema_path() -> Path:
+    return get_control_plane_path() / 'schemas' / 'llm.schema.yaml'
 
 
 def load_profiles() -> dict:
-    """Global LLM profiles yükle"""
-    profiles_path = get_control_plane_path() / 'config' / 'llm.profiles.yaml'
-    return load_yaml(profiles_path)
+    """Global LLM profiles yükle (mtime değişmedikçe cache'ten)"""
+    return _load_cached(get_profiles_path(), load_yaml) or {}
+
+
+def load_llm_schema() -> dict:
+    """schemas/llm.schema.yaml (proje llm.yaml ve profile'ların şeması)"""
+    return _load_cached(get_llm_schema_path(), load_yaml) or {}
+
+
+class ProfileRegistry:
+    """
+    Doğrulanmış, provider bilgisi eklenmiş profile'lar
+    
+    Şemaya uymayan profile'lar `errors`'a alınır ve çözümlenemez;
+    geri kalanlar çalışmaya devam eder.
+    """
+    
+    def __init__(self, profiles_data: dict, schema: dict):
+        self.raw = profiles_data
+        self.providers = profiles_data.get('providers', {}) or {}
+        self.default_profile = profiles_data.get('default_profile', 'gemma-free')
+        self.profiles = {}
+        self.errors = {}
+        
+        for name, profile in (profiles_data.get('profiles') or {}).items():
+            errors = validate_schema(profile, schema) if isinstance(profile, dict) else ['profile must be a mapping']
+            if errors:
+                self.errors[name] = errors
+                print(f"⚠️ Invalid LLM profile '{name}': {'; '.join(errors)}")
+                continue
+            self.profiles[name] = self._compile(name, profile)
+    
+    def _compile(self, name: str, profile: dict) -> dict:
+        config = dict(profile)
+        config['profile'] = name
+        provider_name = config.get('provider')
+        if provider_name and provider_name in self.providers:
+            config['provider_config'] = self.providers[provider_name]
+        return config
+    
+    def names(self) -> List[str]:
+        return list(self.profiles)
+    
+    def get(self, name: str) -> dict:
+        """Çözümlenmiş profile (kopya; çağıran değiştirebilir)"""
+        if name in self.errors:
+            raise ValueError(f"Invalid profile: {name} ({'; '.join(self.errors[name])})")
+        if name not in self.profiles:
+            raise ValueError(f"Unknown profile: {name}")
+        return dict(self.profiles[name])
+    
+    def get_or_default(self, name: Optional[str]) -> dict:
+        """name yoksa / geçersizse default_profile"""
+        if name in self.profiles:
+            return self.get(name)
+        return self.get(self.default_profile)
+    
+    def summary(self) -> List[dict]:
+        """UI için profile listesi"""
+        return [
+            {
+                'name': name,
+                'model': config.get('model', 'Unknown'),
+                'description': config.get('description', ''),
+                'is_default': name == self.default_profile
+            }
+            for name, config in self.profiles.items()
+        ]
+
+
+def get_profile_registry() -> ProfileRegistry:
+    """Derlenmiş profile'lar (profiles / şema dosyası değişince yeniden derlenir)"""
+    global _registry_cache
+    # Ham cache değerleri: dosya yoksa None (her çağrıda yeni {} değil) ve kimlik karşılaştırması tutar
+    profiles_data = _load_cached(get_profiles_path(), load_yaml)
+    schema = _load_cached(get_llm_schema_path(), load_yaml)
+    cached = _registry_cache
+    if cached and cached[0] is profiles_data and cached[1] is schema:
+        return cached[2]
+    
+    registry = ProfileRegistry(profiles_data or {}, schema or {})
+    _registry_cache = (profiles_data, schema, registry)
+    return registry
+
+
+STORAGE_DEFAULTS = {
+    'state_backend': 'yaml',
+    'sqlite_path': 'runtime/state.sqlite',
+    'export_yaml': True,
+    'yaml_sidecar_cache': False
+}
+
+
+def load_storage_config() -> dict:
+    """config/storage.yaml (yoksa varsayılanlar)"""
+    storage_path = get_control_plane_path() / 'config' / 'storage.yaml'
+    config = (_load_cached(storage_path, load_yaml) or {}).get('storage') or {}
+    return {**STORAGE_DEFAULTS, **config}
+
+
+def load_project_config(project_path: Path, name: str) -> dict:
+    """
+    Proje config/<name>.yaml (yoksa {})
+
+    Dosya değişmedikçe tekrar ayrıştırılmaz; dönen dict paylaşılır,
+    değiştirilmemeli.
+    """
+    return _load_cached(Path(project_path) / 'config' / f"{name}.yaml", load_yaml) or {}
 
 
 def resolve_llm_config(project_name: str, profile_override: str = None) -> dict:
@@ -57,47 +220,51 @@ def resolve_llm_config(project_name: str, profile_override: str = None) -> dict:
     Returns:
         LLM config dictionary
     """
-    profiles_data = load_profiles()
-    profiles = profiles_data.get('profiles', {})
-    providers = profiles_data.get('providers', {})
-    default_profile = profiles_data.get('default_profile', 'gemma-free')
+    registry = get_profile_registry()
     
     # 1. CLI Override varsa direkt kullan
     if profile_override:
-        if profile_override not in profiles:
-            raise ValueError(f"Unknown profile: {profile_override}")
-        config = profiles[profile_override].copy()
-    else:
-        # 2. Proje llm.yaml kontrol et
-        project_path = get_projects_path() / project_name
-        project_llm_path = project_path / 'config' / 'llm.yaml'
-        project_config = load_yaml(project_llm_path)
-        
-        if project_config:
-            # Full config mi yoksa profile referansı mı?
-            if 'profile' in project_config and 'provider' not in project_config:
-                # Profile referansı
-                profile_name = project_config['profile']
-                if profile_name not in profiles:
-                    raise ValueError(f"Unknown profile: {profile_name}")
-                config = profiles[profile_name].copy()
-            else:
-                # Full config
-                config = project_config.copy()
-        else:
-            # 3. Default profile kullan
-            if default_profile not in profiles:
-                raise ValueError(f"Default profile not found: {default_profile}")
-            config = profiles[default_profile].copy()
+        return registry.get(profile_override)
+    
+    # 2. Proje llm.yaml kontrol et
+    project_llm_path = get_projects_path() / project_name / 'config' / 'llm.yaml'
+    project_config = _load_cached(project_llm_path, load_yaml)
+    
+    if not project_config:
+        # 3. Default profile kullan
+        if registry.default_profile not in registry.profiles:
+            raise ValueError(f"Default profile not found: {registry.default_profile}")
+        return registry.get(registry.default_profile)
+    
+    # Full config mi yoksa profile referansı mı?
+    if 'profile' in project_config and 'provider' not in project_config:
+        # Profile referansı
+        return registry.get(project_config['profile'])
+    
+    # Full config
+    # 'profile' + provider birlikteyse profile sadece etiket; full config olarak doğrulanır
+    errors = validate_schema({k: v for k, v in project_config.items() if k != 'profile'}, load_llm_schema())
+    if errors:
+        raise ValueError(f"Invalid LLM config {project_llm_path}: {'; '.join(errors)}")
+    config = dict(project_config)
     
     # Provider bilgilerini ekle
     provider_name = config.get('provider')
-    if provider_name and provider_name in providers:
-        config['provider_config'] = providers[provider_name]
+    if provider_name and provider_name in registry.providers:
+        config['provider_config'] = registry.providers[provider_name]
     
     return config
 
 
+def resolve_profile(profile_name: str) -> dict:
+    """
+    Tek bir profile'ı provider bilgileriyle birlikte çözümle
+    
+    Failover zinciri (fallback_profiles) de bunu kullanır.
+    """
+    return get_profile_registry().get(profile_name)
+
+
 def load_agent_prompt(agent_type: str, project_name: str = None) -> str:
     """
     Agent prompt'unu yükle
@@ -112,15 +279,15 @@ def load_agent_prompt(agent_type: str, project_name: str = None) -> str:
     if project_name:
         project_path = get_projects_path() / project_name
         override_path = project_path / 'agents' / 'overrides' / agent_file
-        if override_path.exists():
-            with open(override_path, 'r', encoding='utf-8') as f:
-                return f.read()
+        prompt = _load_cached(override_path, _read_text)
+        if prompt is not None:
+            return prompt
     
     # Global template
     template_path = get_control_plane_path() / 'agents' / 'templates' / agent_file
-    if template_path.exists():
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    prompt = _load_cached(template_path, _read_text)
+    if prompt is not None:
+        return prompt
     
     raise FileNotFoundError(f"Agent prompt not found: {agent_file}")
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Config Schema
+schemas/*.schema.yaml için küçük JSON-Schema alt kümesi doğrulayıcısı
+
+Desteklenen anahtarlar: type, enum, minimum, maximum, required,
+properties, items, oneOf. Diğerleri (description, examples, default)
+yok sayılır; şemada olmayan alanlara izin verilir.
+"""
+
+from typing import List
+
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool,
+}
+
+
+def _type_ok(value, expected: str) -> bool:
+    if value is None:
+        return expected == 'null'
+    python_type = _TYPES.get(expected)
+    if python_type is None:
+        return True
+    # bool, int'in alt sınıfı; integer / number yerine geçmesin
+    if isinstance(value, bool) and expected in ('integer', 'number'):
+        return False
+    return isinstance(value, python_type)
+
+
+def validate(value, schema: dict, path: str = '') -> List[str]:
+    """
+    Returns:
+        Hata mesajları (boş liste: geçerli)
+    """
+    if not isinstance(schema, dict):
+        return []
+    where = path or '<root>'
+    errors = []
+
+    expected = schema.get('type')
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_type_ok(value, t) for t in types):
+            return [f"{where}: expected {'/'.join(types)}, got {type(value).__name__}"]
+
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append(f"{where}: {value!r} not in {schema['enum']}")
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if 'minimum' in schema and value < schema['minimum']:
+            errors.append(f"{where}: {value} < minimum {schema['minimum']}")
+        if 'maximum' in schema and value > schema['maximum']:
+            errors.append(f"{where}: {value} > maximum {schema['maximum']}")
+
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                errors.append(f"{where}: missing required '{key}'")
+        for key, sub_schema in (schema.get('properties') or {}).items():
+            if key in value and value[key] is not None:
+                errors.extend(validate(value[key], sub_schema, f"{path}.{key}" if path else key))
+
+    if isinstance(value, list) and 'items' in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema['items'], f"{path}[{i}]"))
+
+    if 'oneOf' in schema:
+        branches = [validate(value, branch, path) for branch in schema['oneOf']]
+        matching = [b for b in branches if not b]
+        if len(matching) != 1:
+            if not matching:
+                # Zorunlu alanları sağlanan dalın mesajları en açıklayıcısı
+                errors.extend(min(branches, key=lambda b: (sum('missing required' in e for e in b), len(b))))
+            else:
+                errors.append(f"{where}: matches {len(matching)} oneOf branches, expected exactly one")
+
+    return errors
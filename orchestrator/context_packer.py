@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Context Packer
+Agent prompt'larını context bütçesine sığdırma
+
+Bütçe = max_context_tokens - max_output_tokens - (system prompt + görev metni)
+
+Bölümler öncelik puanına göre açgözlü (greedy) doldurulur:
+  - PRP (zorunlu; sığmazsa kesilir)
+  - Başarısız test sonuçları
+  - Başarısız testlerin referans verdiği dosyalar
+  - Son taramadan beri içeriği değişen dosyalar (source_index)
+  - Diğerleri mtime sırasıyla
+
+Tam hali sığmayan bölümün özeti (import/class/def satırları) denenir;
+o da sığmazsa atlanır; ikisi de prompt'taki "Context Note" listesine yazılır.
+Bölümler prompt'a eklenme sırasıyla (PRP, kod, test sonuçları) yazılır.
+"""
+
+import re
+from pathlib import Path
+from typing import List, Optional
+
+from token_utils import estimate_tokens, truncate_to_token_limit
+
+
+# Öncelik puanları
+PRIORITY_REQUIRED = 100
+PRIORITY_FAILING_TESTS = 80
+PRIORITY_TEST_REFERENCED = 70
+PRIORITY_CHANGED = 65
+PRIORITY_RECENT_MAX = 60
+PRIORITY_RECENT_MIN = 40
+PRIORITY_LOW = 20
+
+# Token sayımı tahmin olabileceği için bütçeden ayrılan pay
+SAFETY_MARGIN = 0.03
+
+# Özetlerde tutulan en fazla satır
+SUMMARY_MAX_LINES = 60
+
+_OUTLINE_RE = re.compile(
+    r'^\s*(?:async\s+def|def|class|import|from\s+\S+\s+import|function|export|'
+    r'module\.exports|const\s+\w+\s*=\s*(?:async\s*)?\(|#!|@\w+)'
+)
+
+_FAILURE_RE = re.compile(r'FAIL|ERROR|TIMEOUT|Traceback|Error:', re.IGNORECASE)
+
+
+def summarize_source(content: str, max_lines: int = SUMMARY_MAX_LINES) -> str:
+    """Kaynak dosyanın iskeleti (import / class / def satırları)"""
+    lines = content.splitlines()
+    outline = [line.rstrip() for line in lines if _OUTLINE_RE.match(line)][:max_lines]
+    header = f"# [summary: {len(lines)} lines, only signatures shown]"
+    return "\n".join([header] + outline)
+
+
+def failing_test_lines(test_results: str) -> List[str]:
+    """Test raporundaki başarısız satırlar (ve hemen altındaki hata satırları)"""
+    if not test_results:
+        return []
+    lines = test_results.splitlines()
+    picked = []
+    for i, line in enumerate(lines):
+        if _FAILURE_RE.search(line) and not line.lstrip().startswith('- Failed:'):
+            picked.append(i)
+            # Girintili devam satırları (Error: ..., traceback)
+            picked.extend(j for j in range(i + 1, min(i + 4, len(lines)))
+                          if lines[j].startswith((' ', '\t')))
+    return [lines[i] for i in sorted(set(picked))]
+
+
+def is_referenced(relative_path: str, text: str) -> bool:
+    """Dosya (tam path, src/ sonrası path, dosya ya da modül adı) metinde geçiyor mu"""
+    if not text:
+        return False
+    path = Path(relative_path)
+    candidates = [relative_path, path.name]
+    if len(path.parts) > 1 and path.parts[0] == 'src':
+        candidates.append(str(Path(*path.parts[1:])))
+    if any(c in text for c in candidates):
+        return True
+    # Traceback / import satırlarında sadece modül adı geçer
+    return len(path.stem) >= 4 and re.search(rf'\b{re.escape(path.stem)}\b', text) is not None
+
+
+class ContextPacker:
+    """Bölümleri öncelik sırasıyla token bütçesine yerleştirir"""
+
+    def __init__(self, llm_config: dict, reserved_text: str = ''):
+        """
+        Args:
+            llm_config: Çözümlenmiş LLM config (model, max_context_tokens, max_output_tokens)
+            reserved_text: Paketlenen bölümlerin dışında prompt'a giren metin
+                           (system prompt, proje başlığı, görev)
+        """
+        self.model = llm_config.get('model')
+        max_context = llm_config.get('max_context_tokens', 8192)
+        max_output = llm_config.get('max_output_tokens', 2048)
+        available = max_context - max_output - estimate_tokens(reserved_text, self.model)
+        self.budget = max(0, int(available * (1 - SAFETY_MARGIN)))
+        self.sections = []
+        self.report = None
+
+    def add(self, title: str, body: str, priority: int, group: Optional[str] = None,
+            fence: str = '', required: bool = False, summary: Optional[str] = None):
+        """
+        Bölüm ekle
+
+        Args:
+            title: Başlık (group varsa ### title, yoksa ## title)
+            body: Tam içerik
+            priority: Yüksek puan önce yerleştirilir
+            group: Ortak başlık ("Existing Code" gibi)
+            fence: Kod bloğu dili ('markdown', '' ...)
+            required: Sığmazsa atlanmaz, kesilir
+            summary: Tam hali sığmazsa denenecek kısa hali
+        """
+        if not body:
+            return
+        self.sections.append({
+            'order': len(self.sections),
+            'title': title,
+            'body': body,
+            'priority': priority,
+            'group': group,
+            'fence': fence,
+            'required': required,
+            'summary': summary,
+        })
+
+    def add_source_files(self, files: list, group: str, failing_text: str = '',
+                         referenced_boost: bool = True, changed: set = None):
+        """
+        Kaynak dosyalarını puanlayarak ekle
+
+        Args:
+            files: [(relative_path, content, mtime), ...]
+            group: Bölüm başlığı ("Existing Code", "Source Code")
+            failing_text: Başarısız test satırları (referans verilen dosyalar öne alınır)
+            changed: Son snapshot'tan beri değişen dosyalar
+        """
+        # En son değişen dosya en yüksek puanı alır
+        ranked = sorted(files, key=lambda f: f[2], reverse=True)
+        span = PRIORITY_RECENT_MAX - PRIORITY_RECENT_MIN
+        for rank, (relative_path, content, _) in enumerate(ranked):
+            if referenced_boost and is_referenced(relative_path, failing_text):
+                priority = PRIORITY_TEST_REFERENCED
+            elif changed and relative_path in changed:
+                priority = PRIORITY_CHANGED
+            elif len(ranked) > 1:
+                priority = PRIORITY_RECENT_MAX - span * rank / (len(ranked) - 1)
+            else:
+                priority = PRIORITY_RECENT_MAX
+            self.add(relative_path, content, priority, group=group,
+                     summary=summarize_source(content))
+
+        # Prompt'ta dosyalar path sırasıyla görünsün
+        group_sections = [s for s in self.sections if s['group'] == group]
+        for order, section in zip(sorted(s['order'] for s in group_sections),
+                                  sorted(group_sections, key=lambda s: s['title'])):
+            section['order'] = order
+
+    def _render(self, section: dict, body: str) -> str:
+        level = '###' if section['group'] else '##'
+        return f"\n{level} {section['title']}\n```{section['fence']}\n{body}\n```\n"
+
+    def pack(self) -> str:
+        """
+        Bütçeyi doldur ve prompt parçasını döndür
+
+        self.report: {'budget', 'used', 'included', 'summarized', 'truncated', 'omitted'}
+        """
+        remaining = self.budget
+        chosen = {}
+        report = {'budget': self.budget, 'used': 0, 'included': [], 'summarized': [],
+                  'truncated': [], 'omitted': []}
+
+        groups = {s['group'] for s in self.sections if s['group']}
+        remaining -= sum(estimate_tokens(f"\n## {g}\n", self.model) for g in groups)
+
+        # Eşit öncelikte küçük bölüm önce (daha fazla dosya sığar)
+        queue = sorted(self.sections, key=lambda s: (-s['required'], -s['priority'], len(s['body'])))
+        for section in queue:
+            full = self._render(section, section['body'])
+            cost = estimate_tokens(full, self.model)
+            if cost <= remaining:
+                chosen[section['order']] = full
+                remaining -= cost
+                report['included'].append(section['title'])
+                continue
+
+            if section['summary']:
+                short = self._render(section, section['summary'])
+                cost = estimate_tokens(short, self.model)
+                if cost <= remaining:
+                    chosen[section['order']] = short
+                    remaining -= cost
+                    report['summarized'].append(section['title'])
+                    continue
+
+            if section['required'] and remaining > 0:
+                overhead = estimate_tokens(self._render(section, ''), self.model)
+                body = truncate_to_token_limit(section['body'], remaining - overhead, self.model)
+                if body:
+                    cut = self._render(section, body)
+                    chosen[section['order']] = cut
+                    remaining -= estimate_tokens(cut, self.model)
+                    report['truncated'].append(section['title'])
+                    continue
+
+            report['omitted'].append(section['title'])
+
+        parts = []
+        seen_groups = set()
+        for section in sorted(self.sections, key=lambda s: s['order']):
+            if section['order'] not in chosen:
+                continue
+            if section['group'] and section['group'] not in seen_groups:
+                seen_groups.add(section['group'])
+                parts.append(f"\n## {section['group']}\n")
+            parts.append(chosen[section['order']])
+
+        files = [(s['title'], 'summary shown') for s in self.sections if s['title'] in report['summarized']]
+        files += [(s['title'], 'not shown') for s in self.sections
+                  if s['group'] and s['title'] in report['omitted']]
+        if files:
+            note = ("\n## Context Note\n"
+                    "The context budget of this model is limited. The following files exist "
+                    "and are kept as-is unless you output them:\n")
+            remaining -= estimate_tokens(note, self.model)
+            for i, (title, how) in enumerate(files):
+                line = f"- {title} ({how})\n"
+                cost = estimate_tokens(line, self.model)
+                if cost > remaining:
+                    note += f"- ... and {len(files) - i} more\n"
+                    break
+                note += line
+                remaining -= cost
+            parts.append(note)
+
+        text = "".join(parts)
+        report['used'] = self.budget - remaining
+        self.report = report
+        return text
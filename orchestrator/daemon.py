@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Orchestrator Daemon
+Uzun ömürlü worker: agent sınıfları, config cache ve HTTP havuzları
+sıcak tutulur, job'lar lokal Unix socket üzerinden alınır.
+
+Protokol (satır başına bir JSON):
+    İstek:  {"action": "run", "project": ..., "agent": ..., "model": ..., "stream": bool, "verbose": bool,
+             "full_run": bool}
+            {"action": "ping"}
+    Yanıt:  {"event": "log", "message": str}
+            {"event": "token", "content": str}
+            {"event": "progress", "progress": {...}}   (dosya yazıldı vb.)
+            {"event": "result", "result": {...}}   (BaseAgent.run sonucu)
+            {"event": "pong", "pid": int, "uptime": float, "active": int}
+
+Bu modül üst seviyede sadece stdlib import eder; thin client yolu
+requests/yaml yüklemeden çalışır.
+"""
+
+import importlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+
+def get_default_socket_path() -> str:
+    """Daemon socket path'i (AI_FACTORY_DAEMON_SOCKET ile override edilebilir)"""
+    default = Path(__file__).parent.parent / 'runtime' / 'orchestrator.sock'
+    return os.environ.get('AI_FACTORY_DAEMON_SOCKET', str(default))
+
+
+# ============================================
+# CLIENT
+# ============================================
+
+def run_via_daemon(socket_path: str, request: dict, on_token=None, on_log=None, on_progress=None):
+    """
+    İsteği daemon'a gönder
+
+    Returns:
+        BaseAgent.run sonucu; daemon çalışmıyorsa None (çağıran in-process çalıştırır)
+    """
+    if not os.path.exists(socket_path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        # Eski socket dosyası kalmış, daemon ayakta değil
+        sock.close()
+        return None
+
+    with sock, sock.makefile('rw', encoding='utf-8') as stream:
+        stream.write(json.dumps(request) + '\n')
+        stream.flush()
+
+        for line in stream:
+            message = json.loads(line)
+            event = message.get('event')
+            if event == 'token' and on_token:
+                on_token(message['content'])
+            elif event == 'log' and on_log:
+                on_log(message['message'])
+            elif event == 'progress' and on_progress:
+                on_progress(message['progress'])
+            elif event in ('result', 'pong'):
+                return message.get('result', message)
+
+    return {
+        'success': False,
+        'message': 'Daemon connection closed before result',
+        'model': None,
+        'error': 'daemon_disconnected'
+    }
+
+
+def daemon_available(socket_path: str) -> bool:
+    """Socket üzerinde canlı bir daemon var mı (ping)"""
+    return run_via_daemon(socket_path, {'action': 'ping'}) is not None
+
+
+# ============================================
+# SERVER
+# ============================================
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    """Tek bağlantı = tek istek"""
+
+    def _send(self, message: dict):
+        self.wfile.write((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            self._send({'event': 'result', 'result': {
+                'success': False, 'message': f"Invalid request: {e}", 'model': None, 'error': 'bad_request'
+            }})
+            return
+
+        server = self.server
+        if request.get('action') == 'ping':
+            self._send({
+                'event': 'pong',
+                'pid': os.getpid(),
+                'uptime': round(time.monotonic() - server.started_at, 1),
+                'active': server.active
+            })
+            return
+
+        try:
+            result = self._run(request)
+        except BrokenPipeError:
+            # İstemci ayrıldı; agent zaten bitti ya da token yazarken koptu
+            return
+        except Exception as e:
+            result = {'success': False, 'message': f"Agent crashed: {e}", 'model': None, 'error': str(e)}
+
+        try:
+            self._send({'event': 'result', 'result': result})
+        except BrokenPipeError:
+            pass
+
+    def _run(self, request: dict) -> dict:
+        from config_loader import get_projects_path, resolve_llm_config
+        from runner import AGENTS, resolve_agent_profile
+
+        project_name = request.get('project')
+        agent_type = request.get('agent')
+        model_override = request.get('model')
+        verbose = request.get('verbose', False)
+
+        if agent_type not in AGENTS:
+            return {'success': False, 'message': f"Unknown agent: {agent_type}", 'model': None, 'error': 'unknown_agent'}
+
+        project_path = get_projects_path() / project_name
+        if not project_path.exists():
+            return {'success': False, 'message': f"Project not found: {project_path}", 'model': None, 'error': 'project_not_found'}
+
+        profile_name = resolve_agent_profile(project_name, agent_type, model_override)
+        llm_config = resolve_llm_config(project_name, profile_name)
+
+        if verbose:
+            self._send({'event': 'log', 'message': f"📋 Project: {project_name}"})
+            self._send({'event': 'log', 'message': f"🤖 Agent: {agent_type}"})
+            self._send({'event': 'log', 'message': f"🔧 Model: {llm_config.get('model')}"})
+            self._send({'event': 'log', 'message': f"🌐 Provider: {llm_config.get('provider')}"})
+
+        def send_token(chunk):
+            self._send({'event': 'token', 'content': chunk})
+        on_token = send_token if request.get('stream') else None
+
+        def on_progress(progress):
+            self._send({'event': 'progress', 'progress': progress})
+
+        with self.server.slots:
+            with self.server.active_lock:
+                self.server.active += 1
+            try:
+                agent = AGENTS[agent_type](project_name, llm_config)
+                if request.get('full_run'):
+                    agent.full_run = True
+                return agent.run(on_token=on_token, on_progress=on_progress)
+            finally:
+                with self.server.active_lock:
+                    self.server.active -= 1
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str = None, max_workers: int = 4):
+    """Daemon'ı başlat (Ctrl+C / SIGTERM ile durur)"""
+    socket_path = socket_path or get_default_socket_path()
+    Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+
+    # Ağır modülleri bir kez yükle ve sıcak tut
+    importlib.import_module('runner')  # agent sınıfları, requests, yaml
+    from config_loader import load_profiles
+    load_profiles()
+
+    if os.path.exists(socket_path):
+        # Canlı bir daemon varsa üzerine yazma
+        if daemon_available(socket_path):
+            raise RuntimeError(f"Daemon already running on {socket_path}")
+        os.remove(socket_path)
+
+    server = _DaemonServer(socket_path, _JobHandler)
+    server.started_at = time.monotonic()
+    server.active = 0
+    server.active_lock = threading.Lock()
+    server.slots = threading.BoundedSemaphore(max_workers)
+    os.chmod(socket_path, 0o600)
+
+    def _stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _stop)
+
+    print(f"🛰️ Orchestrator daemon listening on {socket_path} (workers: {max_workers})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("🛑 Orchestrator daemon stopped", flush=True)
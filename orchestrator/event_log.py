@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Event Log
+Proje başına append-only olay kaydı (agent koşuları, validation, deployment)
+
+state.last_event sadece son olayı tutar; tüm geçmiş burada:
+
+    <proje>/state/events/
+        events-000001.jsonl     Kapanmış segment
+        events-000002.jsonl     Aktif segment (sadece sona ekleme)
+        index.json              Segment başına zaman aralığı, sayı, tip ve agent kümesi
+
+Segment SEGMENT_MAX_BYTES'ı aşınca yenisine geçilir. Okuyucu index ile
+zaman aralığına / agent'a uymayan segmentleri hiç açmaz. Yazma
+state_store.locked ile süreçler arası kilitli.
+
+Olay:
+    {'ts': epoch, 'time': ISO (UTC), 'type': 'agent_run' | 'validation' | 'deployment',
+     'agent', 'action', 'result', 'model', 'duration', ...ek alanlar}
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from state_store import locked
+
+
+EVENTS_DIR = 'state/events'
+INDEX_FILENAME = 'index.json'
+INDEX_VERSION = 1
+
+SEGMENT_MAX_BYTES = 1024 * 1024
+
+
+def get_events_dir(project_path: Path) -> Path:
+    return Path(project_path) / EVENTS_DIR
+
+
+def _segment_name(number: int) -> str:
+    return f"events-{number:06d}.jsonl"
+
+
+def _load_index(events_dir: Path) -> List[dict]:
+    try:
+        with open(events_dir / INDEX_FILENAME, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return _rebuild_index(events_dir)
+    if index.get('version') != INDEX_VERSION:
+        return _rebuild_index(events_dir)
+    return index.get('segments', [])
+
+
+def _save_index(events_dir: Path, segments: List[dict]):
+    tmp_path = events_dir / f".{INDEX_FILENAME}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'segments': segments}, f)
+    os.replace(tmp_path, events_dir / INDEX_FILENAME)
+
+
+def _new_segment(number: int) -> dict:
+    return {'name': _segment_name(number), 'number': number, 'first_ts': None, 'last_ts': None,
+            'count': 0, 'bytes': 0, 'types': [], 'agents': []}
+
+
+def _add_to_segment(segment: dict, event: dict, size: int):
+    segment['first_ts'] = segment['first_ts'] or event['ts']
+    segment['last_ts'] = event['ts']
+    segment['count'] += 1
+    segment['bytes'] += size
+    if event.get('type') and event['type'] not in segment['types']:
+        segment['types'].append(event['type'])
+    if event.get('agent') and event['agent'] not in segment['agents']:
+        segment['agents'].append(event['agent'])
+
+
+def _rebuild_index(events_dir: Path) -> List[dict]:
+    """index.json yoksa / bozuksa segmentleri tarayarak yeniden oluştur"""
+    segments = []
+    for path in sorted(events_dir.glob('events-*.jsonl')):
+        try:
+            number = int(path.stem.split('-')[1])
+        except (IndexError, ValueError):
+            continue
+        segment = _new_segment(number)
+        for event, size in _iter_lines(path):
+            _add_to_segment(segment, event, size)
+        segments.append(segment)
+    return segments
+
+
+def _iter_lines(path: Path):
+    """(event, satır boyutu); yarım / bozuk satırlar atlanır"""
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line), len(line)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def append(project_path: Path, event_type: str, **fields) -> dict:
+    """
+    Olay ekle
+
+    Returns:
+        Yazılan olay
+    """
+    now = time.time()
+    event = {
+        'ts': round(now, 3),
+        'time': datetime.fromtimestamp(now, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'type': event_type,
+    }
+    event.update((key, value) for key, value in fields.items() if value is not None)
+    line = (json.dumps(event, ensure_ascii=False, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+    events_dir = get_events_dir(project_path)
+    events_dir.mkdir(parents=True, exist_ok=True)
+    with locked(events_dir / INDEX_FILENAME):
+        segments = _load_index(events_dir)
+        if not segments or segments[-1]['bytes'] + len(line) > SEGMENT_MAX_BYTES:
+            segments.append(_new_segment(segments[-1]['number'] + 1 if segments else 1))
+        segment = segments[-1]
+
+        fd = os.open(events_dir / segment['name'], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+        _add_to_segment(segment, event, len(line))
+        _save_index(events_dir, segments)
+    return event
+
+
+def read(project_path: Path, since: Optional[float] = None, until: Optional[float] = None,
+         agent: Optional[str] = None, event_type: Optional[str] = None) -> Iterator[dict]:
+    """
+    Olayları eskiden yeniye oku (filtreler: epoch since/until, agent, tip)
+
+    Index'e göre aralık dışındaki segmentler açılmaz.
+    """
+    events_dir = get_events_dir(project_path)
+    if not events_dir.exists():
+        return
+
+    segments = _load_index(events_dir)
+    for position, segment in enumerate(segments):
+        active = position == len(segments) - 1
+        # Aktif segment index'ten yeni olabilir (yarıda kalmış yazma), hep okunur
+        if not active:
+            if since is not None and (segment['last_ts'] or 0) < since:
+                continue
+            if until is not None and (segment['first_ts'] or 0) > until:
+                continue
+            if agent is not None and agent not in segment['agents']:
+                continue
+            if event_type is not None and event_type not in segment['types']:
+                continue
+
+        for event, _ in _iter_lines(events_dir / segment['name']):
+            if since is not None and event['ts'] < since:
+                continue
+            if until is not None and event['ts'] > until:
+                continue
+            if agent is not None and event.get('agent') != agent:
+                continue
+            if event_type is not None and event.get('type') != event_type:
+                continue
+            yield event
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def summarize(events) -> dict:
+    """
+    Agent bazında throughput / latency
+
+    Returns:
+        {agent: {'runs', 'success', 'failure', 'avg_duration', 'p50_duration',
+                 'p95_duration', 'models': {model: runs}}}
+    """
+    stats = {}
+    durations = {}
+    for event in events:
+        if event.get('type') != 'agent_run':
+            continue
+        agent = event.get('agent') or 'unknown'
+        entry = stats.setdefault(agent, {'runs': 0, 'success': 0, 'failure': 0, 'models': {}})
+        entry['runs'] += 1
+        entry['success' if event.get('result') == 'success' else 'failure'] += 1
+        if event.get('model'):
+            entry['models'][event['model']] = entry['models'].get(event['model'], 0) + 1
+        if event.get('duration') is not None:
+            durations.setdefault(agent, []).append(event['duration'])
+
+    for agent, entry in stats.items():
+        values = durations.get(agent, [])
+        entry['avg_duration'] = round(sum(values) / len(values), 3) if values else None
+        entry['p50_duration'] = _percentile(values, 0.5)
+        entry['p95_duration'] = _percentile(values, 0.95)
+    return stats
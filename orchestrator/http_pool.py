@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+AI Factory - HTTP Pool
+Provider bazlı, keep-alive HTTP session havuzu
+
+Her provider için tek bir requests.Session tutulur; böylece ardışık
+agent çalıştırmaları DNS + TCP + TLS kurulumunu tekrar ödemez.
+Ayarlar llm.profiles.yaml içindeki `http_pool` bölümünden okunur,
+provider bazlı override'lar `providers.<isim>.http_pool` altına yazılır.
+"""
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config_loader import load_profiles
+
+
+DEFAULT_POOL_CONFIG = {
+    'pool_connections': 4,   # Session başına tutulan host havuzu sayısı
+    'pool_maxsize': 10,      # Host başına eşzamanlı açık bağlantı limiti
+    'pool_block': False,     # Limit dolunca bekle (True) ya da geçici bağlantı aç (False)
+}
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_pool_config(provider: str = None) -> dict:
+    """Global + provider override birleşik havuz ayarları"""
+    profiles_data = load_profiles()
+    config = dict(DEFAULT_POOL_CONFIG)
+    config.update(profiles_data.get('http_pool') or {})
+
+    if provider:
+        provider_config = profiles_data.get('providers', {}).get(provider) or {}
+        config.update(provider_config.get('http_pool') or {})
+
+    return config
+
+
+def _build_session(provider: str) -> requests.Session:
+    """Keep-alive ve havuz limitleri ayarlı session oluştur"""
+    config = get_pool_config(provider)
+
+    adapter = HTTPAdapter(
+        pool_connections=int(config['pool_connections']),
+        pool_maxsize=int(config['pool_maxsize']),
+        pool_block=bool(config['pool_block']),
+        max_retries=0  # Retry kararı çağıran tarafta
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+
+def get_session(provider: str = 'default') -> requests.Session:
+    """
+    Provider için paylaşılan session'ı döndür (yoksa oluştur)
+
+    requests.Session thread-safe kullanım için yeterlidir; urllib3 havuzu
+    bağlantıları thread'ler arasında güvenli şekilde dağıtır.
+    """
+    session = _sessions.get(provider)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = _build_session(provider)
+            _sessions[provider] = session
+        return session
+
+
+def close_sessions():
+    """Tüm havuzları kapat (test / shutdown için)"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
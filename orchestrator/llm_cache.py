@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+AI Factory - LLM Response Cache
+İçerik adresli (hash) disk cache'i
+
+Anahtar: sha256(provider, model, temperature, max_tokens, prompt)
+Değişmemiş PRP/src üzerinde tekrar çalışan agent'lar aynı prompt'u
+gönderir; bu durumda yanıt maliyetsiz ve anında döner.
+
+Ayarlar llm.profiles.yaml `llm_cache` bölümünden okunur; profil
+bazında `cache: false` ile kapatılabilir.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from config_loader import get_control_plane_path, load_profiles
+
+
+# Tahmini adet / boyut limitleri aşmasa da (diğer süreçlerin yazmaları,
+# TTL) en az bu aralıkla tam tarama yapılır
+EVICT_INTERVAL_SECONDS = 300
+
+# Limit aşılınca bu orana kadar boşaltılır; dolu cache her yazmada taranmasın
+EVICT_LOW_WATER = 0.9
+
+DEFAULT_CACHE_CONFIG = {
+    'enabled': True,
+    'ttl_seconds': 7 * 24 * 3600,
+    'max_entries': 2000,
+    'max_size_mb': 200,
+}
+
+
+def cache_key(provider: str, model: str, temperature, max_tokens: int, prompt: str) -> str:
+    """Cache anahtarı (deterministik JSON üzerinden sha256)"""
+    payload = json.dumps([provider, model, temperature, max_tokens, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Boyut/adet sınırlı, TTL'li LRU disk cache"""
+
+    def __init__(self, cache_dir: Path, ttl_seconds: int, max_entries: int, max_size_mb: float):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.stats_path = self.cache_dir / 'stats.json'
+        self._lock = threading.Lock()
+
+        # Son evict()'ten beri tahmini doluluk (None: henüz taranmadı)
+        self._estimated_entries = None
+        self._estimated_bytes = 0
+        self._last_evict = 0.0
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        """Cache kaydı (yoksa / süresi dolmuşsa None)"""
+        path = self._entry_path(key)
+        try:
+            stat = path.stat()
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._record('misses')
+            return None
+
+        if self.ttl_seconds and time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            self._record('misses', expired=1)
+            return None
+
+        # LRU: son erişim zamanı = mtime
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self._record('hits', saved_bytes=stat.st_size)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """Kaydı atomik olarak yaz ve limitleri uygula"""
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = dict(entry, created_at=time.time())
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+            size = f.tell()
+        os.replace(tmp_path, path)
+
+        # Dizin her yazmada taranmaz: tahmini sayaç limiti aşınca ya da periyodik
+        with self._lock:
+            if self._estimated_entries is not None:
+                self._estimated_entries += 1
+                self._estimated_bytes += size
+            due = (self._estimated_entries is None
+                   or self._estimated_entries > self.max_entries
+                   or self._estimated_bytes > self.max_bytes
+                   or time.time() - self._last_evict > EVICT_INTERVAL_SECONDS)
+        if due:
+            self.evict()
+
+    def _entries(self) -> list:
+        """[(mtime, size, path), ...] tüm kayıtlar"""
+        entries = []
+        for path in self.cache_dir.glob('??/*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self) -> int:
+        """Süresi dolanları ve LRU sırasıyla limit aşanları sil"""
+        entries = self._entries()
+        now = time.time()
+        removed = 0
+
+        if self.ttl_seconds:
+            # mtime erişimle güncellendiği için bu sadece kaba bir ön eleme;
+            # kesin TTL kontrolü get() içinde created_at ile yapılır
+            alive = []
+            for mtime, size, path in entries:
+                if now - mtime > self.ttl_seconds:
+                    self._remove(path)
+                    removed += 1
+                else:
+                    alive.append((mtime, size, path))
+            entries = alive
+
+        entries.sort()  # En eski erişim önce
+        total_bytes = sum(size for _, size, _ in entries)
+        max_entries, max_bytes = self.max_entries, self.max_bytes
+        if len(entries) > max_entries or total_bytes > max_bytes:
+            max_entries = int(max_entries * EVICT_LOW_WATER)
+            max_bytes = int(max_bytes * EVICT_LOW_WATER)
+        while entries and (len(entries) > max_entries or total_bytes > max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+            removed += 1
+
+        with self._lock:
+            self._estimated_entries = len(entries)
+            self._estimated_bytes = total_bytes
+            self._last_evict = time.time()
+
+        if removed:
+            self._record('evictions', count=removed)
+        return removed
+
+    def clear(self) -> int:
+        """Tüm kayıtları sil"""
+        entries = self._entries()
+        for _, _, path in entries:
+            self._remove(path)
+        return len(entries)
+
+    def _remove(self, path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _record(self, counter: str, count: int = 1, **extra):
+        """Süreçler arası paylaşılan istatistik sayacını artır"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.stats_path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    stats = json.loads(f.read() or '{}')
+                except json.JSONDecodeError:
+                    stats = {}
+                stats[counter] = stats.get(counter, 0) + count
+                for name, value in extra.items():
+                    stats[name] = stats.get(name, 0) + value
+                f.seek(0)
+                f.truncate()
+                json.dump(stats, f)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_stats(self) -> dict:
+        """Hit/miss sayaçları + mevcut doluluk"""
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stats = {}
+
+        entries = self._entries()
+        hits = stats.get('hits', 0)
+        misses = stats.get('misses', 0)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'expired': stats.get('expired', 0),
+            'evictions': stats.get('evictions', 0),
+            'saved_bytes': stats.get('saved_bytes', 0),
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+
+_cache = None
+_cache_config = None
+
+
+def get_cache_config() -> dict:
+    """Global cache ayarları (default'larla birleşik)"""
+    config = dict(DEFAULT_CACHE_CONFIG)
+    config.update(load_profiles().get('llm_cache') or {})
+    return config
+
+
+def get_cache():
+    """
+    Paylaşılan cache örneği (global olarak kapalıysa None)
+
+    Ayarlar değişirse (profiles.yaml mtime) yeniden oluşturulur.
+    """
+    global _cache, _cache_config
+    config = get_cache_config()
+    if not config.get('enabled'):
+        return None
+
+    if _cache is None or config != _cache_config:
+        cache_dir = config.get('directory') or (get_control_plane_path() / 'runtime' / 'llm_cache')
+        _cache = LLMCache(
+            cache_dir,
+            ttl_seconds=int(config['ttl_seconds']),
+            max_entries=int(config['max_entries']),
+            max_size_mb=float(config['max_size_mb'])
+        )
+        _cache_config = config
+    return _cache
@@ -6,12 +6,22 @@ Provider-agnostic LLM çağrısı
 
 import requests
 import json
-from typing import Optional
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterator, Optional
 
-from config_loader import get_api_key
+from config_loader import get_api_key, load_profiles, resolve_profile
+from http_pool import get_session
+from llm_cache import cache_key, get_cache
+from rate_limiter import acquire as acquire_rate_limit, penalize as penalize_rate_limit, rate_limit_key
 from token_utils import check_context_limit
 
 
+class LLMCancelled(Exception):
+    """Çağrı cancel_event ile iptal edildi (web job iptali)"""
+
+
 class LLMClient:
     """Provider-agnostic LLM client"""
     
@@ -25,6 +35,13 @@ class LLMClient:
         
         # API key
         self.api_key = get_api_key(config)
+        
+        # threading.Event; set edilince backoff / rate limit beklemesi kesilir,
+        # yeni deneme yapılmaz (LLMCancelled)
+        self.cancel_event = None
+        
+        # True: cache'ten okuma (yeni yanıt üretilir ve cache'e yazılır)
+        self.bypass_cache = False
     
     def _get_headers(self) -> dict:
         """Provider'a göre headers oluştur"""
@@ -45,18 +62,21 @@ class LLMClient:
         
         return headers
     
-    def _build_request_body(self, prompt: str, effective_max_output: int) -> dict:
+    def _build_request_body(self, prompt: str, effective_max_output: int, stream: bool = False) -> dict:
         """Provider'a göre request body oluştur"""
         
         if self.provider == 'anthropic':
             # Anthropic Messages API
-            return {
+            body = {
                 'model': self.model,
                 'max_tokens': effective_max_output,
                 'messages': [
                     {'role': 'user', 'content': prompt}
                 ]
             }
+            if stream:
+                body['stream'] = True
+            return body
         elif self.provider == 'ollama':
             # Ollama API
             return {
@@ -64,7 +84,7 @@ class LLMClient:
                 'messages': [
                     {'role': 'user', 'content': prompt}
                 ],
-                'stream': False,
+                'stream': stream,
                 'options': {
                     'temperature': self.temperature,
                     'num_predict': effective_max_output
@@ -72,7 +92,7 @@ class LLMClient:
             }
         else:
             # OpenAI-compatible (OpenRouter, OpenAI)
-            return {
+            body = {
                 'model': self.model,
                 'max_tokens': effective_max_output,
                 'temperature': self.temperature,
@@ -80,6 +100,9 @@ class LLMClient:
                     {'role': 'user', 'content': prompt}
                 ]
             }
+            if stream:
+                body['stream'] = True
+            return body
     
     def _parse_response(self, response_json: dict) -> str:
         """Provider'a göre response parse et"""
@@ -102,97 +125,427 @@ class LLMClient:
                 return message.get('content', '')
             return ''
     
-    def call(self, prompt: str) -> dict:
+    def _parse_stream_line(self, line: str) -> tuple:
+        """
+        Stream satırından token parçasını çıkar
+        
+        OpenAI-compatible ve Anthropic SSE (`data: {...}`), Ollama ise
+        satır başına bir JSON (NDJSON) gönderir.
+        
+        Returns:
+            (chunk: str, done: bool)
+        """
+        line = line.strip()
+        if not line or line.startswith(':') or line.startswith('event:'):
+            return '', False
+        
+        if self.provider != 'ollama':
+            if not line.startswith('data:'):
+                return '', False
+            line = line[len('data:'):].strip()
+            if line == '[DONE]':
+                return '', True
+        
+        event = json.loads(line)
+        
+        if self.provider == 'anthropic':
+            # content_block_delta -> delta.text, message_stop -> bitti
+            if event.get('type') == 'content_block_delta':
+                return event.get('delta', {}).get('text', ''), False
+            if event.get('type') == 'error':
+                raise ValueError(event.get('error', {}).get('message', 'stream error'))
+            return '', event.get('type') == 'message_stop'
+        elif self.provider == 'ollama':
+            chunk = event.get('message', {}).get('content', '')
+            return chunk, bool(event.get('done'))
+        else:
+            if 'error' in event:
+                raise ValueError(event['error'].get('message', 'stream error'))
+            choices = event.get('choices', [])
+            if choices:
+                return choices[0].get('delta', {}).get('content') or '', False
+            return '', False
+    
+    def stream(self, prompt: str) -> Iterator[dict]:
+        """
+        Streaming LLM çağrısı (retry + failover dahil)
+        
+        Yields:
+            {'type': 'token', 'content': str}  (her parça için)
+            {'type': 'result', ...}            (son olay, call() ile aynı alanlar)
+        """
+        return self._events(prompt, stream=True)
+    
+    def call(self, prompt: str, on_token: Optional[Callable[[str], None]] = None) -> dict:
         """
         LLM çağrısı yap
         
+        on_token verilirse streaming moda geçer ve her parça için çağrılır.
+        Geçici hatalar (429/5xx/timeout) backoff ile tekrar denenir, deneme
+        hakkı bitince profile'ın fallback_profiles listesine geçilir.
+        
         Returns:
             {
                 'success': bool,
                 'content': str,
                 'model': str,
                 'error': str or None,
-                'token_info': dict
+                'token_info': dict,
+                'cached': bool,
+                'attempts': int,
+                'failover': [{'profile', 'model', 'error'}, ...]
             }
         """
-        # Token kontrolü
+        result = None
+        for event in self._events(prompt, stream=on_token is not None):
+            if event['type'] == 'token':
+                on_token(event['content'])
+            else:
+                result = event
+        return result
+    
+    # ----- resilience -----
+    
+    def _failover_chain(self) -> Iterator[tuple]:
+        """
+        (profile_name, client) sırası: önce kendisi, sonra fallback_profiles
+        
+        API key'i tanımlı olmayan fallback'ler atlanır.
+        """
+        yield self.config.get('profile'), self
+        
+        seen = {self.config.get('profile')}
+        for profile_name in self.config.get('fallback_profiles') or []:
+            if profile_name in seen:
+                continue
+            seen.add(profile_name)
+            try:
+                client = type(self)(resolve_profile(profile_name))
+            except ValueError as e:
+                # Bilinmeyen profile / eksik API key
+                yield profile_name, e
+                continue
+            client.cancel_event = self.cancel_event
+            client.bypass_cache = self.bypass_cache
+            yield profile_name, client
+    
+    def _check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise LLMCancelled()
+    
+    def _wait(self, delay: float):
+        """Retry beklemesi; iptal edilirse hemen LLMCancelled"""
+        if self.cancel_event is None:
+            time.sleep(delay)
+        elif self.cancel_event.wait(delay):
+            raise LLMCancelled()
+    
+    def _events(self, prompt: str, stream: bool) -> Iterator[dict]:
+        """Failover zinciri boyunca çağrı; token olayları ve tek bir sonuç üretir"""
+        failover = []
+        attempts = 0
+        result = None
+        
+        for profile_name, client in self._failover_chain():
+            if isinstance(client, Exception):
+                failover.append({'profile': profile_name, 'model': None, 'error': str(client)})
+                continue
+            
+            streamed = False
+            for event in client._retry_events(prompt, stream):
+                if event['type'] == 'token':
+                    streamed = True
+                    yield event
+                else:
+                    result = event
+            attempts += result['attempts']
+            
+            # Kısmi çıktı kullanıcıya gittiyse başka modelle baştan başlamıyoruz
+            if result['success'] or streamed:
+                break
+            
+            failover.append({
+                'profile': profile_name,
+                'model': client.model,
+                'error': (result['error'] or '')[:300]
+            })
+        
+        # Zincir her zaman self ile başladığı için result boş kalmaz
+        result['attempts'] = attempts
+        result['failover'] = failover
+        yield result
+    
+    # Retry adımları sync (_retry_events) ve async (AsyncLLMClient) döngülerde ortak
+    
+    def _prepare_call(self, prompt: str) -> dict:
+        """
+        Denemeler öncesi: token kontrolü, cache, retry / rate limit ayarları
+        
+        Returns:
+            {'result': erken sonuç (hata / cache) | None, 'token_check', 'cache', 'key',
+             'base_url', 'policy', 'max_attempts', 'limits', 'limit_key', 'reserve_tokens'}
+        """
         token_check = check_context_limit(prompt, self.config)
         
         if not token_check['ok']:
-            return {
-                'success': False,
-                'content': '',
-                'model': self.model,
-                'error': token_check['warning'],
-                'token_info': token_check
-            }
+            return {'result': self._result(False, '', token_check['warning'], token_check, attempts=0)}
         
         effective_max_output = token_check['effective_max_output']
         
-        # Request hazırla
+        # Aynı prompt daha önce yanıtlandıysa maliyetsiz dön
+        cache, key, cached = self._cache_lookup(prompt, effective_max_output)
+        if cached:
+            return {'result': self._result(True, cached['content'], None, token_check, cached=True, attempts=0)}
+        
         base_url = self.provider_config.get('base_url')
         if not base_url:
-            return {
-                'success': False,
-                'content': '',
-                'model': self.model,
-                'error': f"No base_url configured for provider: {self.provider}",
-                'token_info': token_check
-            }
+            return {'result': self._result(False, '', f"No base_url configured for provider: {self.provider}",
+                                           token_check, attempts=0)}
+        
+        policy = get_retry_policy(self.config)
+        return {
+            'result': None,
+            'token_check': token_check,
+            'cache': cache,
+            'key': key,
+            'base_url': base_url,
+            'policy': policy,
+            'max_attempts': max(1, int(policy['max_attempts'])),
+            # Süreçler arası ortak bucket (profile'da rate_limit tanımlıysa)
+            'limits': self.config.get('rate_limit'),
+            'limit_key': rate_limit_key(self.provider, self.model),
+            'reserve_tokens': token_check['prompt_tokens'] + effective_max_output,
+        }
+    
+    def _acquire_permit(self, call: dict, attempt: int) -> Optional[dict]:
+        """
+        Deneme öncesi iptal kontrolü + rate limit payı
+        
+        Returns:
+            Pay alınamadıysa son sonuç, yoksa None
+        """
+        self._check_cancelled()
+        if not call['limits']:
+            return None
+        permit = acquire_rate_limit(call['limit_key'], call['reserve_tokens'], call['limits'],
+                                    cancel_event=self.cancel_event)
+        if permit.get('cancelled'):
+            raise LLMCancelled()
+        if not permit['ok']:
+            return self._result(False, '', permit['error'], call['token_check'], attempts=attempt - 1)
+        return None
+    
+    def _finish_attempt(self, call: dict, attempt: int, result: dict, streamed: bool = False) -> Optional[float]:
+        """
+        Deneme sonrası: cache'e yaz, 429 cezası, backoff kararı
+        
+        Returns:
+            Sonraki deneme öncesi bekleme (None: denemeler bitti, result son sonuç)
+        """
+        result['attempts'] = attempt
+        retryable = result.pop('retryable', False)
+        retry_after = result.pop('retry_after', None)
+        
+        if result['success']:
+            self._cache_store(call['cache'], call['key'], result['content'])
+            return None
+        if call['limits'] and retry_after and result.get('status_code') == 429:
+            # Diğer süreçler de provider'ın istediği kadar beklesin
+            penalize_rate_limit(call['limit_key'], retry_after, call['limits'])
+        if not retryable or streamed or attempt == call['max_attempts']:
+            return None
+        
+        # None: Retry-After bekleme limitini aşıyor, sıradaki profile geç
+        return backoff_delay(attempt, retry_after, call['policy'])
+    
+    def _retry_events(self, prompt: str, stream: bool) -> Iterator[dict]:
+        """Tek profile için token/cache kontrolü + backoff'lu denemeler"""
+        call = self._prepare_call(prompt)
+        if call['result']:
+            if stream and call['result']['cached']:
+                yield {'type': 'token', 'content': call['result']['content']}
+            yield call['result']
+            return
+        
+        for attempt in range(1, call['max_attempts'] + 1):
+            result = self._acquire_permit(call, attempt)
+            if result:
+                break
+            
+            streamed = False
+            for event in self._attempt_events(call['base_url'], prompt, call['token_check'], stream):
+                if event['type'] == 'token':
+                    streamed = True
+                    yield event
+                else:
+                    result = event
+            
+            delay = self._finish_attempt(call, attempt, result, streamed)
+            if delay is None:
+                break
+            self._wait(delay)
+        
+        yield result
+    
+    def _attempt_events(self, base_url: str, prompt: str, token_check: dict, stream: bool) -> Iterator[dict]:
+        """
+        Tek HTTP denemesi
         
+        Son olay retry kararı için 'retryable' ve 'retry_after' alanlarını taşır.
+        """
         headers = self._get_headers()
-        body = self._build_request_body(prompt, effective_max_output)
+        body = self._build_request_body(prompt, token_check['effective_max_output'], stream=stream)
+        policy = get_retry_policy(self.config)
         
+        # Agent dosyaları işleyebilsin diye tam metni biriktiriyoruz;
+        # web tarafı yalnızca token olaylarını iletir.
+        parts = []
         try:
-            response = requests.post(
+            with get_session(self.provider).post(
                 base_url,
                 headers=headers,
                 json=body,
-                timeout=120  # 2 dakika timeout
-            )
-            
-            if response.status_code != 200:
-                error_msg = f"API error {response.status_code}: {response.text[:500]}"
-                return {
-                    'success': False,
-                    'content': '',
-                    'model': self.model,
-                    'error': error_msg,
-                    'token_info': token_check
-                }
-            
-            response_json = response.json()
-            content = self._parse_response(response_json)
-            
-            return {
-                'success': True,
-                'content': content,
-                'model': self.model,
-                'error': None,
-                'token_info': token_check
-            }
+                stream=stream,
+                timeout=(10, 120) if stream else 120  # stream: connect, token arası bekleme
+            ) as response:
+                if response.status_code != 200:
+                    error_msg = f"API error {response.status_code}: {response.text[:500]}"
+                    result = self._result(False, '', error_msg, token_check)
+                    result['status_code'] = response.status_code
+                    result['retryable'] = response.status_code in policy['retry_on_status']
+                    result['retry_after'] = parse_retry_after(response.headers.get('Retry-After'))
+                    yield result
+                    return
+                
+                if stream:
+                    # Ollama (application/x-ndjson) charset göndermez; SSE'de charset yoksa
+                    # requests ISO-8859-1 varsayar. Satırlar bayt olarak alınıp UTF-8 çözülür
+                    # ('\n' çok baytlı karakterin ortasına düşmez).
+                    for raw_line in response.iter_lines():
+                        if not raw_line:
+                            continue
+                        line = raw_line.decode('utf-8', errors='replace')
+                        chunk, done = self._parse_stream_line(line)
+                        if chunk:
+                            parts.append(chunk)
+                            yield {'type': 'token', 'content': chunk}
+                        if done:
+                            break
+                    content = ''.join(parts)
+                else:
+                    content = self._parse_response(response.json())
             
+            yield self._result(True, content, None, token_check)
+        
         except requests.exceptions.Timeout:
-            return {
-                'success': False,
-                'content': '',
-                'model': self.model,
-                'error': 'Request timeout (120s)',
-                'token_info': token_check
-            }
+            result = self._result(False, ''.join(parts), 'Request timeout (120s)', token_check)
+            result['retryable'] = True
+            yield result
+        except requests.exceptions.ConnectionError as e:
+            result = self._result(False, ''.join(parts), f"Request failed: {str(e)}", token_check)
+            result['retryable'] = True
+            yield result
         except requests.exceptions.RequestException as e:
-            return {
-                'success': False,
-                'content': '',
-                'model': self.model,
-                'error': f"Request failed: {str(e)}",
-                'token_info': token_check
-            }
-        except json.JSONDecodeError as e:
-            return {
-                'success': False,
-                'content': '',
-                'model': self.model,
-                'error': f"Invalid JSON response: {str(e)}",
-                'token_info': token_check
-            }
+            yield self._result(False, ''.join(parts), f"Request failed: {str(e)}", token_check)
+        except (json.JSONDecodeError, ValueError) as e:
+            label = 'Invalid stream response' if stream else 'Invalid JSON response'
+            yield self._result(False, ''.join(parts), f"{label}: {str(e)}", token_check)
+    
+    # ----- cache -----
+    
+    def _cache_lookup(self, prompt: str, effective_max_output: int) -> tuple:
+        """
+        Response cache kontrolü
+        
+        Returns:
+            (cache, key, cached_entry) - cache kapalıysa (None, None, None)
+        """
+        if self.config.get('cache') is False:
+            return None, None, None
+        
+        cache = get_cache()
+        if cache is None:
+            return None, None, None
+        
+        key = cache_key(self.provider, self.model, self.temperature, effective_max_output, prompt)
+        if self.bypass_cache:
+            return cache, key, None
+        return cache, key, cache.get(key)
+    
+    def _cache_store(self, cache, key: str, content: str):
+        """Başarılı yanıtı cache'e yaz (boş yanıtlar cache'lenmez)"""
+        if cache is None or not content:
+            return
+        cache.put(key, {
+            'provider': self.provider,
+            'model': self.model,
+            'content': content
+        })
+    
+    def _result(self, success: bool, content: str, error: Optional[str], token_info: dict,
+                cached: bool = False, attempts: int = 1) -> dict:
+        """call()/stream() sonuç sözlüğü"""
+        return {
+            'type': 'result',
+            'success': success,
+            'content': content,
+            'model': self.model,
+            'error': error,
+            'token_info': token_info,
+            'cached': cached,
+            'attempts': attempts
+        }
+
+
+# ============================================
+# RETRY POLICY
+# ============================================
+
+DEFAULT_RETRY_POLICY = {
+    'max_attempts': 3,
+    'base_delay_seconds': 1.0,
+    'max_delay_seconds': 30.0,
+    'max_retry_after_seconds': 60.0,
+    'retry_on_status': [408, 429, 500, 502, 503, 504],
+}
+
+
+def get_retry_policy(config: dict) -> dict:
+    """Default + global `retry` + profile `retry` birleşimi"""
+    policy = dict(DEFAULT_RETRY_POLICY)
+    policy.update(load_profiles().get('retry') or {})
+    policy.update(config.get('retry') or {})
+    return policy
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header'ı (saniye veya HTTP tarihi) -> saniye"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float], policy: dict) -> Optional[float]:
+    """
+    Sonraki deneme öncesi bekleme süresi
+    
+    Exponential backoff + full jitter; Retry-After varsa en az o kadar.
+    Retry-After limiti aşıyorsa None (bu profile'da beklemeye değmez).
+    """
+    if retry_after is not None and retry_after > float(policy['max_retry_after_seconds']):
+        return None
+    
+    cap = min(float(policy['max_delay_seconds']), float(policy['base_delay_seconds']) * (2 ** (attempt - 1)))
+    delay = random.uniform(0, cap)
+    
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
@@ -5,12 +5,19 @@ Ana CLI giriş noktası
 
 Kullanım:
     python3 orchestrator.py <project_name> <agent_type> [--model MODEL]
+    python3 orchestrator.py --daemon
+
+Daemon çalışıyorsa CLI sadece ince bir istemcidir: job Unix socket
+üzerinden daemon'a gönderilir (interpreter/import/config maliyeti yok).
+Daemon yoksa ya da --no-daemon verilirse agent bu süreçte çalışır.
 
 Örnekler:
     python3 orchestrator.py product-hello-world prp
     python3 orchestrator.py product-hello-world dev --model sonnet-openrouter
     python3 orchestrator.py product-hello-world test
+    python3 orchestrator.py product-hello-world test --full-run
     python3 orchestrator.py product-hello-world doc --model gemma-free
+    python3 orchestrator.py product-hello-world dev --stream
 """
 
 import sys
@@ -20,21 +27,34 @@ from pathlib import Path
 # Path setup
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config_loader import resolve_llm_config, get_projects_path
-from state_manager import load_state
+# Sadece stdlib - thin client yolu requests/yaml yüklemez
+from daemon import daemon_available, get_default_socket_path, run_via_daemon, serve
 
-# Agent imports
-from agents.prp_agent import PRPAgent
-from agents.dev_agent import DevAgent
-from agents.test_agent import TestAgent
-from agents.doc_agent import DocAgent
+# runner.AGENTS ile aynı; argparse için ağır import yapmadan
+AGENT_TYPES = ['prp', 'dev', 'test', 'doc']
 
-AGENTS = {
-    'prp': PRPAgent,
-    'dev': DevAgent,
-    'test': TestAgent,
-    'doc': DocAgent,
-}
+
+def print_result(result: dict):
+    """Agent sonucunu yazdır, başarısızsa exit 1"""
+    if result['success']:
+        print(f"✅ {result['message']}")
+        print(f"🤖 Model used: {result['model']}")
+    else:
+        print(f"❌ {result['message']}")
+        if result.get('error'):
+            print(f"📛 Error: {result['error']}")
+        sys.exit(1)
+
+
+def stream_to_stdout(chunk: str):
+    sys.stdout.write(chunk)
+    sys.stdout.flush()
+
+
+def print_progress(progress: dict):
+    """Dosya yazıldıkça bildir (stream modunda çıktı zaten görünüyor)"""
+    if progress.get('type') == 'file':
+        print(f"📄 Wrote {progress['path']} ({progress['bytes']} bytes)", flush=True)
 
 
 def main():
@@ -46,18 +66,73 @@ Examples:
     python3 orchestrator.py product-hello-world prp
     python3 orchestrator.py product-hello-world dev --model sonnet-openrouter
     python3 orchestrator.py product-hello-world test
+    python3 orchestrator.py product-hello-world test --full-run
     python3 orchestrator.py product-hello-world doc --model gemma-free
+    python3 orchestrator.py product-hello-world dev --stream
+    python3 orchestrator.py --daemon --workers 4
         """
     )
     
-    parser.add_argument('project', help='Project name (e.g., product-hello-world)')
-    parser.add_argument('agent', choices=list(AGENTS.keys()), help='Agent type to run')
+    parser.add_argument('project', nargs='?', help='Project name (e.g., product-hello-world)')
+    parser.add_argument('agent', nargs='?', choices=AGENT_TYPES, help='Agent type to run')
     parser.add_argument('--model', help='LLM profile to use (overrides state default)', metavar='PROFILE')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done without executing')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--stream', action='store_true', help='Stream LLM output to stdout as it arrives')
+    parser.add_argument('--daemon', action='store_true', help='Run as a long-lived worker daemon on a Unix socket')
+    parser.add_argument('--workers', type=int, default=4, help='Daemon: max concurrent agent runs (default: 4)')
+    parser.add_argument('--socket', default=get_default_socket_path(), help='Daemon socket path')
+    parser.add_argument('--full-run', action='store_true', help='Test agent: ignore test caches and re-run everything')
+    parser.add_argument('--no-daemon', action='store_true', help='Always run in this process, even if a daemon is up')
     
     args = parser.parse_args()
     
+    if args.daemon:
+        serve(args.socket, max_workers=args.workers)
+        return
+    
+    if not args.project or not args.agent:
+        parser.error('project and agent are required (or use --daemon)')
+    
+    # Daemon ayaktaysa job'ı ona gönder
+    if not args.no_daemon and not args.dry_run and daemon_available(args.socket):
+        if args.model:
+            print(f"🔧 Using CLI model override: {args.model}")
+        print(f"🚀 Running {args.agent}_agent on {args.project} (daemon)...")
+        print()
+        
+        result = run_via_daemon(
+            args.socket,
+            {
+                'action': 'run',
+                'project': args.project,
+                'agent': args.agent,
+                'model': args.model,
+                'stream': args.stream,
+                'verbose': args.verbose,
+                'full_run': args.full_run
+            },
+            on_token=stream_to_stdout if args.stream else None,
+            on_log=print,
+            on_progress=None if args.stream else print_progress
+        )
+        if result is not None:
+            if args.stream:
+                print()
+            print_result(result)
+            return
+        
+        print("⚠️ Daemon connection lost, executing in-process")
+    
+    run_in_process(args)
+
+
+def run_in_process(args):
+    """Agent'ı bu süreçte çalıştır (daemon yoksa)"""
+    from config_loader import resolve_llm_config, get_projects_path
+    from state_manager import load_state
+    from runner import AGENTS, resolve_agent_profile
+    
     project_name = args.project
     agent_type = args.agent
     model_override = args.model
@@ -79,14 +154,9 @@ Examples:
     else:
         # Check state for agent-specific model
         try:
-            state = load_state(project_name)
-            agent_models = state.get('agent_models', {})
-            agent_key = f"{agent_type}_agent"
-            
-            if agent_key in agent_models:
-                profile_name = agent_models[agent_key]
-                if args.verbose:
-                    print(f"📊 Using state model for {agent_key}: {profile_name}")
+            profile_name = resolve_agent_profile(project_name, agent_type)
+            if profile_name and args.verbose:
+                print(f"📊 Using state model for {agent_type}_agent: {profile_name}")
         except Exception as e:
             if args.verbose:
                 print(f"⚠️ Could not load state for model selection: {e}")
@@ -127,17 +197,18 @@ Examples:
     
     agent_class = AGENTS[agent_type]
     agent = agent_class(project_name, llm_config)
+    if args.full_run:
+        agent.full_run = True
     
-    result = agent.run()
+    result = agent.run(
+        on_token=stream_to_stdout if args.stream else None,
+        on_progress=None if args.stream else print_progress
+    )
     
-    if result['success']:
-        print(f"✅ {result['message']}")
-        print(f"🤖 Model used: {result['model']}")
-    else:
-        print(f"❌ {result['message']}")
-        if result.get('error'):
-            print(f"📛 Error: {result['error']}")
-        sys.exit(1)
+    if args.stream:
+        print()
+    
+    print_result(result)
 
 
 if __name__ == '__main__':
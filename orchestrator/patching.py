@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Patch Apply
+DevAgent patch modu: SEARCH/REPLACE bloklarını ayrıştırma ve uygulama
+
+Format (dosya başına bir başlık, altında bir veya daha fazla blok):
+
+    ### FILE: src/app.py
+    <<<<<<< SEARCH
+    mevcut satırlar (birebir)
+    =======
+    yeni satırlar
+    >>>>>>> REPLACE
+
+Yeni dosyalar full moddaki gibi fenced blok ile verilir:
+
+    ### FILE: src/new_module.py
+    ```python
+    ...
+    ```
+
+Bloklar snapshot içeriğine (source_index) uygulanır; SEARCH metni
+dosyada tam olarak bir kez geçmelidir. Birebir bulunamazsa satır sonu
+boşlukları yok sayılarak tekrar denenir.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+_FILE_HEADER_RE = re.compile(r'^###\s*FILE:\s*(.+?)\s*$', re.MULTILINE)
+_BLOCK_RE = re.compile(
+    r'^<{5,9} ?SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} ?REPLACE[^\n]*$',
+    re.MULTILINE | re.DOTALL
+)
+_FENCE_RE = re.compile(r'```[\w+-]*\n(.*?)```', re.DOTALL)
+
+
+def parse_patch_output(output: str) -> Dict[str, dict]:
+    """
+    LLM çıktısını dosya bazında ayrıştır
+
+    Returns:
+        {relative_path: {'blocks': [(search, replace), ...], 'content': str or None}}
+        content: blok yoksa fenced bloktaki tam içerik (yeni / baştan yazılan dosya)
+    """
+    files = {}
+    headers = list(_FILE_HEADER_RE.finditer(output))
+    for i, header in enumerate(headers):
+        path = header.group(1).strip().strip('`')
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(output)
+        body = output[header.end():end]
+
+        blocks = [(search, replace) for search, replace in _BLOCK_RE.findall(body)]
+        entry = files.setdefault(path, {'blocks': [], 'content': None})
+        if blocks:
+            entry['blocks'].extend(blocks)
+        else:
+            fence = _FENCE_RE.search(body)
+            if fence:
+                entry['content'] = fence.group(1).strip()
+    return files
+
+
+def _normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.splitlines())
+
+
+def _find_once(haystack: str, needle: str) -> Optional[int]:
+    """needle tam bir kez geçiyorsa başlangıç indeksi"""
+    index = haystack.find(needle)
+    if index == -1 or haystack.find(needle, index + 1) != -1:
+        return None
+    return index
+
+
+def apply_blocks(original: str, blocks: List[Tuple[str, str]]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    SEARCH/REPLACE bloklarını sırayla uygula
+
+    Returns:
+        (yeni içerik, None) | (None, hata mesajı)
+    """
+    content = original
+    for number, (search, replace) in enumerate(blocks, 1):
+        if not search.strip():
+            # Boş SEARCH: dosya sonuna ekle
+            content = content.rstrip('\n') + '\n' + replace
+            continue
+
+        index = _find_once(content, search)
+        if index is not None:
+            content = content[:index] + replace + content[index + len(search):]
+            continue
+
+        # Satır sonu boşluklarını yok sayarak tekrar dene
+        normalized = _normalize(content)
+        normalized_search = _normalize(search)
+        index = _find_once(normalized, normalized_search)
+        if index is None or not normalized_search:
+            count = normalized.count(normalized_search) if normalized_search else 0
+            reason = 'not found' if count == 0 else f'matches {count} times'
+            return None, f"block {number}: SEARCH text {reason}"
+
+        content = normalized[:index] + _normalize(replace) + normalized[index + len(normalized_search):]
+        if original.endswith('\n') and not content.endswith('\n'):
+            content += '\n'
+
+    return content, None
+
+
+def apply_patch_output(output: str, snapshot: Dict[str, str]) -> dict:
+    """
+    Patch çıktısını snapshot'a uygula
+
+    Args:
+        output: LLM çıktısı
+        snapshot: {relative_path: mevcut içerik}
+
+    Returns:
+        {
+            'files': [(relative_path, content), ...],   # uygulanabilenler
+            'failed': {relative_path: hata mesajı},
+            'unchanged': [relative_path, ...]
+        }
+    """
+    result = {'files': [], 'failed': {}, 'unchanged': []}
+    for path, entry in parse_patch_output(output).items():
+        if entry['blocks']:
+            if path not in snapshot:
+                # Olmayan dosyaya blok: SEARCH'ler boşsa yeni dosya say
+                if all(not search.strip() for search, _ in entry['blocks']):
+                    result['files'].append((path, "".join(r for _, r in entry['blocks']).strip()))
+                else:
+                    result['failed'][path] = 'file does not exist in snapshot'
+                continue
+
+            content, error = apply_blocks(snapshot[path], entry['blocks'])
+            if error:
+                result['failed'][path] = error
+            elif content == snapshot[path]:
+                result['unchanged'].append(path)
+            else:
+                result['files'].append((path, content))
+        elif entry['content'] is not None:
+            result['files'].append((path, entry['content']))
+        else:
+            result['failed'][path] = 'no SEARCH/REPLACE blocks or code block found'
+    return result
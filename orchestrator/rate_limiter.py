@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Rate Limiter
+Süreçler arası paylaşılan token-bucket (SQLite)
+
+Aynı anda birden fazla orchestrator.py / daemon / web job'ı aynı
+provider+model'e istek attığında hepsi tek bir bucket'tan pay alır.
+Limitler profile altındaki `rate_limit` bölümünden okunur:
+
+    rate_limit:
+      requests_per_minute: 20
+      tokens_per_minute: 40000     # opsiyonel
+      max_wait_seconds: 120        # daha uzun beklemek yerine hata döner
+
+Rezervasyon modeli: bakiye negatife düşebilir, çağıran açığı kapanana
+kadar uyur. Böylece bekleyenler sırayla (FIFO'ya yakın) çıkar.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config_loader import get_control_plane_path
+
+
+_local = threading.local()
+
+
+def get_db_path() -> Path:
+    return get_control_plane_path() / 'runtime' / 'ratelimit.sqlite'
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """Thread başına bir bağlantı"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(str(db_path))
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                requests REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        connections[str(db_path)] = conn
+    return conn
+
+
+def rate_limit_key(provider: str, model: str) -> str:
+    return f"{provider}:{model}"
+
+
+def acquire(key: str, tokens: int, limits: dict, db_path: Path = None, cancel_event=None) -> dict:
+    """
+    Bir istek + tahmini token için bucket'tan pay al, gerekirse bekle
+
+    Args:
+        cancel_event: threading.Event; bekleme sırasında set edilirse
+                      {'ok': False, 'cancelled': True} ile hemen döner
+
+    Returns:
+        {'ok': bool, 'waited': float, 'error': str or None}
+    """
+    rpm = float(limits.get('requests_per_minute') or 0)
+    tpm = float(limits.get('tokens_per_minute') or 0)
+    max_wait = float(limits.get('max_wait_seconds', 120))
+
+    if rpm <= 0 and tpm <= 0:
+        return {'ok': True, 'waited': 0.0, 'error': None}
+
+    # Tek istek bucket kapasitesinden büyükse sonsuza kadar beklemesin
+    if tpm > 0:
+        tokens = min(tokens, tpm)
+
+    conn = _connect(db_path or get_db_path())
+    now = time.time()
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute(
+            'SELECT requests, tokens, updated_at FROM buckets WHERE key = ?', (key,)
+        ).fetchone()
+
+        if row is None:
+            req_balance, tok_balance = rpm, tpm
+        else:
+            elapsed = max(0.0, now - row[2])
+            req_balance = min(rpm, row[0] + elapsed * rpm / 60.0)
+            tok_balance = min(tpm, row[1] + elapsed * tpm / 60.0)
+
+        req_balance -= 1 if rpm > 0 else 0
+        tok_balance -= tokens if tpm > 0 else 0
+
+        wait = 0.0
+        if rpm > 0 and req_balance < 0:
+            wait = max(wait, -req_balance * 60.0 / rpm)
+        if tpm > 0 and tok_balance < 0:
+            wait = max(wait, -tok_balance * 60.0 / tpm)
+
+        if wait > max_wait:
+            # Rezervasyonu yapmadan çık; çağıran fallback'e geçebilir
+            conn.execute('ROLLBACK')
+            return {
+                'ok': False,
+                'waited': 0.0,
+                'error': f"Rate limit: {key} would require waiting {wait:.0f}s (max {max_wait:.0f}s)"
+            }
+
+        conn.execute(
+            'INSERT OR REPLACE INTO buckets (key, requests, tokens, updated_at) VALUES (?, ?, ?, ?)',
+            (key, req_balance, tok_balance, now)
+        )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+    if wait > 0:
+        if cancel_event is None:
+            time.sleep(wait)
+        elif cancel_event.wait(wait):
+            return {'ok': False, 'waited': wait, 'error': 'Cancelled', 'cancelled': True}
+    return {'ok': True, 'waited': wait, 'error': None}
+
+
+def penalize(key: str, seconds: float, limits: dict, db_path: Path = None):
+    """
+    Provider 429 + Retry-After döndürdüğünde bucket'ı boşalt
+
+    Diğer süreçler de aynı süre beklesin diye istek bakiyesi
+    `seconds` kadarlık açığa çekilir.
+    """
+    rpm = float(limits.get('requests_per_minute') or 0)
+    if rpm <= 0 or seconds <= 0:
+        return
+
+    conn = _connect(db_path or get_db_path())
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT tokens FROM buckets WHERE key = ?', (key,)).fetchone()
+        tok_balance = row[0] if row else float(limits.get('tokens_per_minute') or 0)
+        conn.execute(
+            'INSERT OR REPLACE INTO buckets (key, requests, tokens, updated_at) VALUES (?, ?, ?, ?)',
+            (key, -seconds * rpm / 60.0, tok_balance, now)
+        )
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Agent Runner
+Agent seçimi, model çözümleme ve çalıştırma (CLI ve web job kuyruğu ortak)
+"""
+
+from config_loader import resolve_llm_config
+from state_manager import load_state
+
+from agents.prp_agent import PRPAgent
+from agents.dev_agent import DevAgent
+from agents.test_agent import TestAgent
+from agents.doc_agent import DocAgent
+
+AGENTS = {
+    'prp': PRPAgent,
+    'dev': DevAgent,
+    'test': TestAgent,
+    'doc': DocAgent,
+}
+
+
+def resolve_agent_profile(project_name: str, agent_type: str, model_override: str = None) -> str:
+    """
+    Agent için kullanılacak profile adını bul
+
+    Öncelik: model_override > state.agent_models[agent] > None (global default)
+    """
+    if model_override:
+        return model_override
+
+    try:
+        state = load_state(project_name)
+    except FileNotFoundError:
+        return None
+
+    return state.get('agent_models', {}).get(f"{agent_type}_agent")
+
+
+def run_agent(project_name: str, agent_type: str, model_override: str = None, on_token=None,
+              on_progress=None, cancel_event=None, no_cache: bool = False,
+              full_run: bool = False) -> dict:
+    """
+    Agent'ı çözümlenen model ile çalıştır
+
+    Args:
+        cancel_event: threading.Event; set edilince LLM retry / rate limit
+                      beklemeleri kesilir (llm_client.LLMCancelled)
+        no_cache: LLM cache'inden okuma (aynı prompt için yeni yanıt)
+        full_run: TestAgent syntax / spec cache'lerini yok sayar
+
+    Returns:
+        BaseAgent.run() sonucu ile aynı format
+    """
+    if agent_type not in AGENTS:
+        return {
+            'success': False,
+            'message': f"Unknown agent: {agent_type}",
+            'model': None,
+            'error': 'unknown_agent'
+        }
+
+    profile_name = resolve_agent_profile(project_name, agent_type, model_override)
+
+    try:
+        llm_config = resolve_llm_config(project_name, profile_name)
+    except Exception as e:
+        return {
+            'success': False,
+            'message': f"Error loading LLM config: {e}",
+            'model': None,
+            'error': str(e)
+        }
+
+    agent = AGENTS[agent_type](project_name, llm_config)
+    agent.llm_client.cancel_event = cancel_event
+    agent.llm_client.bypass_cache = no_cache
+    if full_run:
+        agent.full_run = True
+    return agent.run(on_token=on_token, on_progress=on_progress)
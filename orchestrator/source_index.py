@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Source Index
+Proje src/ dizininin artımlı snapshot'ı
+
+Snapshot <proje>/state/src_index.json içinde tutulur; her dosya için
+path, size, mtime_ns, sha256 ve (küçük metin dosyalarında) içerik saklanır.
+Tarama sadece stat() yapar; size/mtime değişmeyen dosya tekrar okunmaz.
+Binary ve boyut sınırını aşan dosyalar atlanır.
+
+Dönen 'changed' kümesi bir önceki taramadan bu yana içeriği değişen
+(eklenen dahil) dosyalardır; agent'lar bunları prompt'ta öne alır.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+INDEX_VERSION = 1
+INDEX_FILENAME = 'src_index.json'
+
+# Bundan büyük dosyalar prompt'a girmez
+MAX_FILE_BYTES = 256 * 1024
+
+# Binary tespiti için okunan baş kısım
+BINARY_SNIFF_BYTES = 8192
+
+SKIP_DIRS = {'__pycache__', '.git', 'node_modules', '.venv', 'venv', '.mypy_cache', '.pytest_cache'}
+
+
+def get_index_path(project_path: Path) -> Path:
+    return Path(project_path) / 'state' / INDEX_FILENAME
+
+
+def _load_index(index_path: Path) -> dict:
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if index.get('version') != INDEX_VERSION:
+        return {}
+    return index.get('files', {})
+
+
+def _save_index(index_path: Path, files: dict):
+    """Atomik yaz (aynı projede eşzamanlı agent'lar olabilir)"""
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'files': files}, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def _walk(root: Path):
+    """SKIP_DIRS hariç tüm dosyalar (os.scandir, stat bilgisiyle)"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS:
+                    stack.append(entry.path)
+            elif entry.is_file():
+                yield entry
+
+
+def _read_entry(path: str, size: int) -> dict:
+    """Dosyayı oku ve index kaydı oluştur"""
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    entry = {'sha256': hashlib.sha256(data).hexdigest(), 'skipped': None, 'content': None}
+    if size > MAX_FILE_BYTES:
+        entry['skipped'] = 'too_large'
+    elif b'\0' in data[:BINARY_SNIFF_BYTES]:
+        entry['skipped'] = 'binary'
+    else:
+        try:
+            entry['content'] = data.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['skipped'] = 'binary'
+    return entry
+
+
+def scan(project_path: Path, root: str = 'src') -> dict:
+    """
+    src/ snapshot'ını güncelle
+
+    Returns:
+        {
+            'files': [(relative_path, content, mtime), ...],   # path sırasıyla, metin dosyaları
+            'changed': set of relative_path,                   # eklenen / içeriği değişen
+            'removed': set of relative_path,
+            'skipped': {relative_path: 'binary' | 'too_large'},
+            'hashes': {relative_path: sha256},                 # atlananlar dahil tüm dosyalar
+            'read': int                                        # diskten okunan dosya sayısı
+        }
+    """
+    project_path = Path(project_path)
+    index_path = get_index_path(project_path)
+    previous = _load_index(index_path)
+
+    current = {}
+    changed = set()
+    read = 0
+
+    root_path = project_path / root
+    if root_path.exists():
+        for dir_entry in _walk(root_path):
+            relative = os.path.relpath(dir_entry.path, project_path)
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+
+            old = previous.get(relative)
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                current[relative] = old
+                continue
+
+            try:
+                entry = _read_entry(dir_entry.path, stat.st_size)
+            except OSError:
+                continue
+            read += 1
+
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            current[relative] = entry
+            if not old or old['sha256'] != entry['sha256']:
+                changed.add(relative)
+
+    if current != previous:
+        _save_index(index_path, current)
+
+    files = [
+        (relative, entry['content'], entry['mtime_ns'] / 1e9)
+        for relative, entry in sorted(current.items())
+        if entry['content'] is not None
+    ]
+    return {
+        'files': files,
+        'changed': changed,
+        'removed': set(previous) - set(current),
+        'skipped': {r: e['skipped'] for r, e in current.items() if e['skipped']},
+        'hashes': {r: e['sha256'] for r, e in current.items()},
+        'read': read,
+    }
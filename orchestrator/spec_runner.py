@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Spec Runner
+TestAgent'ın ürettiği test spesifikasyonlarını çalıştırır
+
+tests/test_specs.md formatı (TestAgent prompt'u):
+
+    ### Test 1: Toplama
+    - Input: 2 ve 3
+    - Expected: `5`
+    - Command: `python3 src/main.py 2 3`
+    - Timeout: 10            (opsiyonel, saniye)
+    - Exit code: 2           (opsiyonel, beklenen çıkış kodu; varsayılan 0)
+    - Memory: 128            (opsiyonel, MB)
+
+Spesifikasyonlar LLM çıktısıdır: Timeout ve Memory limitleri sadece
+düşürebilir. Üst sınırlar proje ayarından (timeout_seconds,
+memory_limit_mb) gelir.
+
+Varsayılan olarak KAPALI (opt-in): komutlar ağ izolasyonu olmadan, kontrol
+plane kullanıcısıyla çalışır. Açmak için proje config/tests.yaml'da
+spec_runner.enabled: true ya da AI_FACTORY_SPEC_RUNNER=on (ortam değişkeni
+proje ayarını ezer).
+
+Her komut ayrı bir alt süreçte, projenin src/ ve tests/ kopyasının
+bulunduğu geçici bir dizinde çalışır:
+  - CPU süresi, bellek ve yazılabilir dosya boyutu rlimit ile sınırlı
+  - stdout / stderr'in ilk OUTPUT_LIMIT karakteri tutulur, kalanı okunup atılır
+  - Kısıtlı environment (HOME geçici dizin, API key'ler aktarılmaz)
+  - Zaman aşımında tüm süreç grubu öldürülür
+Testler thread havuzunda eşzamanlı çalışır (CPU sayısı kadar).
+
+Karşılaştırma: çıkış kodu beklenen değer (varsayılan 0) olmalı. Expected
+içinde `backtick` ya da "tırnak" içinde değer varsa ayrıca stdout'ta
+(boşluklar normalize) aranır; sıfırdan farklı çıkış kodu beklenen
+testlerde hata mesajı için stderr de aranır.
+"""
+
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from config_loader import load_project_config
+
+
+DEFAULT_TIMEOUT = 30
+MAX_TIMEOUT = 300
+MEMORY_LIMIT_MB = 512   # 0: sınırsız (Node/V8 büyük sanal adres alanı ayırır)
+FILE_SIZE_LIMIT_MB = 50
+
+# Proje config/tests.yaml -> spec_runner
+SETTINGS_DEFAULTS = {
+    'enabled': False,
+    'timeout_seconds': DEFAULT_TIMEOUT,
+    'memory_limit_mb': MEMORY_LIMIT_MB
+}
+
+# Rapora yazılan çıktı uzunluğu (karakter); pipe'tan en fazla bu kadar karakterin
+# UTF-8 bayt karşılığı bellekte tutulur
+OUTPUT_LIMIT = 2000
+_OUTPUT_BYTES = OUTPUT_LIMIT * 4
+_READ_CHUNK = 65536
+
+# Geçici kopyaya alınan proje dizinleri
+COPY_DIRS = ('src', 'tests')
+
+_TEST_HEADER_RE = re.compile(r'^#{3,4}\s*(Test\s*\d+.*?)\s*$', re.MULTILINE | re.IGNORECASE)
+_FIELD_RE = re.compile(r'^\s*[-*]\s*\**(Input|Expected|Command|Timeout|Exit\s*code|Memory)\**\s*:\s*(.*?)\s*$',
+                       re.MULTILINE | re.IGNORECASE)
+_LITERAL_RE = re.compile(r'`([^`]+)`|"([^"]+)"')
+
+_NO_COMMAND = {'', 'n/a', 'na', 'none', '-', 'manual', 'not applicable'}
+
+# Alt süreçte rlimit'leri uygulayıp komutu sh ile çalıştıran sarmalayıcı
+# (preexec_fn thread'li süreçte güvenli değil)
+_LIMIT_WRAPPER = """
+import os, resource, sys
+cpu, memory, fsize = (int(v) for v in sys.argv[1:4])
+for limit, value in ((resource.RLIMIT_CPU, cpu), (resource.RLIMIT_AS, memory), (resource.RLIMIT_FSIZE, fsize)):
+    if value <= 0:
+        continue
+    try:
+        resource.setrlimit(limit, (value, value))
+    except (ValueError, OSError):
+        pass
+os.execv('/bin/sh', ['sh', '-c', sys.argv[4]])
+"""
+
+
+def _parse_int(value, default: Optional[int]) -> Optional[int]:
+    try:
+        return int(float(str(value).strip().strip('`')))
+    except (TypeError, ValueError):
+        return default
+
+
+def load_settings(project_path: Path) -> dict:
+    """
+    Proje config/tests.yaml -> spec_runner (yoksa varsayılanlar)
+
+    AI_FACTORY_SPEC_RUNNER=on/off ve AI_FACTORY_SPEC_MEMORY_MB proje ayarını ezer.
+    """
+    config = (load_project_config(project_path, 'tests').get('spec_runner') or {}) if project_path else {}
+    settings = {**SETTINGS_DEFAULTS, **config}
+
+    switch = os.environ.get('AI_FACTORY_SPEC_RUNNER', '').lower()
+    if switch:
+        settings['enabled'] = switch in ('on', '1', 'true', 'yes')
+    memory = os.environ.get('AI_FACTORY_SPEC_MEMORY_MB')
+    if memory:
+        settings['memory_limit_mb'] = memory
+    settings['memory_limit_mb'] = max(0, _parse_int(settings['memory_limit_mb'], MEMORY_LIMIT_MB))
+    settings['timeout_seconds'] = min(MAX_TIMEOUT, max(1, _parse_int(settings['timeout_seconds'], DEFAULT_TIMEOUT)))
+    settings['enabled'] = settings['enabled'] is True or str(settings['enabled']).lower() in ('on', '1', 'true', 'yes')
+    return settings
+
+
+def is_enabled(project_path: Path = None) -> bool:
+    """Spec runner opt-in: proje ayarı ya da AI_FACTORY_SPEC_RUNNER=on"""
+    return load_settings(project_path)['enabled']
+
+
+def _strip_inline(value: str) -> str:
+    """`komut` -> komut"""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] == '`':
+        return value.strip('`').strip()
+    return value
+
+
+def parse_specs(text: str) -> List[dict]:
+    """
+    Markdown spesifikasyonlarını ayrıştır
+
+    Returns:
+        [{'id', 'name', 'input', 'expected', 'command', 'timeout',
+          'expected_exit', 'memory_mb', 'text'}, ...]
+        command: None ise test manuel (çalıştırılmaz)
+        timeout / memory_mb: None ise proje ayarı (verilirse sadece düşürür,
+        bkz. effective_limits)
+    """
+    specs = []
+    headers = list(_TEST_HEADER_RE.finditer(text or ''))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        body = text[header.start():end]
+        fields = {' '.join(name.lower().split()): value for name, value in _FIELD_RE.findall(body)}
+
+        command = _strip_inline(fields.get('command', ''))
+        if command.lower().strip('[]. ') in _NO_COMMAND or command.startswith('['):
+            command = None
+
+        timeout = _parse_int(fields.get('timeout'), None)
+        memory_mb = _parse_int(fields.get('memory'), None)
+
+        name = header.group(1)
+        specs.append({
+            'id': f"T{i + 1}",
+            'name': name.split(':', 1)[1].strip() if ':' in name else name,
+            'input': fields.get('input', ''),
+            'expected': fields.get('expected', ''),
+            'command': command,
+            'timeout': timeout if timeout and timeout > 0 else None,
+            'expected_exit': _parse_int(fields.get('exit code', 0), 0),
+            'memory_mb': memory_mb if memory_mb and memory_mb > 0 else None,
+            'text': body.strip()
+        })
+    return specs
+
+
+def expected_literals(expected: str) -> List[str]:
+    """Expected içindeki `...` / "..." değerler"""
+    return [a or b for a, b in _LITERAL_RE.findall(expected or '')]
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def _evaluate(spec: dict, exit_code: int, stdout: str, stderr: str) -> tuple:
+    """(status, reason)"""
+    expected_exit = spec.get('expected_exit', 0)
+    if exit_code != expected_exit:
+        return 'failed', f"exit code {exit_code} (expected {expected_exit})"
+    literals = expected_literals(spec['expected'])
+    if literals:
+        # Hata senaryolarında mesaj genelde stderr'e yazılır
+        normalized = _normalize(stdout if expected_exit == 0 else stdout + '\n' + stderr)
+        missing = [lit for lit in literals if _normalize(lit) not in normalized]
+        if missing:
+            return 'failed', f"expected output not found: {missing[0][:100]}"
+    return 'passed', None
+
+
+def effective_limits(spec: dict, settings: dict) -> tuple:
+    """
+    (timeout saniye, bellek MB; 0 = sınırsız)
+
+    Spec değerleri proje limitlerini sadece düşürebilir (0 / büyük değer
+    sandbox'ı gevşetemez).
+    """
+    timeout = settings['timeout_seconds']
+    if spec.get('timeout'):
+        timeout = max(1, min(spec['timeout'], timeout))
+    memory_mb = settings['memory_limit_mb']
+    if spec.get('memory_mb'):
+        memory_mb = min(spec['memory_mb'], memory_mb) if memory_mb else spec['memory_mb']
+    return timeout, memory_mb
+
+
+def _read_bounded(stream, chunks: list):
+    """Pipe'ı EOF'a kadar oku; ilk _OUTPUT_BYTES bayt tutulur, kalanı atılır"""
+    size = 0
+    while True:
+        data = stream.read(_READ_CHUNK)
+        if not data:
+            break
+        if size < _OUTPUT_BYTES:
+            chunks.append(data[:_OUTPUT_BYTES - size])
+            size += len(chunks[-1])
+
+
+def _prepare_workdir(project_path: Path) -> str:
+    workdir = tempfile.mkdtemp(prefix='ai-factory-spec-')
+    for name in COPY_DIRS:
+        source = project_path / name
+        if source.is_dir():
+            shutil.copytree(source, os.path.join(workdir, name),
+                            ignore=shutil.ignore_patterns('__pycache__', '.git', 'node_modules'))
+    return workdir
+
+
+def _sandbox_env(workdir: str) -> dict:
+    """Minimal environment (API key'ler ve kullanıcı ayarları aktarılmaz)"""
+    return {
+        'PATH': os.environ.get('PATH', '/usr/local/bin:/usr/bin:/bin'),
+        'HOME': workdir,
+        'TMPDIR': workdir,
+        'LANG': os.environ.get('LANG', 'C.UTF-8'),
+        'PYTHONDONTWRITEBYTECODE': '1',
+        'PYTHONPATH': os.path.join(workdir, 'src'),
+        'PYTHONIOENCODING': 'utf-8',
+    }
+
+
+def run_spec(spec: dict, project_path: Path, settings: dict = None) -> dict:
+    """
+    Tek spesifikasyonu izole alt süreçte çalıştır
+
+    Args:
+        settings: load_settings(project_path) (verilmezse okunur)
+
+    Returns:
+        {'id', 'name', 'command', 'expected', 'status', 'reason', 'exit_code',
+         'duration', 'stdout', 'stderr'}
+        status: passed | failed | timeout | error | skipped
+    """
+    result = {
+        'id': spec['id'],
+        'name': spec['name'],
+        'command': spec['command'],
+        'expected': spec['expected'],
+        'status': 'skipped',
+        'reason': None,
+        'exit_code': None,
+        'duration': 0.0,
+        'stdout': '',
+        'stderr': ''
+    }
+    if not spec['command']:
+        result['reason'] = 'no command (manual test)'
+        return result
+
+    timeout, memory_mb = effective_limits(spec, settings or load_settings(project_path))
+    workdir = _prepare_workdir(Path(project_path))
+    args = [
+        sys.executable, '-c', _LIMIT_WRAPPER,
+        str(timeout + 1),
+        str(memory_mb * 1024 * 1024),
+        str(FILE_SIZE_LIMIT_MB * 1024 * 1024),
+        spec['command']
+    ]
+    started = time.monotonic()
+    try:
+        process = subprocess.Popen(
+            args, cwd=workdir, env=_sandbox_env(workdir),
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+        # communicate() tüm çıktıyı belleğe alırdı (RLIMIT_FSIZE pipe'ı sınırlamaz)
+        outputs = {'stdout': [], 'stderr': []}
+        readers = {name: threading.Thread(target=_read_bounded, args=(getattr(process, name), chunks), daemon=True)
+                   for name, chunks in outputs.items()}
+        for reader in readers.values():
+            reader.start()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+            result['status'] = 'timeout'
+            result['reason'] = f"timed out after {timeout}s"
+        result['exit_code'] = process.returncode
+        for name, chunks in outputs.items():
+            # Gruptan kaçan torun süreç pipe'ı açık tutabilir; okuyucu beklenmez
+            readers[name].join(timeout=1)
+            if not readers[name].is_alive():
+                getattr(process, name).close()
+            result[name] = b''.join(chunks).decode('utf-8', errors='replace')[:OUTPUT_LIMIT]
+        if result['status'] != 'timeout':
+            result['status'], result['reason'] = _evaluate(
+                spec, process.returncode, result['stdout'], result['stderr']
+            )
+    except OSError as e:
+        result['status'] = 'error'
+        result['reason'] = str(e)
+    finally:
+        result['duration'] = round(time.monotonic() - started, 3)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return result
+
+
+def run_specs(specs: List[dict], project_path: Path, max_workers: int = None) -> List[dict]:
+    """Spesifikasyonları eşzamanlı çalıştır (sonuçlar giriş sırasıyla)"""
+    if not specs:
+        return []
+    settings = load_settings(project_path)
+    workers = max(1, min(len(specs), max_workers or os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='spec') as pool:
+        return list(pool.map(lambda spec: run_spec(spec, project_path, settings), specs))
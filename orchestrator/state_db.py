@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+AI Factory - State DB
+Opsiyonel SQLite state backend'i (config/storage.yaml: state_backend: sqlite)
+
+    projects  Proje başına tek satır: tam state (JSON) + indeksli kolonlar
+              (phase, blocking, deployment, last_event)
+    events    Append-only: her state yazmasında bir satır (revision, phase,
+              last_event özeti, değişen üst seviye alanlar)
+
+state.yaml git uyumluluğu için her yazmada dışa aktarılır (export_yaml).
+YAML dosyası dışarıdan değiştirilirse (elle düzenleme, git checkout) mtime
+farkı okumada fark edilir; içerik DB'dekinden farklıysa içe alınır. Dış
+düzenleme revision'u artırmadıysa revision DB'ninkinden bir fazlaya çekilir
+ve çakışma loglanır (sonraki yazma düzenlemeyi ezmez). state_store CLI'ı
+(scripts/update-state.sh) sqlite backend'de doğrudan DB'ye yazar.
+Bir projenin satırı yoksa ilk erişimde state.yaml'dan oluşturulur.
+"""
+
+import copy
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import state_store
+from state_store import REVISION_KEY, StateConflictError, get_revision
+
+
+_local = threading.local()
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS projects (
+        project_id TEXT PRIMARY KEY,
+        revision INTEGER NOT NULL,
+        phase TEXT,
+        is_blocked INTEGER NOT NULL DEFAULT 0,
+        block_reason TEXT,
+        deployment_status TEXT,
+        deployment_port INTEGER,
+        last_event_agent TEXT,
+        last_event_result TEXT,
+        last_event_at TEXT,
+        updated_at REAL NOT NULL,
+        yaml_mtime_ns INTEGER,
+        state_json TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_projects_phase ON projects(phase);
+    CREATE INDEX IF NOT EXISTS idx_projects_blocked ON projects(is_blocked);
+    CREATE INDEX IF NOT EXISTS idx_projects_deployment ON projects(deployment_status);
+    CREATE INDEX IF NOT EXISTS idx_projects_last_event ON projects(last_event_at);
+
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id TEXT NOT NULL,
+        revision INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        phase TEXT,
+        agent TEXT,
+        action TEXT,
+        result TEXT,
+        changed TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_events_project ON events(project_id, id);
+'''
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    """Thread başına bir bağlantı"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(str(db_path))
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        connections[str(db_path)] = conn
+    return conn
+
+
+def _yaml_mtime(yaml_path: Path) -> Optional[int]:
+    try:
+        return yaml_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _columns(state: dict) -> dict:
+    blocking = state.get('blocking') or {}
+    deployment = state.get('deployment') or {}
+    last_event = state.get('last_event') or {}
+    port = deployment.get('port')
+    return {
+        'phase': state.get('phase'),
+        'is_blocked': 1 if blocking.get('is_blocked') else 0,
+        'block_reason': blocking.get('reason'),
+        'deployment_status': deployment.get('status'),
+        'deployment_port': int(port) if str(port or '').isdigit() else None,
+        'last_event_agent': last_event.get('agent'),
+        'last_event_result': last_event.get('result'),
+        'last_event_at': str(last_event['timestamp']) if last_event.get('timestamp') else None,
+    }
+
+
+def _store(conn, project_id: str, previous: dict, state: dict, yaml_mtime_ns: Optional[int]):
+    columns = _columns(state)
+    conn.execute(f'''
+        INSERT INTO projects (project_id, revision, {', '.join(columns)}, updated_at, yaml_mtime_ns, state_json)
+        VALUES (?, ?, {', '.join('?' for _ in columns)}, ?, ?, ?)
+        ON CONFLICT(project_id) DO UPDATE SET
+            revision = excluded.revision,
+            {', '.join(f'{c} = excluded.{c}' for c in columns)},
+            updated_at = excluded.updated_at,
+            yaml_mtime_ns = excluded.yaml_mtime_ns,
+            state_json = excluded.state_json
+    ''', (project_id, get_revision(state), *columns.values(), time.time(), yaml_mtime_ns,
+          json.dumps(state, default=str, ensure_ascii=False)))
+
+    changed = sorted(k for k in set(previous) | set(state)
+                     if k != REVISION_KEY and previous.get(k) != state.get(k))
+    last_event = state.get('last_event') or {}
+    conn.execute('''
+        INSERT INTO events (project_id, revision, created_at, phase, agent, action, result, changed)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (project_id, get_revision(state), time.time(), state.get('phase'),
+          last_event.get('agent'), last_event.get('action'), last_event.get('result'),
+          json.dumps(changed)))
+
+
+def _content(state: dict) -> dict:
+    """Revision hariç state (içerik karşılaştırması)"""
+    return {k: v for k, v in state.items() if k != REVISION_KEY}
+
+
+def _current(conn, project_id: str, yaml_path: Path) -> dict:
+    """
+    Transaction içinde çağrılır: DB'deki state (gerekirse state.yaml'dan içe alınır)
+    """
+    row = conn.execute('SELECT revision, yaml_mtime_ns, state_json FROM projects WHERE project_id = ?',
+                       (project_id,)).fetchone()
+    mtime = _yaml_mtime(yaml_path)
+    if row is not None and (mtime is None or mtime == row['yaml_mtime_ns']):
+        return json.loads(row['state_json'])
+
+    # İlk erişim ya da YAML dışarıdan değişti
+    on_disk = state_store.read(yaml_path)
+    previous = json.loads(row['state_json']) if row is not None else {}
+    if row is not None and (not on_disk or _content(on_disk) == _content(previous)):
+        # Sadece dokunulmuş (touch, aynı içerikle yeniden yazılmış)
+        conn.execute('UPDATE projects SET yaml_mtime_ns = ? WHERE project_id = ?', (mtime, project_id))
+        return previous
+    if row is not None and get_revision(on_disk) <= row['revision']:
+        print(f"⚠️ State conflict for {project_id}: state.yaml edited externally without a revision bump "
+              f"(yaml revision {get_revision(on_disk)}, db revision {row['revision']}); importing YAML")
+        on_disk = dict(on_disk, **{REVISION_KEY: row['revision'] + 1})
+    if on_disk:
+        _store(conn, project_id, previous, on_disk, mtime)
+    return on_disk
+
+
+def _export_yaml(yaml_path: Path, state: dict) -> Optional[int]:
+    """state.yaml'ı DB ile aynı içerikle yaz (git uyumluluğu)"""
+    with state_store.locked(yaml_path):
+        state_store._write_atomic(yaml_path, state)
+    return _yaml_mtime(yaml_path)
+
+
+def _transaction(db_path: Path, project_id: str, yaml_path: Path, fn: Callable[[sqlite3.Connection, dict], Optional[dict]],
+                 export_yaml: bool) -> dict:
+    conn = _connect(db_path)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = _current(conn, project_id, yaml_path)
+        updated = fn(conn, current)
+        if updated is None or updated == current:
+            conn.execute('COMMIT')
+            return current
+
+        updated = dict(updated)
+        updated[REVISION_KEY] = get_revision(current) + 1
+        mtime = _export_yaml(yaml_path, updated) if export_yaml else _yaml_mtime(yaml_path)
+        _store(conn, project_id, current, updated, mtime)
+        conn.execute('COMMIT')
+        return updated
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def load(db_path: Path, project_id: str, yaml_path: Path) -> dict:
+    """Proje state'i (yoksa {})"""
+    conn = _connect(db_path)
+
+    # Hızlı yol: YAML dışarıdan değişmemişse transaction gerekmez
+    row = conn.execute('SELECT yaml_mtime_ns, state_json FROM projects WHERE project_id = ?',
+                       (project_id,)).fetchone()
+    if row is not None:
+        mtime = _yaml_mtime(yaml_path)
+        if mtime is None or mtime == row['yaml_mtime_ns']:
+            return json.loads(row['state_json'])
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        state = _current(conn, project_id, yaml_path)
+        conn.execute('COMMIT')
+        return state
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def write(db_path: Path, project_id: str, yaml_path: Path, state: dict,
+          expected_revision: Optional[int] = None, export_yaml: bool = True) -> dict:
+    """state_store.write ile aynı sözleşme (CAS: expected_revision)"""
+    def replace(conn, current):
+        if expected_revision is not None and get_revision(current) != expected_revision:
+            raise StateConflictError(project_id, expected_revision, get_revision(current))
+        return state
+    return _transaction(db_path, project_id, yaml_path, replace, export_yaml)
+
+
+def update(db_path: Path, project_id: str, yaml_path: Path, fn: Callable[[dict], dict],
+           export_yaml: bool = True) -> dict:
+    """state_store.update ile aynı sözleşme"""
+    def apply(conn, current):
+        if not current:
+            raise FileNotFoundError(f"State not found: {project_id}")
+        return fn(copy.deepcopy(current))
+    return _transaction(db_path, project_id, yaml_path, apply, export_yaml)
+
+
+def load_many(db_path: Path, yaml_paths: Dict[str, Path]) -> Dict[str, dict]:
+    """
+    Birden fazla projenin state'i tek sorguda ({project_id: state})
+
+    Args:
+        yaml_paths: {project_id: state.yaml path}; mtime'ı DB'dekinden farklı
+                    (dışarıdan değişmiş) ya da DB'de olmayan projeler load() ile okunur
+    """
+    if not yaml_paths:
+        return {}
+    conn = _connect(db_path)
+    ids = list(yaml_paths)
+    placeholders = ', '.join('?' for _ in ids)
+    rows = conn.execute(f'SELECT project_id, yaml_mtime_ns, state_json FROM projects WHERE project_id IN ({placeholders})',
+                        ids).fetchall()
+
+    states = {}
+    for row in rows:
+        mtime = _yaml_mtime(yaml_paths[row['project_id']])
+        if mtime is None or mtime == row['yaml_mtime_ns']:
+            states[row['project_id']] = json.loads(row['state_json'])
+    for project_id in ids:
+        if project_id not in states:
+            state = load(db_path, project_id, yaml_paths[project_id])
+            if state:
+                states[project_id] = state
+    return states
+
+
+def query_projects(db_path: Path, phase: str = None, deployment_status: str = None,
+                   is_blocked: bool = None) -> List[dict]:
+    """İndeksli kolonlar üzerinden filtre (tam state olmadan özet satırlar)"""
+    clauses, params = [], []
+    if phase is not None:
+        clauses.append('phase = ?')
+        params.append(phase)
+    if deployment_status is not None:
+        clauses.append('deployment_status = ?')
+        params.append(deployment_status)
+    if is_blocked is not None:
+        clauses.append('is_blocked = ?')
+        params.append(1 if is_blocked else 0)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    rows = _connect(db_path).execute(f'''
+        SELECT project_id, revision, phase, is_blocked, block_reason, deployment_status,
+               deployment_port, last_event_agent, last_event_result, last_event_at
+        FROM projects {where} ORDER BY project_id
+    ''', params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def list_events(db_path: Path, project_id: str, limit: int = 50) -> List[dict]:
+    """Projenin son state olayları (yeniden eskiye)"""
+    rows = _connect(db_path).execute('''
+        SELECT revision, created_at, phase, agent, action, result, changed
+        FROM events WHERE project_id = ? ORDER BY id DESC LIMIT ?
+    ''', (project_id, limit)).fetchall()
+    return [dict(row, changed=json.loads(row['changed'] or '[]')) for row in rows]
@@ -2,12 +2,22 @@
 """
 AI Factory - State Manager
 State okuma/yazma/güncelleme
+
+Yazmalar state_store üzerinden atomik ve kilitlidir. Okuma-değiştirme-yazma
+için save_state yerine update_state kullanılmalı (eşzamanlı yazıcılar,
+örn. web proxy'nin last_activity güncellemesi, ezilmez).
+
+config/storage.yaml'da state_backend: sqlite ise state state_db'de
+tutulur ve state.yaml dışa aktarılır; API aynıdır.
 """
 
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
-from config_loader import get_projects_path, load_yaml, save_yaml
+from config_loader import get_control_plane_path, get_projects_path, load_storage_config
+import state_db
+import state_store
 
 
 def get_state_path(project_name: str) -> Path:
@@ -15,10 +25,22 @@ def get_state_path(project_name: str) -> Path:
     return get_projects_path() / project_name / 'state' / 'state.yaml'
 
 
+def get_state_db_path() -> Path:
+    """sqlite backend'de DB path'i; yaml backend'de None"""
+    storage = load_storage_config()
+    if storage['state_backend'] != 'sqlite':
+        return None
+    return get_control_plane_path() / storage['sqlite_path']
+
+
 def load_state(project_name: str) -> dict:
     """Proje state'ini yükle"""
     state_path = get_state_path(project_name)
-    state = load_yaml(state_path)
+    db_path = get_state_db_path()
+    if db_path:
+        state = state_db.load(db_path, project_name, state_path)
+    else:
+        state = state_store.read(state_path)
     
     if not state:
         raise FileNotFoundError(f"State not found: {state_path}")
@@ -26,14 +48,83 @@ def load_state(project_name: str) -> dict:
     return state
 
 
-def save_state(project_name: str, state: dict):
-    """Proje state'ini kaydet"""
+def save_state(project_name: str, state: dict, expected_revision: int = None) -> dict:
+    """
+    Proje state'ini kaydet (tamamını)
+    
+    Args:
+        expected_revision: Verilirse compare-and-swap; state okunduğundan beri
+                           değiştiyse StateConflictError
+    """
     state_path = get_state_path(project_name)
-    save_yaml(state_path, state)
+    db_path = get_state_db_path()
+    if db_path:
+        return state_db.write(db_path, project_name, state_path, state, expected_revision=expected_revision,
+                              export_yaml=load_storage_config()['export_yaml'])
+    return state_store.write(state_path, state, expected_revision=expected_revision)
+
 
+def update_state(project_name: str, fn: Callable[[dict], dict]) -> dict:
+    """
+    State'i kilit altında güncelle: fn(güncel state) -> yeni state
+    
+    Returns:
+        Kaydedilen state
+    """
+    db_path = get_state_db_path()
+    if db_path:
+        return state_db.update(db_path, project_name, get_state_path(project_name), fn,
+                               export_yaml=load_storage_config()['export_yaml'])
+    return state_store.update(get_state_path(project_name), fn)
+
+
+def load_states(project_names: list) -> dict:
+    """
+    Birden fazla projenin state'i ({project_name: state}, bulunamayanlar hariç)
+    
+    sqlite backend'de tek sorgu (sadece dışarıdan değişen YAML'lar tekrar okunur)
+    """
+    db_path = get_state_db_path()
+    if db_path:
+        return state_db.load_many(db_path, {name: get_state_path(name) for name in project_names})
+    
+    states = {}
+    for name in project_names:
+        state = state_store.read(get_state_path(name))
+        if state:
+            states[name] = state
+    return states
 
-def update_last_event(state: dict, agent: str, action: str, result: str, model: str) -> dict:
-    """last_event alanını güncelle"""
+
+def query_states(phase: str = None, deployment_status: str = None, is_blocked: bool = None) -> list:
+    """
+    İndeksli alanlara göre proje özetleri (sadece sqlite backend)
+    
+    Returns:
+        [{'project_id', 'phase', 'is_blocked', 'deployment_status', 'deployment_port', ...}]
+        yaml backend'de None (çağıran dosyaları taramalı)
+    """
+    db_path = get_state_db_path()
+    if not db_path:
+        return None
+    return state_db.query_projects(db_path, phase=phase, deployment_status=deployment_status,
+                                   is_blocked=is_blocked)
+
+
+def list_state_events(project_name: str, limit: int = 50) -> list:
+    """State olay geçmişi (sadece sqlite backend; yaml'da boş)"""
+    db_path = get_state_db_path()
+    return state_db.list_events(db_path, project_name, limit) if db_path else []
+
+
+def update_last_event(state: dict, agent: str, action: str, result: str, model: str,
+                      failover: list = None) -> dict:
+    """
+    last_event alanını güncelle
+    
+    failover: LLM çağrısı sırasında başarısız olup atlanan profile'lar
+              [{'profile', 'model', 'error'}, ...]
+    """
     state['last_event'] = {
         'agent': agent,
         'action': action,
@@ -41,6 +132,8 @@ def update_last_event(state: dict, agent: str, action: str, result: str, model:
         'result': result,
         'model': model
     }
+    if failover:
+        state['last_event']['failover'] = failover
     return state
 
 
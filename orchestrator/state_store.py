@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+AI Factory - State Store
+state.yaml için atomik, kilitli yazma
+
+  - Yazma: aynı dizinde geçici dosya + fsync + os.replace (okuyan taraf
+    hiçbir zaman yarım dosya görmez, kilit gerekmez)
+  - Kilit: state.yaml.lock üzerinde flock (state.yaml rename ile
+    değiştiği için kilit ayrı dosyada tutulur)
+  - Revision: her yazmada artan `state_revision` alanı; write()
+    expected_revision ile çağrılırsa compare-and-swap yapar
+  - update(): kilit altında oku -> fn -> yaz; eşzamanlı yazıcılar
+    birbirinin değişikliğini ezmez
+
+Agent'lar, web UI ve shell script'leri bu modül üzerinden yazar. Script'ler için:
+
+    python3 state_store.py <state.yaml> phase=development 'version.prp="1.1"'
+
+(sqlite backend'de proje state.yaml'ları için yazma state_manager / DB üzerinden)
+
+Değerler YAML olarak yorumlanır (true, null, 0.8, "1.0" ...).
+"""
+
+import copy
+import fcntl
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+import yaml_io
+
+
+REVISION_KEY = 'state_revision'
+
+
+class StateConflictError(Exception):
+    """State, okunduğundan beri başka bir yazıcı tarafından değiştirildi"""
+
+    def __init__(self, path, expected: int, actual: int):
+        super().__init__(f"State changed concurrently: {path} (expected revision {expected}, found {actual})")
+        self.expected = expected
+        self.actual = actual
+
+
+def get_revision(state: Optional[dict]) -> int:
+    return int((state or {}).get(REVISION_KEY) or 0)
+
+
+@contextmanager
+def locked(state_path: Path, shared: bool = False):
+    """state.yaml.lock üzerinde advisory kilit"""
+    state_path = Path(state_path)
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(f"{state_path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def read(state_path: Path) -> dict:
+    """State'i oku (dosya yoksa {}; yaml_io sidecar cache'i açıksa oradan)"""
+    try:
+        return yaml_io.load_file(state_path) or {}
+    except FileNotFoundError:
+        return {}
+
+
+def _write_atomic(state_path: Path, state: dict):
+    fd, tmp_path = tempfile.mkstemp(prefix='.state.', suffix='.tmp', dir=state_path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yaml_io.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 0600 açar; state diğer araçlar tarafından da okunur
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, state_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _commit(state_path: Path, current: dict, state: dict) -> dict:
+    """Kilit tutulurken çağrılır: revision'ı artırıp yaz"""
+    state = dict(state)
+    state[REVISION_KEY] = get_revision(current) + 1
+    _write_atomic(state_path, state)
+    return state
+
+
+def write(state_path: Path, state: dict, expected_revision: Optional[int] = None) -> dict:
+    """
+    State'i atomik yaz
+
+    Args:
+        expected_revision: Verilirse diskteki revision bununla aynı olmalı (CAS)
+
+    Returns:
+        Yazılan state (yeni revision ile)
+
+    Raises:
+        StateConflictError: expected_revision tutmadı
+    """
+    state_path = Path(state_path)
+    with locked(state_path):
+        current = read(state_path)
+        if expected_revision is not None and get_revision(current) != expected_revision:
+            raise StateConflictError(state_path, expected_revision, get_revision(current))
+        return _commit(state_path, current, state)
+
+
+def update(state_path: Path, fn: Callable[[dict], dict], create: bool = False) -> dict:
+    """
+    Kilit altında oku -> fn(state) -> yaz
+
+    Args:
+        fn: state'i alıp güncellenmiş state'i döndürür (None: değişiklik yok)
+        create: State dosyası yoksa boş state ile devam et
+
+    Returns:
+        Güncel state
+    """
+    state_path = Path(state_path)
+    with locked(state_path):
+        current = read(state_path)
+        if not current and not create:
+            raise FileNotFoundError(f"State not found: {state_path}")
+        updated = fn(copy.deepcopy(current))
+        if updated is None or updated == current:
+            return current
+        return _commit(state_path, current, updated)
+
+
+def _set_fields(assignments):
+    """['a.b=değer', ...] -> update fn"""
+    def apply(state):
+        for assignment in assignments:
+            key, _, raw = assignment.partition('=')
+            target = state
+            *parents, leaf = key.split('.')
+            for part in parents:
+                if not isinstance(target.get(part), dict):
+                    target[part] = {}
+                target = target[part]
+            target[leaf] = yaml_io.safe_load(raw) if raw else None
+        return state
+    return apply
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or not all('=' in a for a in sys.argv[2:]):
+        print("Kullanım: state_store.py <state.yaml> alan.yolu=değer [...]", file=sys.stderr)
+        sys.exit(2)
+    state_path = Path(sys.argv[1]).resolve()
+    try:
+        # sqlite backend'de DB üzerinden (export_yaml: false iken YAML eski
+        # olabilir; doğrudan yazmak DB'deki değişiklikleri ezerdi)
+        import state_manager
+        project_name = state_path.parent.parent.name
+        if state_manager.get_state_db_path() and state_manager.get_state_path(project_name).resolve() == state_path:
+            state_manager.update_state(project_name, _set_fields(sys.argv[2:]))
+        else:
+            update(state_path, _set_fields(sys.argv[2:]))
+    except FileNotFoundError as e:
+        print(f"HATA: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Streaming File Extractor
+LLM çıktısı akarken `### FILE:` başlıklarını ve kod bloklarını ayrıştırır
+
+Her dosyanın kapanış fence'i geldiği anda on_file çağrılır; böylece
+ilk dosya yanıt bitmeden diske yazılır ve yarıda kesilen bir stream'de
+tamamlanmış dosyalar kaybolmaz. Format DevAgent full moduyla aynıdır:
+
+    ### FILE: src/app.py
+    ```python
+    ...
+    ```
+"""
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+
+_HEADER_RE = re.compile(r'^###\s*FILE:\s*(.+?)\s*$')
+_OPEN_FENCE_RE = re.compile(r'^```[\w+-]*\s*$')
+
+
+class StreamingFileExtractor:
+    """Satır bazlı durum makinesi: başlık -> açılış fence -> içerik -> kapanış fence"""
+
+    def __init__(self, on_file: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            on_file: callable(relative_path, content); dosya tamamlanınca çağrılır
+        """
+        self.on_file = on_file
+        self.files: List[Tuple[str, str]] = []
+        self._buffer = ''
+        self._path = None
+        self._lines = None  # None: fence henüz açılmadı
+
+    def feed(self, chunk: str):
+        """Yeni token parçasını işle (tamamlanan satırlar hemen ayrıştırılır)"""
+        self._buffer += chunk
+        while True:
+            newline = self._buffer.find('\n')
+            if newline == -1:
+                return
+            line = self._buffer[:newline]
+            self._buffer = self._buffer[newline + 1:]
+            self._line(line)
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Stream bitti: kalan yarım satırı işle, tamamlanan dosyaları döndür"""
+        if self._buffer:
+            line, self._buffer = self._buffer, ''
+            self._line(line)
+        return self.files
+
+    @property
+    def pending_path(self) -> Optional[str]:
+        """Şu an yazılmakta olan (henüz kapanmamış) dosya"""
+        return self._path
+
+    def _line(self, line: str):
+        stripped = line.rstrip('\r')
+
+        if self._path is None:
+            header = _HEADER_RE.match(stripped)
+            if header:
+                self._path = header.group(1).strip().strip('`')
+                self._lines = None
+            return
+
+        if self._lines is None:
+            if _OPEN_FENCE_RE.match(stripped.strip()):
+                self._lines = []
+                return
+            header = _HEADER_RE.match(stripped)
+            if header:
+                # Kod bloğu olmayan başlık; yenisiyle değiştir
+                self._path = header.group(1).strip().strip('`')
+            elif stripped.strip():
+                # Başlıktan sonra fence yerine metin geldi: bu başlığı bırak
+                self._path = None
+            return
+
+        if stripped.strip() == '```':
+            path, content = self._path, '\n'.join(self._lines).strip()
+            self._path = None
+            self._lines = None
+            self.files.append((path, content))
+            if self.on_file:
+                self.on_file(path, content)
+            return
+
+        self._lines.append(stripped)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Syntax Checker
+Python dosyalarını süreç içinde derleyerek sözdizimi kontrolü
+
+Dosya başına `python3 -m py_compile` alt süreci yerine compile()
+kullanılır; çok dosyada iş bir ProcessPool'a dağıtılır. Sonuçlar içerik
+hash'i ile <proje>/state/syntax_cache.json içinde tutulur, değişmeyen
+dosyalar tekrar derlenmez.
+
+Pool 'forkserver' ile başlatılır: checker web'in çok thread'li sürecinde
+(job kuyruğu worker'ı) çalışır, fork ile kilitler kopyalanıp kilitlenebilir.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+
+CACHE_FILENAME = 'syntax_cache.json'
+
+# Bundan az derlenecek dosya varsa pool açmaya değmez
+POOL_THRESHOLD = 16
+
+# Derleme kuralları Python sürümüne bağlı; sürüm değişince cache geçersiz
+CACHE_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _error(e: Exception, message: str = None) -> dict:
+    return {'ok': False, 'error': {
+        'type': type(e).__name__, 'message': message or str(e), 'line': None, 'col': None, 'text': ''
+    }}
+
+
+def check_source(path: str, source: Union[str, bytes]) -> dict:
+    """
+    Tek dosyayı derle
+
+    bytes verilirse kodlama compile()'a bırakılır (PEP 263 coding satırı;
+    yoksa UTF-8 olmayan içerik SyntaxError olur).
+
+    Returns:
+        {'ok': bool, 'error': None | {'type', 'message', 'line', 'col', 'text'}}
+    """
+    try:
+        compile(source, path, 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return {'ok': False, 'error': {
+            'type': type(e).__name__,
+            'message': e.msg,
+            'line': e.lineno,
+            'col': e.offset,
+            'text': (e.text or '').rstrip('\n')[:200]
+        }}
+    except ValueError as e:
+        # "source code string cannot contain null bytes"
+        return _error(e)
+    except (RecursionError, MemoryError) as e:
+        # Aşırı iç içe ifadeler derleyicinin yığınını / belleğini tüketir
+        return _error(e, str(e) or 'source too deeply nested or too large to compile')
+    return {'ok': True, 'error': None}
+
+
+def _pool_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _check_item(item: Tuple[str, Union[str, bytes]]) -> dict:
+    path, source = item
+    started = time.perf_counter()
+    outcome = check_source(path, source)
+    outcome['duration'] = round(time.perf_counter() - started, 4)
+    return outcome
+
+
+def _load_cache(cache_path: Path) -> dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('results', {})
+
+
+def _save_cache(cache_path: Path, results: dict):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'results': results}, f)
+    os.replace(tmp_path, cache_path)
+
+
+def check_files(files: List[Tuple[str, str]], cache_path: Optional[Path] = None,
+                max_workers: Optional[int] = None) -> List[dict]:
+    """
+    Dosyaları (gerekirse paralel) derle
+
+    Args:
+        files: [(relative_path, content: str | bytes), ...]
+        cache_path: Hash -> sonuç cache dosyası (None: cache yok)
+        max_workers: ProcessPool boyutu (None: CPU sayısı)
+
+    Returns:
+        [{'path', 'ok', 'error', 'cached', 'duration'}, ...] giriş sırasıyla
+        (cache'ten gelenlerde duration 0)
+    """
+    cache = _load_cache(cache_path) if cache_path else {}
+    hashes = [content_hash(content) for _, content in files]
+
+    pending = [(i, files[i]) for i, h in enumerate(hashes) if h not in cache]
+    fresh = {}
+    if len(pending) >= POOL_THRESHOLD and (max_workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context()) as pool:
+            chunksize = max(1, len(pending) // ((max_workers or os.cpu_count() or 1) * 4))
+            outcomes = pool.map(_check_item, [item for _, item in pending], chunksize=chunksize)
+            for (i, _), outcome in zip(pending, outcomes):
+                fresh[hashes[i]] = outcome
+    else:
+        for i, item in pending:
+            fresh[hashes[i]] = _check_item(item)
+
+    results = []
+    for (path, _), h in zip(files, hashes):
+        outcome = fresh.get(h) or cache[h]
+        cached = h not in fresh
+        results.append({
+            'path': path,
+            'ok': outcome['ok'],
+            'error': outcome['error'],
+            'cached': cached,
+            'duration': 0.0 if cached else outcome.get('duration', 0.0)
+        })
+
+    if cache_path is not None and (fresh or set(cache) - set(hashes)):
+        # Sadece güncel dosyaların sonuçları tutulur
+        current = {h: fresh.get(h) or cache[h] for h in hashes}
+        _save_cache(cache_path, current)
+
+    return results
+
+
+def format_error(error: dict) -> str:
+    """'SyntaxError: invalid syntax (line 3, col 7)'"""
+    if not error:
+        return ''
+    location = ''
+    if error.get('line') is not None:
+        location = f" (line {error['line']}"
+        location += f", col {error['col']})" if error.get('col') is not None else ")"
+    return f"{error['type']}: {error['message']}{location}"
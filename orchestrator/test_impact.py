@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Test Impact Cache
+Spec testlerini sadece etkilendikleri kod değiştiğinde tekrar çalıştırır
+
+Her test için anahtar = hash(spec metni + dokunduğu dosyaların hash'leri).
+Dokunulan dosyalar:
+  - Command / Input içinde geçen src/ dosyaları (path, dosya ya da modül adı)
+  - Bunların import ettiği src/ modülleri (transitif)
+  - Command'da geçen tests/ altındaki dosyalar
+Şu durumlarda test tüm src/'ye dokunmuş sayılır (import'u izlenemez):
+  - Hiçbir src/ dosyası tespit edilemezse
+  - Tespit edilen dosyalardan biri .py değilse (node src/app.js, config.json)
+  - Dokunulan .py kodu dosya okuyorsa ve src/'de .py olmayan dosya varsa
+  - Dokunulan .py dosyasının içeriği snapshot'ta yoksa (büyük / binary)
+
+Sonuçlar <proje>/state/test_cache.json içinde tutulur. Zaman aşımı ve
+çalıştırma hataları cache'lenmez. AI_FACTORY_TEST_FULL_RUN=1 (ya da
+orchestrator --full-run, web'den full_run) ile cache yok sayılır ve her
+şey çalışır.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+CACHE_VERSION = 1
+CACHE_FILENAME = 'test_cache.json'
+
+# Sadece bu sonuçlar tekrar kullanılabilir (timeout/error geçici olabilir)
+CACHEABLE_STATUSES = ('passed', 'failed')
+
+_IMPORT_RE = re.compile(r'^\s*(?:from\s+(\.*[\w.]*)\s+)?import\s+\(?([\w., \t]+)', re.MULTILINE)
+_PATH_TOKEN_RE = re.compile(r'(?:\./)?(tests/[\w./-]+)')
+# src/ içindeki veri dosyalarını okuyabilecek çağrılar
+_FILE_READ_RE = re.compile(r'\bopen\(|\.read_(?:text|bytes)\(|\b(?:listdir|scandir|walk|glob|iterdir)\(|__file__|importlib\.resources|pkgutil\.get_data')
+
+
+def is_full_run() -> bool:
+    return os.environ.get('AI_FACTORY_TEST_FULL_RUN', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def _module_names(relative_path: str) -> List[str]:
+    """src/pkg/mod.py -> ['pkg.mod'] ; src/pkg/__init__.py -> ['pkg'] (PYTHONPATH=src)"""
+    path = Path(relative_path)
+    if path.suffix != '.py' or not path.parts or path.parts[0] != 'src':
+        return []
+    parts = list(path.with_suffix('').parts[1:])
+    if parts and parts[-1] == '__init__':
+        parts = parts[:-1]
+    return ['.'.join(parts)] if parts else []
+
+
+def _mentions(relative_path: str, modules: Dict[str, str], text: str) -> bool:
+    path = Path(relative_path)
+    candidates = [relative_path, str(Path(*path.parts[1:])) if len(path.parts) > 1 else relative_path]
+    if path.name != '__init__.py':
+        candidates.append(path.name)
+    if any(c in text for c in candidates):
+        return True
+    # python3 -m pkg.mod / modül adı (kısa adlar yanlış eşleşmesin)
+    return any(len(name) >= 4 and re.search(rf'\b{re.escape(name)}\b', text)
+               for name, target in modules.items() if target == relative_path)
+
+
+def _imports(content: str) -> List[str]:
+    """İmport edilen modül adayları ('from pkg import util' -> pkg, pkg.util)"""
+    names = []
+    for from_name, import_names in _IMPORT_RE.findall(content):
+        imported = [n.split(' as ')[0].strip() for n in import_names.split(',')]
+        if from_name:
+            base = from_name.lstrip('.')
+            names.append(base)
+            names.extend(f"{base}.{n}" if base else n for n in imported)
+        else:
+            names.extend(imported)
+    return [n for n in names if n]
+
+
+def touched_files(spec: dict, contents: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Testin dokunduğu src/ dosyaları
+
+    Args:
+        contents: {relative_path: içerik | None (binary / büyük dosya)}
+    """
+    modules = {}
+    for path in contents:
+        for name in _module_names(path):
+            modules[name] = path
+            # from pkg import mod / import mod (alt paket kökü src'de değilse)
+            modules.setdefault(name.rsplit('.', 1)[-1], path)
+
+    text = f"{spec.get('command') or ''}\n{spec.get('input') or ''}"
+    seeds = [path for path in contents if _mentions(path, modules, text)]
+    if not seeds or any(not path.endswith('.py') for path in seeds):
+        return sorted(contents)
+
+    touched = set()
+    stack = list(seeds)
+    has_data_files = any(not path.endswith('.py') and Path(path).name != '.gitkeep' for path in contents)
+    while stack:
+        path = stack.pop()
+        if path in touched:
+            continue
+        touched.add(path)
+        content = contents.get(path)
+        if content is None or (has_data_files and _FILE_READ_RE.search(content)):
+            return sorted(contents)
+        for name in _imports(content):
+            # 'pkg.mod.func' gibi: en uzun eşleşen modül
+            parts = name.split('.')
+            for end in range(len(parts), 0, -1):
+                target = modules.get('.'.join(parts[:end]))
+                if target:
+                    stack.append(target)
+                    break
+    return sorted(touched)
+
+
+def _spec_fingerprint(spec: dict) -> str:
+    """Testin çalışmasını etkileyen alanlar (başlık numarası ve adı hariç)"""
+    return json.dumps([spec.get('command'), spec.get('input'), spec.get('expected'), spec.get('timeout'),
+                       spec.get('expected_exit'), spec.get('memory_mb')])
+
+
+def impact_key(spec: dict, touched: List[str], hashes: Dict[str, str], project_path: Path) -> str:
+    digest = hashlib.sha256(_spec_fingerprint(spec).encode('utf-8'))
+    for path in touched:
+        digest.update(f"\0{path}\0{hashes.get(path, '')}".encode('utf-8'))
+
+    # Command'da geçen tests/ dosyaları (src snapshot'ında değiller)
+    for relative in sorted(set(_PATH_TOKEN_RE.findall(spec.get('command') or ''))):
+        try:
+            data = (Path(project_path) / relative).read_bytes()
+        except OSError:
+            data = b''
+        digest.update(f"\0{relative}\0".encode('utf-8') + hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def load_cache(cache_path: Path) -> dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('results', {})
+
+
+def save_cache(cache_path: Path, results: dict):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'results': results}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def plan(specs: List[dict], contents: Dict[str, Optional[str]], hashes: Dict[str, str],
+         project_path: Path, cache: dict, full_run: bool = False) -> List[dict]:
+    """
+    Hangi testlerin çalışacağını belirle
+
+    Returns:
+        [{'spec', 'key', 'touched', 'cached': önceki sonuç | None}, ...] giriş sırasıyla
+    """
+    items = []
+    for spec in specs:
+        touched = touched_files(spec, contents) if spec.get('command') else []
+        key = impact_key(spec, touched, hashes, project_path)
+        previous = None if full_run else cache.get(key)
+        if previous is not None:
+            # Numara / ad değişmiş olabilir
+            previous = dict(previous, id=spec['id'], name=spec['name'])
+        items.append({'spec': spec, 'key': key, 'touched': touched, 'cached': previous})
+    return items
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Test Results Store
+TestAgent koşularının makine tarafından okunabilir kaydı
+
+    reports/test_results.json    Son koşu (tam kayıt)
+    reports/test_history.jsonl   Koşu başına bir satır (özet, en yeni sonda)
+    reports/test_results.md      İnsan için rapor (JSON'dan üretilir)
+
+Koşu kaydı:
+    {
+        'run_id', 'project', 'model', 'started_at', 'finished_at', 'duration',
+        'summary': {'total', 'passed', 'failed', 'skipped', 'pass_rate'},
+        'tests': [{'id', 'kind', 'name', 'target', 'status', 'duration',
+                   'message', 'cached', ...}, ...]
+    }
+    kind: 'syntax' | 'spec';  status: passed | failed | timeout | error | skipped
+
+Web tarafı markdown'u ayrıştırmak yerine bu dosyaları okur.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+
+RESULTS_FILE = 'reports/test_results.json'
+HISTORY_FILE = 'reports/test_history.jsonl'
+
+FAILED_STATUSES = ('failed', 'timeout', 'error')
+
+
+def summarize(tests: List[dict]) -> dict:
+    """Skipped testler pass rate'e girmez"""
+    passed = sum(1 for t in tests if t['status'] == 'passed')
+    failed = sum(1 for t in tests if t['status'] in FAILED_STATUSES)
+    skipped = sum(1 for t in tests if t['status'] == 'skipped')
+    total = passed + failed
+    return {
+        'total': total,
+        'passed': passed,
+        'failed': failed,
+        'skipped': skipped,
+        'pass_rate': passed / total if total else 0.0
+    }
+
+
+def new_run(project: str, model: Optional[str], started_at: datetime, tests: List[dict]) -> dict:
+    finished_at = datetime.now()
+    return {
+        'run_id': uuid.uuid4().hex[:12],
+        'project': project,
+        'model': model,
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'finished_at': finished_at.isoformat(timespec='seconds'),
+        'duration': round((finished_at - started_at).total_seconds(), 3),
+        'summary': summarize(tests),
+        'tests': tests
+    }
+
+
+def render_markdown(run: dict) -> str:
+    """reports/test_results.md içeriği"""
+    started = datetime.fromisoformat(run['started_at'])
+    lines = [
+        "# Test Results\n",
+        f"Project: {run['project']}\n",
+        f"Date: {started.strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+    ]
+
+    spec_header_written = False
+    for test in run['tests']:
+        if test['kind'] == 'spec' and not spec_header_written:
+            lines.append("\n## Spec Tests\n")
+            spec_header_written = True
+
+        label = test['target'] if test['kind'] == 'syntax' else f"{test['id']}: {test['name']}"
+        if test['status'] == 'passed':
+            if test['kind'] == 'syntax':
+                lines.append(f"✅ PASS: {label} - Syntax OK\n")
+            else:
+                suffix = 'cached' if test.get('cached') else f"{test['duration']:.2f}s"
+                lines.append(f"✅ PASS: {label} ({suffix})\n")
+        elif test['status'] == 'skipped':
+            lines.append(f"⏭️ SKIP: {label} - {test['message']}\n")
+        elif test['status'] == 'timeout':
+            lines.append(f"⚠️ TIMEOUT: {label} - {test['message']}\n")
+        elif test['kind'] == 'syntax':
+            lines.append(f"❌ FAIL: {label} - Syntax Error\n")
+            lines.append(f"   Error: {test['message']}\n")
+            if test.get('source_line'):
+                lines.append(f"   > {test['source_line']}\n")
+        else:
+            cached = ' (cached)' if test.get('cached') else ''
+            lines.append(f"❌ FAIL: {label} - {test['message']}{cached}\n")
+            lines.append(f"   Command: {test['target']}\n")
+            if test.get('output'):
+                lines.append(f"   Output: {test['output'][-300:]}\n")
+
+    summary = run['summary']
+    lines.append("\n## Summary\n")
+    lines.append(f"- Total: {summary['total']}\n")
+    lines.append(f"- Passed: {summary['passed']}\n")
+    lines.append(f"- Failed: {summary['failed']}\n")
+    if summary['skipped']:
+        lines.append(f"- Skipped: {summary['skipped']}\n")
+    if summary['total'] > 0:
+        lines.append(f"- Pass Rate: {summary['pass_rate']:.1%}\n")
+    return "".join(lines)
+
+
+def append_history(project_path: Path, run: dict):
+    """Koşu özetini history'ye ekle (tek satır, O_APPEND ile atomik)"""
+    record = {key: run[key] for key in ('run_id', 'model', 'started_at', 'finished_at', 'duration', 'summary')}
+    record['failed_tests'] = [t['id'] for t in run['tests'] if t['status'] in FAILED_STATUSES]
+    path = Path(project_path) / HISTORY_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def load_latest(project_path) -> Optional[dict]:
+    """Son koşu (yoksa None)"""
+    try:
+        with open(Path(project_path) / RESULTS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_history(project_path, limit: int = 50) -> List[dict]:
+    """Son `limit` koşunun özeti (yeniden eskiye)"""
+    path = Path(project_path) / HISTORY_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+
+    history = []
+    for line in reversed(lines):
+        try:
+            history.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+        if len(history) >= limit:
+            break
+    return history
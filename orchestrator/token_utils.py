@@ -1,21 +1,214 @@
 #!/usr/bin/env python3
 """
 AI Factory - Token Utilities
-Token tahminleme ve context kontrolü
+Token sayımı ve context kontrolü
+
+Sayım model ailesine göre seçilen tokenizer ile yapılır:
+  - Gerçek tokenizer (offline): OpenAI modelleri için tiktoken (kuruluysa),
+    diğer aileler için config/tokenizers/<aile>.json (HuggingFace
+    `tokenizers` kuruluysa)
+  - Yoksa: aileye göre kalibre edilmiş sezgisel sayım (Türkçe/ASCII
+    kelimeler, sayılar, semboller ve girinti ayrı ağırlıklandırılır)
+
+Metin satır sınırlarında parçalara bölünür ve parça başına sayım
+memoize edilir; aynı PRP/src içeriği tekrar sayılmaz.
 """
 
+import math
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Optional
+
+
+TOKENIZERS_DIR = Path(__file__).parent.parent / 'config' / 'tokenizers'
+
+# Memoize edilen parça boyutu (karakter, satır sınırına yuvarlanır)
+CHUNK_CHARS = 2048
+
+# Provider önekinden aile ('anthropic/claude-sonnet-4.5' -> 'claude')
+PROVIDER_FAMILIES = {
+    'openai': 'openai',
+    'anthropic': 'claude',
+    'meta-llama': 'llama',
+    'mistralai': 'mistral',
+    'qwen': 'qwen',
+}
+
+# (aile, model adı regex'i) - ilk eşleşen kazanır. Kısa adlar (o1, o3 ...)
+# sadece adın başında ve ayraçla biter ('o1-mini'); 'llama-3-70b-o1' gibi
+# adlar yanlış aileye düşmez.
+MODEL_FAMILIES = [
+    ('openai', re.compile(r'^(?:gpt-|gpt4o?(?:$|[-:])|chatgpt-|text-embedding-|o\d+(?:$|[-:.]))')),
+    ('claude', re.compile(r'claude')),
+    ('gemma', re.compile(r'gemma')),
+    ('llama', re.compile(r'llama')),
+    ('mistral', re.compile(r'mistral|mixtral|codestral')),
+    ('qwen', re.compile(r'qwen')),
+]
+
+# Sezgisel sayım: ailenin kelime başına ortalama karakteri ve güvenlik çarpanı
+# (büyük vocab'lı aileler daha az token üretir)
+HEURISTIC_PROFILES = {
+    'openai': {'ascii_chars': 4.6, 'other_chars': 2.8, 'margin': 1.05},
+    'claude': {'ascii_chars': 4.0, 'other_chars': 2.2, 'margin': 1.10},
+    'gemma': {'ascii_chars': 4.8, 'other_chars': 3.0, 'margin': 1.05},
+    'llama': {'ascii_chars': 4.4, 'other_chars': 2.5, 'margin': 1.10},
+    'mistral': {'ascii_chars': 4.0, 'other_chars': 2.2, 'margin': 1.10},
+    'qwen': {'ascii_chars': 4.4, 'other_chars': 2.5, 'margin': 1.10},
+    'default': {'ascii_chars': 4.0, 'other_chars': 2.2, 'margin': 1.15},
+}
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|[^\W\d_]+|\d+| ?\n[ \t]*|[ \t]+|[^\w\s]+")
+
+
+# ============================================
+# TOKENIZER REGISTRY
+# ============================================
 
-def estimate_tokens(text: str) -> int:
+_registry = {}
+_loaded = {}
+_lock = threading.Lock()
+
+
+def register_tokenizer(family: str, factory: Callable[[], Optional[Callable[[str], int]]]):
     """
-    Basit token tahminleme
+    Bir model ailesi için tokenizer kaydet
     
-    Ortalama: 1 token ≈ 4 karakter (İngilizce için)
-    Türkçe ve kod için biraz daha yüksek olabilir
-    Güvenlik marjı için 3.5 kullanıyoruz
+    Args:
+        family: Aile adı (MODEL_FAMILIES içindeki ya da yeni bir ad)
+        factory: Argümansız; `count(text) -> int` döndürür. Tokenizer
+                 yüklenemezse None döner ve sezgisel sayım kullanılır.
+    """
+    with _lock:
+        _registry[family] = factory
+        _loaded.pop(family, None)
+    _count_chunk.cache_clear()
+
+
+def get_model_family(model: Optional[str]) -> str:
+    """Model adından tokenizer ailesi ('google/gemma-3-27b-it:free' -> 'gemma')"""
+    if not model:
+        return 'default'
+    provider, _, name = model.lower().rpartition('/')
+    if provider in PROVIDER_FAMILIES:
+        return PROVIDER_FAMILIES[provider]
+    for family, pattern in MODEL_FAMILIES:
+        if pattern.search(name):
+            return family
+    return 'default'
+
+
+def get_tokenizer(family: str) -> Optional[Callable[[str], int]]:
+    """Ailenin gerçek tokenizer'ı (yoksa / yüklenemezse None)"""
+    with _lock:
+        if family in _loaded:
+            return _loaded[family]
+        factory = _registry.get(family)
+        try:
+            counter = factory() if factory else _hf_file_factory(family)
+        except Exception as e:
+            print(f"⚠️ Tokenizer '{family}' could not be loaded, using heuristic: {e}", flush=True)
+            counter = None
+        _loaded[family] = counter
+        return counter
+
+
+def _tiktoken_factory(encoding_name: str):
+    def factory():
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    return factory
+
+
+def _hf_file_factory(family: str):
+    """config/tokenizers/<aile>.json (HuggingFace tokenizers formatı)"""
+    path = TOKENIZERS_DIR / f'{family}.json'
+    if not path.exists():
+        return None
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        return None
+    tokenizer = Tokenizer.from_file(str(path))
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def _openai_factory():
+    # Lokal tokenizer dosyası tiktoken'dan önce gelir
+    return _hf_file_factory('openai') or _tiktoken_factory('o200k_base')()
+
+
+_registry['openai'] = _openai_factory
+
+
+# ============================================
+# COUNTING
+# ============================================
+
+def _heuristic_count(text: str, family: str) -> int:
+    """Tokenizer yokken sezgisel sayım"""
+    profile = HEURISTIC_PROFILES.get(family, HEURISTIC_PROFILES['default'])
+    total = 0.0
+    for piece in _PIECE_RE.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            total += max(1.0, len(piece) / profile['ascii_chars'])
+        elif first.isalpha():
+            # Türkçe ekler / ASCII dışı harfler daha fazla parçaya bölünür
+            total += max(1.0, len(piece) / profile['other_chars'])
+        elif first.isdigit():
+            total += math.ceil(len(piece) / 3)
+        elif first in ' \t\n':
+            # Tek boşluk sonraki kelimeyle birleşir; girinti ayrıca sayılır
+            stripped = piece.strip(' ')
+            if stripped or len(piece) > 1:
+                total += max(1.0, len(piece.replace('\n', '')) / 4)
+        else:
+            # Yan yana semboller (`"):`, `=>`) genelde birleşir
+            total += max(1.0, len(piece) / 2)
+    return int(math.ceil(total * profile['margin']))
+
+
+@lru_cache(maxsize=8192)
+def _count_chunk(chunk: str, family: str) -> int:
+    counter = get_tokenizer(family)
+    if counter is not None:
+        return counter(chunk)
+    return _heuristic_count(chunk, family)
+
+
+def _chunks(text: str):
+    """Metni satır sınırlarında ~CHUNK_CHARS'lık parçalara böl"""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + CHUNK_CHARS
+        if end < length:
+            newline = text.rfind('\n', start, end)
+            if newline > start:
+                end = newline + 1
+        yield text[start:end]
+        start = end
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Metnin token sayısı
+
+    Args:
+        text: Sayılacak metin
+        model: Model adı (tokenizer ailesini belirler; None = varsayılan)
     """
     if not text:
         return 0
-    return int(len(text) / 3.5)
+    family = get_model_family(model)
+    return sum(_count_chunk(chunk, family) for chunk in _chunks(text))
 
 
 def check_context_limit(prompt: str, config: dict) -> dict:
@@ -32,7 +225,7 @@ def check_context_limit(prompt: str, config: dict) -> dict:
             'warning': str or None
         }
     """
-    prompt_tokens = estimate_tokens(prompt)
+    prompt_tokens = estimate_tokens(prompt, config.get('model'))
     max_context = config.get('max_context_tokens', 8192)
     max_output = config.get('max_output_tokens', 2048)
     
@@ -58,15 +251,28 @@ def check_context_limit(prompt: str, config: dict) -> dict:
     return result
 
 
-def truncate_to_token_limit(text: str, max_tokens: int) -> str:
+TRUNCATION_MARKER = "\n\n[... truncated ...]"
+
+
+def truncate_to_token_limit(text: str, max_tokens: int, model: Optional[str] = None) -> str:
     """
     Metni token limitine göre kes
-    Sondan keser, başlangıcı korur
+    Sondan keser, başlangıcı korur (işaret dahil limite sığar)
     """
-    estimated = estimate_tokens(text)
-    if estimated <= max_tokens:
+    if estimate_tokens(text, model) <= max_tokens:
         return text
     
-    # Yaklaşık karakter sayısı
-    target_chars = int(max_tokens * 3.5)
-    return text[:target_chars] + "\n\n[... truncated ...]"
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARKER, model)
+    if budget <= 0:
+        return ''
+
+    # Sığan en uzun önek (binary search)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid], model) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+
+    return text[:low] + TRUNCATION_MARKER
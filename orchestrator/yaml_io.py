@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+AI Factory - YAML I/O
+Tüm YAML okuma / yazma için ortak katman
+
+  - libyaml (C) varsa CSafeLoader / CSafeDumper, yoksa saf Python
+    SafeLoader / SafeDumper; çıktı ve sözleşme aynı
+  - Opsiyonel JSON sidecar cache: ayrıştırılmış içerik
+    runtime/yaml_cache/ altında, kaynak dosyanın (mtime_ns, size, inode)
+    imzasıyla tutulur. İmza tutmazsa YAML tekrar okunur; atomik yazmalar
+    (os.replace) inode'u değiştirdiği için aynı ns'ye düşen yazmalar da
+    yakalanır. config/storage.yaml: yaml_sidecar_cache (varsayılan kapalı),
+    AI_FACTORY_YAML_SIDECAR=0/1 ile ezilebilir.
+
+JSON'a birebir çevrilemeyen içerik (str olmayan anahtarlar, set, binary)
+için sidecar yazılmaz; datetime / date etiketlenerek saklanır.
+"""
+
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+LIBYAML = Loader is not yaml.SafeLoader
+
+SIDECAR_VERSION = 1
+_TAG = '__yaml__'
+
+
+def safe_load(stream):
+    """yaml.safe_load yerine"""
+    return yaml.load(stream, Loader=Loader)
+
+
+def dump(data, stream=None, **kwargs):
+    """yaml.dump yerine (repo genelindeki biçim: blok stil, unicode, sıra korunur)"""
+    options = {'default_flow_style': False, 'allow_unicode': True, 'sort_keys': False}
+    options.update(kwargs)
+    return yaml.dump(data, stream, Dumper=Dumper, **options)
+
+
+def sidecar_enabled() -> bool:
+    override = os.environ.get('AI_FACTORY_YAML_SIDECAR')
+    if override is not None:
+        return override.lower() in ('1', 'true', 'yes', 'on')
+    # config_loader bu modülü import ediyor; döngüye girmemek için geç import
+    from config_loader import load_storage_config
+    return bool(load_storage_config().get('yaml_sidecar_cache'))
+
+
+def _sidecar_path(file_path: Path) -> Path:
+    from config_loader import get_control_plane_path
+    digest = hashlib.sha1(str(Path(file_path).resolve()).encode('utf-8')).hexdigest()[:20]
+    return get_control_plane_path() / 'runtime' / 'yaml_cache' / f"{digest}.json"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _to_json(value):
+    """YAML değeri -> JSON uyumlu değer (birebir geri dönmüyorsa _Unsupported)"""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise _Unsupported()
+        if _TAG in value:
+            raise _Unsupported()
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_json(v) for v in value]
+    if isinstance(value, datetime):
+        return {_TAG: 'datetime', 'value': value.isoformat()}
+    if isinstance(value, date):
+        return {_TAG: 'date', 'value': value.isoformat()}
+    raise _Unsupported()
+
+
+def _from_json(obj: dict):
+    kind = obj.get(_TAG)
+    if kind == 'datetime':
+        return datetime.fromisoformat(obj['value'])
+    if kind == 'date':
+        return date.fromisoformat(obj['value'])
+    return obj
+
+
+def _signature(file_path: Path) -> Optional[list]:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def _read_sidecar(sidecar: Path, signature: list):
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            meta = json.loads(header)
+            if meta.get('version') != SIDECAR_VERSION or meta.get('signature') != signature:
+                return None
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    return json.loads(body, object_hook=_from_json if meta.get('tagged') else None)
+
+
+def _write_sidecar(sidecar: Path, signature: list, data):
+    try:
+        encoded = _to_json(data)
+    except (_Unsupported, RecursionError):
+        return
+    body = json.dumps(encoded, ensure_ascii=False, separators=(',', ':'))
+    meta = {'version': SIDECAR_VERSION, 'signature': signature, 'tagged': f'"{_TAG}"' in body}
+    try:
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = sidecar.with_name(f".{sidecar.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(meta) + '\n' + body)
+        os.replace(tmp_path, sidecar)
+    except OSError:
+        # Cache yazılamaması okumayı bozmaz
+        pass
+
+
+def load_file(file_path: Path, sidecar: Optional[bool] = None):
+    """
+    YAML dosyasını oku
+
+    Args:
+        sidecar: JSON sidecar cache kullan (None: sidecar_enabled())
+
+    Returns:
+        Ayrıştırılmış içerik (boş dosya: None)
+
+    Raises:
+        FileNotFoundError: Dosya yok
+    """
+    file_path = Path(file_path)
+    if sidecar is None:
+        sidecar = sidecar_enabled()
+    if not sidecar:
+        with open(file_path, 'rb') as f:
+            return safe_load(f)
+
+    signature = _signature(file_path)
+    if signature is None:
+        raise FileNotFoundError(f"No such file: {file_path}")
+    sidecar_path = _sidecar_path(file_path)
+    cached = _read_sidecar(sidecar_path, signature)
+    if cached is not None:
+        return cached
+
+    with open(file_path, 'rb') as f:
+        data = safe_load(f)
+    # Okuma sırasında dosya değiştiyse imza eski içerikle eşleşmesin
+    if data is not None and _signature(file_path) == signature:
+        _write_sidecar(sidecar_path, signature, data)
+    return data
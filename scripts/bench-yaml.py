@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+AI Factory - YAML Benchmark
+Saf Python YAML, libyaml (yaml_io) ve JSON sidecar cache karşılaştırması
+
+Geçici dizinde N projelik registry + proje başına state.yaml üretir ve
+okuma / yazma sürelerini ölçer. Gerçek dosyalara dokunmaz.
+
+Kullanım:
+    python3 scripts/bench-yaml.py [--projects 1000] [--rounds 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'orchestrator'))
+import yaml_io  # noqa: E402
+
+
+def make_state(i: int) -> dict:
+    return {
+        'project': {'name': f'product-bench-{i:04d}', 'created_at': '2026-01-16T10:00:00Z'},
+        'phase': 'development',
+        'state_revision': i,
+        'version': {'prp': '1.0', 'code': '0.3', 'tests': '0.2'},
+        'llm': {'profile': 'default', 'agents': {a: 'default' for a in ('prp', 'dev', 'test', 'feedback')}},
+        'last_event': {'agent': 'dev', 'action': 'generate_code', 'result': 'success',
+                       'timestamp': '2026-01-16T10:05:00Z', 'model': 'gpt-4o-mini'},
+        'blocking': {'is_blocked': False, 'reason': None},
+        'deployment': {'status': 'deployed' if i % 10 == 0 else 'stopped', 'port': 5001 + i % 10,
+                       'url': None, 'started_at': None},
+        'test_results': {'pass_rate': 0.85, 'total': 20, 'passed': 17, 'failed': 3},
+        'history': [{'phase': p, 'at': '2026-01-16'} for p in ('idea', 'prp', 'development')],
+    }
+
+
+def timed(fn, rounds: int) -> float:
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='YAML I/O benchmark')
+    parser.add_argument('--projects', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        registry = {'projects': [{'id': f'product-bench-{i:04d}', 'repo': f'https://github.com/x/product-bench-{i:04d}',
+                                  'phase': 'development', 'created_at': '2026-01-16'} for i in range(args.projects)]}
+        registry_path = root / 'projects.yaml'
+        with open(registry_path, 'w', encoding='utf-8') as f:
+            yaml_io.dump(registry, f)
+
+        states = [make_state(i) for i in range(args.projects)]
+        state_paths = []
+        for i, state in enumerate(states):
+            path = root / f'state-{i:04d}.yaml'
+            with open(path, 'w', encoding='utf-8') as f:
+                yaml_io.dump(state, f)
+            state_paths.append(path)
+
+        def read_all(load):
+            def run():
+                load(registry_path)
+                for path in state_paths:
+                    load(path)
+            return run
+
+        def pure_load(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f)
+
+        def dump_all(dumper):
+            def run():
+                for state in states:
+                    yaml.dump(state, Dumper=dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+            return run
+
+        # Sidecar'lar geçici kontrol dizinine yazılsın
+        os.environ['AI_FACTORY_YAML_SIDECAR'] = '1'
+        yaml_io._sidecar_path = lambda p: root / 'yaml_cache' / f"{Path(p).name}.json"
+        yaml_io.load_file(registry_path)
+        for path in state_paths:
+            yaml_io.load_file(path)
+
+        rows = [
+            ('read  pure SafeLoader', timed(read_all(pure_load), args.rounds)),
+            (f"read  yaml_io ({'CSafeLoader' if yaml_io.LIBYAML else 'SafeLoader'})",
+             timed(read_all(lambda p: yaml_io.load_file(p, sidecar=False)), args.rounds)),
+            ('read  yaml_io sidecar (warm)', timed(read_all(lambda p: yaml_io.load_file(p, sidecar=True)), args.rounds)),
+            ('dump  pure SafeDumper', timed(dump_all(yaml.SafeDumper), args.rounds)),
+            (f"dump  yaml_io ({yaml_io.Dumper.__name__})", timed(dump_all(yaml_io.Dumper), args.rounds)),
+        ]
+
+    print(f"{args.projects} proje (registry + state.yaml), en iyi {args.rounds} tur")
+    read_base, dump_base = rows[0][1], rows[3][1]
+    for name, seconds in rows:
+        base = dump_base if name.startswith('dump') else read_base
+        print(f"  {name:<36} {seconds * 1000:9.1f} ms   x{base / seconds:5.1f}")
+
+
+if __name__ == '__main__':
+    main()
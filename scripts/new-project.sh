@@ -45,6 +45,7 @@ sed -e "s/__PROJECT_ID__/$PROJECT_NAME/g" \
     "$CONTROL_PLANE_DIR/templates/state.template.yaml" > state/state.yaml
 
 cp "$CONTROL_PLANE_DIR/templates/llm.template.yaml" config/llm.yaml
+cp "$CONTROL_PLANE_DIR/templates/tests.template.yaml" config/tests.yaml
 
 echo "[4/6] Başlangıç dosyaları oluşturuluyor..."
 cat > prp/prp.md << 'EOF'
@@ -93,8 +94,13 @@ cat > .gitignore << 'EOF'
 .DS_Store
 *.log
 *.tmp
+*.lock
 __pycache__/
 .env
+# Orchestrator cache'leri (yeniden üretilebilir)
+state/src_index.json
+state/syntax_cache.json
+state/test_cache.json
 EOF
 
 echo "[5/6] Registry güncelleniyor..."
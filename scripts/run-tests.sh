@@ -14,6 +14,7 @@ else
     PROJECT_NAME="product-$1"
 fi
 PROJECT_DIR="$HOME/projects/$PROJECT_NAME"
+STATE_STORE="$(cd "$(dirname "${BASH_SOURCE[0]}")/../orchestrator" && pwd)/state_store.py"
 TIMESTAMP=$(date -Iseconds)
 DATE=$(date +%Y-%m-%d)
 
@@ -95,7 +96,8 @@ rm "$TEST_OUTPUT"
 
 echo "[3/3] State güncelleniyor..."
 
-sed -i "s/^  test_pass_rate:.*/  test_pass_rate: $PASS_RATE/" state/state.yaml
+# Atomik + kilitli yazma (agent'lar ve web UI ile eşzamanlı güvenli)
+python3 "$STATE_STORE" state/state.yaml "health.test_pass_rate=$PASS_RATE"
 
 echo ""
 echo "=== Tamamlandı ==="
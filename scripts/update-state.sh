@@ -27,6 +27,7 @@ else
     PROJECT_NAME="product-$1"
 fi
 PROJECT_DIR="$HOME/projects/$PROJECT_NAME"
+STATE_STORE="$(cd "$(dirname "${BASH_SOURCE[0]}")/../orchestrator" && pwd)/state_store.py"
 FIELD="$2"
 VALUE="$3"
 TIMESTAMP=$(date -Iseconds)
@@ -45,31 +46,33 @@ echo "Alan: $FIELD"
 echo "Değer: $VALUE"
 echo ""
 
+# Atomik + kilitli yazma (agent'lar ve web UI ile eşzamanlı güvenli)
+set_state() {
+    python3 "$STATE_STORE" "$STATE_FILE" "$@"
+}
+
 case "$FIELD" in
     phase)
-        sed -i "s/^phase:.*/phase: $VALUE/" "$STATE_FILE"
+        set_state "phase=$VALUE"
         ;;
     prp-version)
-        sed -i "s/^  prp:.*/  prp: \"$VALUE\"/" "$STATE_FILE"
+        set_state "version.prp=\"$VALUE\""
         ;;
     code-version)
-        sed -i "s/^  code:.*/  code: \"$VALUE\"/" "$STATE_FILE"
+        set_state "version.code=\"$VALUE\""
         ;;
     docs-version)
-        sed -i "s/^  docs:.*/  docs: \"$VALUE\"/" "$STATE_FILE"
+        set_state "version.docs=\"$VALUE\""
         ;;
     blocked)
         if [ "$VALUE" = "true" ]; then
-            sed -i "s/^  is_blocked:.*/  is_blocked: true/" "$STATE_FILE"
-            sed -i "s/^  since:.*/  since: $TIMESTAMP/" "$STATE_FILE"
+            set_state "blocking.is_blocked=true" "blocking.since=$TIMESTAMP"
         else
-            sed -i "s/^  is_blocked:.*/  is_blocked: false/" "$STATE_FILE"
-            sed -i "s/^  reason:.*/  reason: null/" "$STATE_FILE"
-            sed -i "s/^  since:.*/  since: null/" "$STATE_FILE"
+            set_state "blocking.is_blocked=false" "blocking.reason=null" "blocking.since=null"
         fi
         ;;
     block-reason)
-        sed -i "s/^  reason:.*/  reason: $VALUE/" "$STATE_FILE"
+        set_state "blocking.reason=$VALUE"
         ;;
     *)
         echo "HATA: Bilinmeyen alan: $FIELD"
@@ -4,14 +4,31 @@ AI Factory Manager - Web UI
 Flask application for managing AI Factory projects
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response
-import yaml
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 import os
 import subprocess
 from datetime import datetime
 from functools import wraps
+from pathlib import Path
 import glob
 import json
+import sys
+import time
+
+# Orchestrator modüllerini paylaş (HTTP havuzu vb.)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'orchestrator'))
+from http_pool import get_session
+from llm_cache import get_cache
+import runner as agent_runner
+from config_loader import _load_cached, get_profile_registry, load_yaml
+import event_log
+import state_manager
+import yaml_io
+from test_results import load_history as load_test_history, load_latest as load_latest_test_run
+
+from job_queue import JobQueue
+from project_index import ProjectIndex
+from resource_sampler import ResourceSampler
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -28,6 +45,30 @@ ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'aifactory2026')
 # API Secret for GitHub sync
 API_SECRET = "ai-factory-secret-2026-xK9mP2nQ"
 
+# Agent job kuyruğu - agent'lar Flask worker'ı yerine bu havuzda çalışır
+JOBS_DIR = os.path.join(CONTROL_DIR, 'runtime', 'jobs')
+AGENT_WORKERS = int(os.environ.get('AGENT_WORKERS', '10'))
+job_queue = JobQueue(JOBS_DIR, agent_runner.run_agent, max_workers=AGENT_WORKERS)
+
+# Preview proxy last_activity'yi en fazla bu aralıkla yazar (istek başına state yazması yok)
+ACTIVITY_WRITE_INTERVAL_SECONDS = 60
+_activity_written = {}  # {project_id: time.monotonic()}
+
+# Dashboard için registry + state özetleri; değişiklikler arka planda yoklanır
+project_index = ProjectIndex(REGISTRY_FILE)
+project_index.start()
+
+
+def deployment_targets():
+    """resource_sampler için çalışan deployment'lar ({project_id: deployment özeti})"""
+    return {project['id']: project['state']['deployment'] for project in project_index.snapshot()
+            if project.get('state') and project['state']['deployment']['status'] == 'deployed'}
+
+
+# /proc örnekleri (RAM, load, deployment RSS/CPU) arka planda; ring buffer
+resource_sampler = ResourceSampler(deployment_targets)
+resource_sampler.start()
+
 
 def login_required(f):
     """Login kontrolü için decorator"""
@@ -42,57 +83,53 @@ def login_required(f):
 def load_registry():
     """Registry dosyasını yükle"""
     try:
-        with open(REGISTRY_FILE, 'r') as f:
-            data = yaml.safe_load(f)
-            return data.get('projects', []) if data else []
+        data = yaml_io.load_file(REGISTRY_FILE)
+        return data.get('projects', []) if data else []
     except Exception as e:
         print(f"Error loading registry: {e}")
         return []
 
 
 def load_project_state(project_id):
-    """Proje state dosyasını yükle"""
+    """Proje state'ini yükle (backend: config/storage.yaml)"""
     try:
-        state_file = os.path.join(PROJECTS_DIR, project_id, 'state', 'state.yaml')
-        with open(state_file, 'r') as f:
-            return yaml.safe_load(f)
+        return state_manager.load_state(project_id)
     except Exception as e:
         print(f"Error loading state for {project_id}: {e}")
         return None
 
-def save_project_state(project_id, state):
-    """Save project state"""
-    state_file = os.path.join(PROJECTS_DIR, project_id, 'state', 'state.yaml')
+def update_project_state(project_id, fn):
+    """State'i kilit altında güncelle: fn(güncel state) -> yeni state; kaydedilen state'i döndürür"""
+    state = state_manager.update_state(project_id, fn)
+    project_index.invalidate(project_id)
+    return state
+
+def log_project_event(project_id, event_type, **fields):
+    """Projenin event log'una olay ekle (hata isteği bozmaz)"""
     try:
-        with open(state_file, 'w') as f:
-            yaml.dump(state, f, default_flow_style=False, sort_keys=False)
-        return True
+        event_log.append(os.path.join(PROJECTS_DIR, project_id), event_type, **fields)
     except Exception as e:
-        print(f"Error saving state for {project_id}: {e}", flush=True)
-        return False
+        print(f"Error writing event log for {project_id}: {e}", flush=True)
 
 def get_system_resources():
-    """Sistem kaynak kullanımını al"""
+    """Sistem kaynak kullanımı (resource_sampler'ın son örneği; istek başına süreç açılmaz)"""
     try:
-        # RAM kullanımı
-        mem_info = subprocess.check_output(['free', '-m'], text=True)
-        lines = mem_info.split('\n')
-        mem_line = lines[1].split()
-        total_ram = int(mem_line[1])
-        used_ram = int(mem_line[2])
-
-        # Proje deployment durumları (TODO: gerçek deployment sistemi)
-        service_count = 0
-        ondemand_count = 0
+        sample = resource_sampler.latest()
+        memory = sample['memory']
+        deployments = [d for d in sample['deployments'] if d['alive']]
+        service_count = sum(1 for d in deployments if d['type'] == 'service')
+        max_deployments = load_deployment_config().get('max_concurrent_deployments', 10)
 
         return {
-            'ram_total': total_ram,
-            'ram_used': used_ram,
-            'ram_percent': int((used_ram / total_ram) * 100),
+            'ram_total': memory['total_mb'],
+            'ram_used': memory['used_mb'],
+            'ram_percent': int(memory['percent']),
+            'load': sample['load'],
+            'deployments': deployments,
             'service_count': service_count,
             'service_max': 1,
-            'ondemand_count': ondemand_count,
-            'ondemand_max': 2
+            'ondemand_count': len(deployments) - service_count,
+            'ondemand_max': max_deployments
         }
     except Exception as e:
         print(f"Error getting system resources: {e}")
@@ -100,6 +137,8 @@ def get_system_resources():
             'ram_total': 1024,
             'ram_used': 0,
             'ram_percent': 0,
+            'load': None,
+            'deployments': [],
             'service_count': 0,
             'service_max': 1,
             'ondemand_count': 0,
@@ -121,16 +160,9 @@ Return JSON: {"recommendation": "prp|code", "reasoning": "...", "test_analysis":
 
 
 def load_llm_profile(profile_name='gemma-free'):
-    """LLM profile'ı yükle"""
-    profiles_file = os.path.join(CONTROL_DIR, 'config', 'llm.profiles.yaml')
+    """LLM profile'ı yükle (yoksa default profile; orchestrator ile aynı çözümleme)"""
     try:
-        with open(profiles_file, 'r') as f:
-            profiles_data = yaml.safe_load(f)
-            profile = profiles_data['profiles'].get(profile_name)
-            if not profile:
-                profile_name = profiles_data.get('default_profile', 'gemma-free')
-                profile = profiles_data['profiles'].get(profile_name)
-            return profile
+        return get_profile_registry().get_or_default(profile_name)
     except Exception as e:
         print(f"Error loading LLM profile: {e}")
         # Fallback
@@ -146,13 +178,8 @@ def load_llm_profile(profile_name='gemma-free'):
 @login_required
 def index():
     """Ana dashboard"""
-    projects = load_registry()
-
-    # Her proje için state bilgisini yükle
-    for project in projects:
-        state = load_project_state(project['id'])
-        if state:
-            project['state'] = state
+    # Registry + state özetleri bellekte; istek başına dosya okuması yok
+    projects = project_index.snapshot()
 
     resources = get_system_resources()
 
@@ -223,11 +250,8 @@ def new_project():
         if auto_run_prp:
             try:
                 project_id = f'product-{project_name}'
-                orchestrator_cmd = ['python3', ORCHESTRATOR_SCRIPT, project_id, 'prp']
-                subprocess.Popen(orchestrator_cmd,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE)
-                flash('PRP Agent arka planda çalıştırılıyor...', 'info')
+                job = job_queue.submit(project_id, 'prp', source='new_project')
+                flash(f"PRP Agent arka planda çalıştırılıyor (job {job['id']})...", 'info')
             except Exception as e:
                 flash(f'PRP Agent başlatma hatası: {str(e)}', 'error')
 
@@ -275,28 +299,13 @@ def validation_history(project_id):
 def get_profiles():
     """LLM profiles listesi (API endpoint)"""
     try:
-        profiles_file = os.path.join(CONTROL_DIR, 'config', 'llm.profiles.yaml')
-        
-        with open(profiles_file, 'r') as f:
-            profiles_data = yaml.safe_load(f)
-        
-        profiles = profiles_data.get('profiles', {})
-        default_profile = profiles_data.get('default_profile', 'gemma-free')
+        registry = get_profile_registry()
         
         # Simplified profile list for UI
-        profile_list = []
-        for name, config in profiles.items():
-            profile_list.append({
-                'name': name,
-                'model': config.get('model', 'Unknown'),
-                'description': config.get('description', ''),
-                'is_default': (name == default_profile)
-            })
-        
         return jsonify({
             'success': True,
-            'profiles': profile_list,
-            'default_profile': default_profile
+            'profiles': registry.summary(),
+            'default_profile': registry.default_profile
         })
     
     except Exception as e:
@@ -304,51 +313,123 @@ def get_profiles():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/run-agent', methods=['POST'])
+@app.route('/api/llm-cache/stats', methods=['GET'])
 @login_required
+def llm_cache_stats():
+    """LLM response cache hit/miss istatistikleri"""
+    cache = get_cache()
+    if cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, 'stats': cache.get_stats()})
 
+
+@app.route('/api/run-agent', methods=['POST'])
+@login_required
 def run_agent():
-    """Agent çalıştır (API endpoint)"""
+    """Agent job'ı kuyruğa ekle (API endpoint) - hemen job_id döner"""
     try:
         data = request.json
         project_id = data.get('project_id')
         agent = data.get('agent')
         model_override = data.get('model_override')
+        no_cache = bool(data.get('no_cache'))
+        full_run = bool(data.get('full_run'))
 
         if not project_id or not agent:
             return jsonify({'error': 'project_id ve agent gerekli'}), 400
 
-        # Orchestrator'ı çalıştır
-        cmd = ['python3', ORCHESTRATOR_SCRIPT, project_id, agent]
-        if model_override:
-            cmd.extend(['--model', model_override])
-        
-        result = subprocess.run(cmd,
-                              capture_output=True,
-                              text=True,
-                              timeout=300)
+        if agent not in agent_runner.AGENTS:
+            return jsonify({'error': f'Bilinmeyen agent: {agent}'}), 400
 
-        if result.returncode == 0:
-            # Başarılı - stdout'u döndür
-            return jsonify({
-                'success': True,
-                'output': result.stdout
-            })
-        else:
-            # Hata - stderr'ı parse et ve anlamlı mesaj döndür
-            error_msg = parse_orchestrator_error(result.stderr, result.stdout)
-            return jsonify({
-                'success': False,
-                'error': error_msg,
-                'raw_stderr': result.stderr[:500]  # Debug için ilk 500 char
-            }), 500
+        job = job_queue.submit(project_id, agent, model_override, no_cache=no_cache, full_run=full_run)
+
+        return jsonify({
+            'success': True,
+            'job_id': job['id'],
+            'status': job['status']
+        }), 202
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Agent timeout (5 dakika)'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def job_view(job):
+    """Job kaydını API yanıtına çevir (hata mesajı kullanıcı dostu)"""
+    view = dict(job)
+    if job.get('error') and job['status'] == 'failed':
+        view['raw_error'] = job['error'][:500]
+        view['error'] = parse_orchestrator_error('', job['error'])
+    return view
+
+
+@app.route('/api/jobs', methods=['GET'])
+@login_required
+def list_jobs():
+    """Son agent job'ları (opsiyonel project_id filtresi)"""
+    project_id = request.args.get('project_id')
+    limit = request.args.get('limit', 50, type=int)
+    jobs = job_queue.list(project_id=project_id, limit=limit)
+    return jsonify({'jobs': [job_view(j) for j in jobs]})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Job durumu ve progress"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'job': job_view(job)})
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_job(job_id):
+    """Kuyruktaki veya çalışan job'ı iptal et"""
+    if not job_queue.get(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+    if not job_queue.cancel(job_id):
+        return jsonify({'success': False, 'error': 'Job already finished'}), 409
+    return jsonify({'success': True})
+
+
+def sse_event(event, data, event_id=None):
+    """Tek bir Server-Sent Events mesajı oluştur"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+@login_required
+def stream_job(job_id):
+    """Job çıktısını SSE ile parça parça ilet (EventSource GET kullanır)"""
+    if not job_queue.get(job_id):
+        return jsonify({'error': 'Job not found'}), 404
+
+    # EventSource yeniden bağlanırsa kaldığı yerden devam et
+    after_seq = request.headers.get('Last-Event-ID', 0, type=int)
+
+    def generate():
+        for kind, seq, payload in job_queue.stream(job_id, after_seq=after_seq):
+            if kind == 'token':
+                yield sse_event('token', {'content': payload}, event_id=seq)
+            elif kind == 'keep-alive':
+                # Proxy'lerin bağlantıyı kapatmaması için
+                yield ": keep-alive\n\n"
+            else:
+                job = job_view(payload)
+                yield sse_event('done', {
+                    'success': job['status'] == 'succeeded',
+                    'status': job['status'],
+                    'message': job.get('message'),
+                    'error': job.get('error')
+                })
+
+    return Response(stream_with_context(generate()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 def parse_orchestrator_error(stderr, stdout):
     """Orchestrator hata mesajını parse et ve kullanıcı dostu hale getir"""
     import re
@@ -404,33 +485,20 @@ def human_validation(project_id):
         flash('Proje human_validation fazında değil!', 'error')
         return redirect(url_for('project_detail', project_id=project_id))
 
-    # Load test results
+    # Load test results (TestAgent'ın JSON kaydı)
     test_results = []
-    test_summary = {'total': 0, 'passed': 0, 'failed': 0, 'pass_rate': 0.0}
-    try:
-        results_file = os.path.join(PROJECTS_DIR, project_id, 'reports', 'test_results.md')
-        with open(results_file, 'r') as f:
-            content = f.read()
-            # Parse results (simple parsing)
-            if '✅ PASS' in content:
-                test_results.append({
-                    'name': 'Syntax Check',
-                    'file': 'src/counter.py',
-                    'passed': True,
-                    'status': 'PASS'
-                })
-            # Parse summary
-            for line in content.split('\n'):
-                if 'Total:' in line:
-                    test_summary['total'] = int(line.split(':')[1].strip())
-                elif 'Passed:' in line:
-                    test_summary['passed'] = int(line.split(':')[1].strip())
-                elif 'Failed:' in line:
-                    test_summary['failed'] = int(line.split(':')[1].strip())
-                elif 'Pass Rate:' in line:
-                    test_summary['pass_rate'] = float(line.split(':')[1].strip().replace('%', ''))
-    except Exception as e:
-        print(f"Error loading test results: {e}")
+    test_summary = {'total': 0, 'passed': 0, 'failed': 0, 'skipped': 0, 'pass_rate': 0.0}
+    latest_run = load_latest_test_run(os.path.join(PROJECTS_DIR, project_id))
+    if latest_run:
+        test_summary = latest_run['summary']
+        for test in latest_run['tests']:
+            test_results.append({
+                'name': test['name'] if test['kind'] == 'spec' else f"{test['name']}: {test['target']}",
+                'file': test['target'] if test['kind'] == 'syntax' else None,
+                'passed': test['status'] == 'passed',
+                'status': test['status'].upper(),
+                'message': test.get('message')
+            })
 
     # Load test specs
     test_specs = []
@@ -461,9 +529,72 @@ def human_validation(project_id):
                          project_id=project_id,
                          state=state,
                          test_results=test_results,
+                         test_summary=test_summary,
+                         test_run=latest_run,
                          manual_tests=test_specs)
 
 
+@app.route('/api/test-history/<project_id>')
+@login_required
+def get_test_history(project_id):
+    """Otomatik test koşuları geçmişi (API endpoint)"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+    except ValueError:
+        limit = 50
+    history = load_test_history(os.path.join(PROJECTS_DIR, project_id), limit=limit)
+    latest = load_latest_test_run(os.path.join(PROJECTS_DIR, project_id))
+    return jsonify({'history': history, 'latest': latest})
+
+
+@app.route('/api/state-events/<project_id>')
+@login_required
+def get_state_events(project_id):
+    """State değişiklik geçmişi (sqlite backend; yaml backend'de boş liste)"""
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+    except ValueError:
+        limit = 50
+    return jsonify({'events': state_manager.list_state_events(project_id, limit)})
+
+
+@app.route('/api/system-resources')
+@login_required
+def get_resource_samples():
+    """Kaynak örnekleri (API endpoint); Query: limit (son N örnek)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 60)), 1000))
+    except ValueError:
+        limit = 60
+    return jsonify({'latest': resource_sampler.latest(),
+                    'samples': resource_sampler.history(limit),
+                    'sampler': resource_sampler.status()})
+
+
+@app.route('/api/events/<project_id>')
+@login_required
+def get_project_events(project_id):
+    """
+    Proje event log'u (API endpoint)
+
+    Query: since / until (epoch saniye), agent, type, limit; summary=1 ile agent bazında istatistik
+    """
+    try:
+        since = float(request.args['since']) if request.args.get('since') else None
+        until = float(request.args['until']) if request.args.get('until') else None
+        limit = min(int(request.args.get('limit', 200)), 5000)
+    except ValueError:
+        return jsonify({'error': 'since/until/limit must be numeric'}), 400
+
+    events = list(event_log.read(os.path.join(PROJECTS_DIR, project_id), since=since, until=until,
+                                 agent=request.args.get('agent') or None,
+                                 event_type=request.args.get('type') or None))
+    response = {'events': events[-limit:][::-1], 'total': len(events)}
+    if request.args.get('summary'):
+        response['summary'] = event_log.summarize(events)
+    return jsonify(response)
+
+
 @app.route('/api/validation-history/<project_id>')
 @login_required
 def get_validation_history(project_id):
@@ -607,7 +738,6 @@ def custom_scenarios(project_id):
 def analyze_rejection(project_id):
     """LLM ile rejection feedback analizi"""
     try:
-        import requests
         import re
         
         data = request.json
@@ -679,7 +809,7 @@ Return ONLY valid JSON:
         else:
             return jsonify({'error': f'Unsupported provider: {provider}'}), 500
         
-        response = requests.post(
+        response = get_session(provider).post(
             api_url,
             headers={
                 'Authorization': f'Bearer {api_key}',
@@ -833,6 +963,16 @@ def submit_human_validation():
                 'error': f'State update failed: {result.stderr}'
             }), 500
 
+        failed_tests = [t.get('title') for t in test_results.values() if t.get('result') == 'fail']
+        log_project_event(project_id, 'validation',
+                          agent='human',
+                          action=f"human validation: {decision}",
+                          result=decision,
+                          phase=new_phase,
+                          manual_tests=len(test_results),
+                          failed_tests=failed_tests or None,
+                          ai_category=ai_analysis.get('category') if ai_analysis else None)
+
         # Save feedback to main feedback file
         if feedback:
             feedback_file = os.path.join(PROJECTS_DIR, project_id, 'reports', 'human_feedback.md')
@@ -883,22 +1023,14 @@ def save_agent_models(project_id):
         if not project:
             return jsonify({'success': False, 'error': 'Project not found'}), 404
         
-        # Load current state
-        project_path = os.path.join(PROJECTS_DIR, project_id)
-        state_file = os.path.join(project_path, 'state', 'state.yaml')
-        
-        with open(state_file, 'r') as f:
-            state = yaml.safe_load(f)
-        
         # Update agent_models
-        if 'agent_models' not in state:
-            state['agent_models'] = {}
-        
-        state['agent_models'].update(agent_models)
+        def set_agent_models(s):
+            if 'agent_models' not in s:
+                s['agent_models'] = {}
+            s['agent_models'].update(agent_models)
+            return s
         
-        # Save state
-        with open(state_file, 'w') as f:
-            yaml.dump(state, f, default_flow_style=False, sort_keys=False)
+        state = update_project_state(project_id, set_agent_models)
         
         return jsonify({
             'success': True,
@@ -1030,19 +1162,22 @@ def github_sync():
 # AI Factory - Deployment Settings API
 # Add these to app.py
 
-import yaml
 import os
 from datetime import datetime
 
 DEPLOYMENT_CONFIG_PATH = os.path.expanduser("~/projects/ai-factory-control/config/deployment.yaml")
 
 def load_deployment_config():
-    """Load deployment configuration"""
+    """
+    Load deployment configuration
+
+    Dosya değişmedikçe tekrar ayrıştırılmaz (dashboard her render'da okur);
+    dönen dict paylaşılır, değiştirilmemeli.
+    """
     try:
-        with open(DEPLOYMENT_CONFIG_PATH, 'r') as f:
-            config = yaml.safe_load(f)
+        config = _load_cached(Path(DEPLOYMENT_CONFIG_PATH), load_yaml)
+        if config is not None:
             return config.get('deployment', {})
-    except FileNotFoundError:
         # Return defaults if file doesn't exist
         return {
             'port_range': {'start': 5001, 'end': 5010},
@@ -1070,7 +1205,7 @@ def save_deployment_config(config):
         with open(DEPLOYMENT_CONFIG_PATH, 'w') as f:
             f.write("# AI Factory - Deployment Settings\n")
             f.write(f"# Last updated: {datetime.now().isoformat()}\n\n")
-            yaml.dump(full_config, f, default_flow_style=False, sort_keys=False)
+            yaml_io.dump(full_config, f, allow_unicode=False)
         
         return True
     except Exception as e:
@@ -1084,19 +1219,20 @@ def settings():
        return redirect(url_for('login'))
     
     # Load LLM profiles
-    profiles_path = os.path.expanduser("~/projects/ai-factory-control/config/llm.profiles.yaml")
     try:
-        with open(profiles_path, 'r') as f:
-            profiles_config = yaml.safe_load(f)
-    except:
-        profiles_config = {'profiles': {}, 'default_profile': 'gemma-free'}
+        registry = get_profile_registry()
+        profiles, default_profile, profile_errors = registry.profiles, registry.default_profile, registry.errors
+    except Exception as e:
+        print(f"Error loading profiles: {e}")
+        profiles, default_profile, profile_errors = {}, 'gemma-free', {}
     
     # Load deployment config
     deployment_config = load_deployment_config()
     
     return render_template('settings.html', 
-                         profiles=profiles_config.get('profiles', {}),
-                         default_profile=profiles_config.get('default_profile', 'gemma-free'),
+                         profiles=profiles,
+                         default_profile=default_profile,
+                         profile_errors=profile_errors,
                          deployment_config=deployment_config)
 
 @app.route('/api/save-deployment-settings', methods=['POST'])
@@ -1222,21 +1358,30 @@ def load_deployments():
     deployed_projects = {}
     projects_dir = os.path.expanduser("~/projects")
     
+    # sqlite backend: DB'yi YAML'larla eşitle (değişmeyenler sadece stat), sonra indeksli tek sorgu
+    if state_manager.get_state_db_path():
+        try:
+            state_manager.load_states([d for d in os.listdir(projects_dir) if d.startswith("product-")])
+            for row in state_manager.query_states(deployment_status='deployed'):
+                if row['deployment_port']:
+                    deployed_projects[row['project_id']] = row['deployment_port']
+            return
+        except Exception as e:
+            print(f"Error querying deployments: {e}")
+    
+    # yaml backend: state_store.read (libyaml + opsiyonel sidecar cache)
     for project_dir in os.listdir(projects_dir):
         if not project_dir.startswith("product-"):
             continue
         
-        state_file = os.path.join(projects_dir, project_dir, "state", "state.yaml")
-        if os.path.exists(state_file):
-            try:
-                with open(state_file, 'r') as f:
-                    state = yaml.safe_load(f)
-                if state.get('deployment', {}).get('status') == 'deployed':
-                    port = state['deployment'].get('port')
-                    if port:
-                        deployed_projects[project_dir] = port
-            except:
-                pass
+        try:
+            state = state_manager.load_state(project_dir)
+            if state.get('deployment', {}).get('status') == 'deployed':
+                port = state['deployment'].get('port')
+                if port:
+                    deployed_projects[project_dir] = port
+        except:
+            pass
 
 # Load deployments on startup
 load_deployments()
@@ -1286,6 +1431,7 @@ def deploy_project(project_id):
         script_path = os.path.expanduser("~/projects/ai-factory-control/scripts/deploy-project.sh")
         startup_wait = config.get('startup', {}).get('wait_seconds', 2)
         
+        deploy_started = time.monotonic()
         result = subprocess.run(
             [script_path, project_id, str(port), str(startup_wait)],
             capture_output=True,
@@ -1294,6 +1440,9 @@ def deploy_project(project_id):
         )
         
         if result.returncode != 0:
+            log_project_event(project_id, 'deployment', agent='human', action='deploy', result='failure',
+                              port=port, duration=round(time.monotonic() - deploy_started, 3),
+                              error=result.stderr[-500:])
             return jsonify({
                 'success': False,
                 'error': f'Deployment failed: {result.stderr}'
@@ -1316,11 +1465,15 @@ def deploy_project(project_id):
             'last_activity': datetime.now().isoformat()
         }
         
-        state['deployment'] = deployment
-        save_project_state(project_id, state)
+        def set_deployment(s):
+            s['deployment'] = deployment
+            return s
+        update_project_state(project_id, set_deployment)
         
         # Track deployment
         deployed_projects[project_id] = port
+        log_project_event(project_id, 'deployment', agent='human', action='deploy', result='success',
+                          port=port, pid=pid, duration=round(time.monotonic() - deploy_started, 3))
         
         return jsonify({
             'success': True,
@@ -1330,6 +1483,7 @@ def deploy_project(project_id):
         })
         
     except subprocess.TimeoutExpired:
+        log_project_event(project_id, 'deployment', agent='human', action='deploy', result='timeout')
         return jsonify({'success': False, 'error': 'Deployment timeout (60s)'}), 500
     except Exception as e:
         print(f"Deploy error: {e}", flush=True)
@@ -1354,10 +1508,22 @@ def stop_deployment(project_id):
                 pass
         
         # Update state
-        deployment['status'] = 'stopped'
-        deployment['stopped_at'] = datetime.now().isoformat()
-        state['deployment'] = deployment
-        save_project_state(project_id, state)
+        def mark_stopped(s):
+            s.setdefault('deployment', {})
+            s['deployment']['status'] = 'stopped'
+            s['deployment']['stopped_at'] = datetime.now().isoformat()
+            return s
+        update_project_state(project_id, mark_stopped)
+        
+        started_at = deployment.get('started_at')
+        uptime = None
+        if started_at:
+            try:
+                uptime = round((datetime.now() - datetime.fromisoformat(started_at)).total_seconds(), 1)
+            except ValueError:
+                pass
+        log_project_event(project_id, 'deployment', agent='human', action='stop', result='success',
+                          port=deployment.get('port'), pid=pid, uptime=uptime)
         
         # Remove from tracking
         if project_id in deployed_projects:
@@ -1388,9 +1554,15 @@ def preview_proxy(project_id, subpath=''):
         if not port:
             return "Port not assigned", 500
         
-        # Update last activity
-        deployment['last_activity'] = datetime.now().isoformat()
-        save_project_state(project_id, state)
+        # Update last activity (sadece bu alan; eşzamanlı agent yazmalarını ezmez)
+        def touch_activity(s):
+            if s.get('deployment', {}).get('status') == 'deployed':
+                s['deployment']['last_activity'] = datetime.now().isoformat()
+            return s
+        now = time.monotonic()
+        if now - _activity_written.get(project_id, -ACTIVITY_WRITE_INTERVAL_SECONDS) >= ACTIVITY_WRITE_INTERVAL_SECONDS:
+            _activity_written[project_id] = now
+            update_project_state(project_id, touch_activity)
         
         # Proxy to local port
         import requests
@@ -1650,42 +1822,49 @@ def approve_prp(project_id):
         if os.path.exists(prp_file):
             backup_prp_to_history(project_id, prp_file)
         
-        # Version'ı güncelle
         old_version = state.get('version', {}).get('prp', '0.1')
-        if bump_version:
-            current_prp_version = old_version
-            version_parts = current_prp_version.split('.')
-            if len(version_parts) == 2:
-                major, minor = version_parts
-                new_version = f"{major}.{int(minor) + 1}"
-            else:
-                new_version = "1.0"
+        
+        def approve(state):
+            # Version'ı güncelle
+            if bump_version:
+                current_prp_version = state.get('version', {}).get('prp', '0.1')
+                version_parts = current_prp_version.split('.')
+                if len(version_parts) == 2:
+                    major, minor = version_parts
+                    new_version = f"{major}.{int(minor) + 1}"
+                else:
+                    new_version = "1.0"
+                
+                if 'version' not in state:
+                    state['version'] = {}
+                state['version']['prp'] = new_version
             
-            if 'version' not in state:
-                state['version'] = {}
-            state['version']['prp'] = new_version
-        
-        # Phase güncelle (eğer 'prp' phase'indeyse)
-        if state.get('phase') == 'prp':
-            state['phase'] = 'development'
-            state['next_action'] = {
-                'agent': 'dev_agent',
-                'action': 'Generate code based on PRP',
-                'requires_human_approval': True
+            # Phase güncelle (eğer 'prp' phase'indeyse)
+            if state.get('phase') == 'prp':
+                state['phase'] = 'development'
+                state['next_action'] = {
+                    'agent': 'dev_agent',
+                    'action': 'Generate code based on PRP',
+                    'requires_human_approval': True
+                }
+            
+            # Last event güncelle
+            state['last_event'] = {
+                'agent': 'human',
+                'action': f"PRP v{state['version']['prp']} approved",
+                'timestamp': datetime.utcnow().isoformat() + 'Z',
+                'result': 'success',
+                'model': 'N/A'
             }
-        
-        # Last event güncelle
-        from datetime import datetime
-        state['last_event'] = {
-            'agent': 'human',
-            'action': f"PRP v{state['version']['prp']} approved",
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'result': 'success',
-            'model': 'N/A'
-        }
+            return state
         
         # State'i kaydet
-        save_project_state(project_id, state)
+        state = update_project_state(project_id, approve)
+        log_project_event(project_id, 'validation',
+                          agent='human',
+                          action=f"PRP v{state['version']['prp']} approved",
+                          result='approve',
+                          phase=state['phase'])
         
         # Generate AI summary (non-blocking, best effort)
         try:
@@ -1708,8 +1887,6 @@ def approve_prp(project_id):
 
 def generate_prp_summary(project_id, old_version, new_version):
     """Generate AI summary for PRP version changes"""
-    import requests
-    
     project_dir = os.path.join(PROJECTS_DIR, project_id)
     history_file = os.path.join(project_dir, 'prp', 'prp_history.md')
     
@@ -1738,11 +1915,7 @@ def generate_prp_summary(project_id, old_version, new_version):
     state = load_project_state(project_id)
     model_name = state.get('agent_models', {}).get('prp_agent', 'gemma-free')
     
-    profiles_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'llm.profiles.yaml')
-    with open(profiles_path, 'r') as f:
-        profiles_data = yaml.safe_load(f)
-    
-    profile = profiles_data['profiles'].get(model_name, profiles_data['profiles']['gemma-free'])
+    profile = get_profile_registry().get_or_default(model_name)
     
     # Generate summary prompt
     summary_prompt = f"""Compare these two PRP versions and summarize the key changes in 3-5 bullet points.
@@ -1765,7 +1938,7 @@ Format: Use markdown bullet points (- or *)."""
     api_url = "https://openrouter.ai/api/v1/chat/completions"
     api_key = os.environ.get('OPENROUTER_API_KEY')
     
-    response = requests.post(
+    response = get_session('openrouter').post(
         api_url,
         headers={
             "Authorization": f"Bearer {api_key}",
@@ -1867,11 +2040,11 @@ def save_vision(project_id):
             f.write(f"# Product Vision\n\n{vision}\n")
         
         # Update state - add vision field
-        state = load_project_state(project_id)
-        if 'meta' not in state:
-            state['meta'] = {}
-        state['meta']['has_vision'] = True
-        save_project_state(project_id, state)
+        def set_has_vision(s):
+            s.setdefault('meta', {})
+            s['meta']['has_vision'] = True
+            return s
+        update_project_state(project_id, set_has_vision)
         
         return jsonify({
             'success': True,
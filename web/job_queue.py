@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Agent Job Queue
+Background agent runs with job IDs, progress, cancellation and a
+restart-safe JSON job store.
+
+Flask worker'ı LLM çağrısı boyunca bloklamak yerine agent'lar sınırlı
+bir thread havuzunda çalışır; web katmanı sadece job durumunu okur.
+
+Restart kurtarması (running -> interrupted, queued -> tekrar başlat) sadece
+job dizininin kilidini (.recover.lock, flock) alan süreçte yapılır; aynı
+store'u açan diğer süreçler (ör. ikinci web worker'ı) canlı job'lara dokunmaz.
+Job dosyaları _lock dışında yazılır (okuyucular disk I/O'yu beklemez).
+"""
+
+import fcntl
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled', 'interrupted')
+
+# Canlı izleme için job başına tutulan son token parçası sayısı
+STREAM_BUFFER_SIZE = 2000
+
+# Progress alanının diske yazılma aralığı (saniye)
+PROGRESS_FLUSH_SECONDS = 2.0
+
+
+class JobCancelled(Exception):
+    """Çalışan job iptal edildi"""
+
+
+class JobQueue:
+    """Bounded worker pool + persistent job store"""
+
+    def __init__(self, store_dir, runner, max_workers=10, keep_finished=500):
+        """
+        Args:
+            store_dir: Job JSON dosyalarının tutulduğu dizin
+            runner: callable(project_id, agent, model_override, on_token, on_progress=...) -> result dict
+            max_workers: Aynı anda çalışabilecek agent sayısı
+            keep_finished: Diskte tutulacak bitmiş job sayısı
+        """
+        self.store_dir = store_dir
+        self.runner = runner
+        self.keep_finished = keep_finished
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='agent-job')
+
+        self._jobs = {}
+        self._cancel_events = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        # Disk yazmaları: sıra numarası _lock altında alınır, yazma _io_lock altında;
+        # geç kalan eski kayıt yenisinin üstüne yazılmaz
+        self._io_lock = threading.Lock()
+        self._persist_seq = {}
+        self._written_seq = {}
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._recovery_fd = None
+        self._recover()
+
+    # ----- persistence -----
+
+    def _job_path(self, job_id):
+        return os.path.join(self.store_dir, f'{job_id}.json')
+
+    def _snapshot(self, job):
+        """Job kaydının serileştirilmiş hali (_lock altında çağrılır; yazma _write ile)"""
+        seq = self._persist_seq.get(job['id'], 0) + 1
+        self._persist_seq[job['id']] = seq
+        return job['id'], seq, json.dumps(job, indent=2, ensure_ascii=False)
+
+    def _write(self, snapshot):
+        """Snapshot'ı atomik olarak yaz (temp + rename); _lock dışında çağrılır"""
+        if snapshot is None:
+            return
+        job_id, seq, data = snapshot
+        with self._io_lock:
+            if seq <= self._written_seq.get(job_id, 0):
+                return
+            self._written_seq[job_id] = seq
+            path = self._job_path(job_id)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+    def _persist(self, job):
+        """Job kaydını hemen yaz (sadece _lock dışında / tek thread'li kurtarmada)"""
+        self._write(self._snapshot(job))
+
+    def _acquire_recovery(self):
+        """Job store'un sahibi ol (süreç ömrü boyunca tutulur); başkası tutuyorsa False"""
+        fd = os.open(os.path.join(self.store_dir, '.recover.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._recovery_fd = fd
+        return True
+
+    def _recover(self):
+        """
+        Restart sonrası job store'u yükle; kuyruktakileri tekrar başlat
+
+        Store kilidini başka bir canlı süreç tutuyorsa job'lar sadece
+        okunur (onun çalıştırdığı job'lar interrupted sayılmaz, kuyruktakiler
+        ikinci kez başlatılmaz).
+        """
+        owner = self._acquire_recovery()
+        if not owner:
+            print(f"Job store {self.store_dir} is owned by another job queue; skipping recovery", flush=True)
+        pending = []
+        for filename in os.listdir(self.store_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.store_dir, filename), 'r') as f:
+                    job = json.load(f)
+            except Exception as e:
+                print(f"Error loading job {filename}: {e}", flush=True)
+                continue
+
+            if owner and job['status'] == 'running':
+                # Yarıda kalan LLM çağrısı devam ettirilemez
+                job['status'] = 'interrupted'
+                job['error'] = 'Server restarted while the agent was running'
+                job['finished_at'] = datetime.now().isoformat()
+                self._persist(job)
+            elif owner and job['status'] == 'queued':
+                pending.append(job)
+
+            self._jobs[job['id']] = job
+
+        for job in sorted(pending, key=lambda j: j['created_at']):
+            self._start(job)
+
+        self._remove_files(self._prune())
+
+    def _prune(self):
+        """
+        En eski bitmiş job'ları bellekten çıkar (_lock altında çağrılır)
+
+        Returns:
+            Dosyaları silinecek job id'leri (_remove_files, _lock dışında)
+        """
+        finished = sorted(
+            (j for j in self._jobs.values() if j['status'] in FINISHED_STATUSES),
+            key=lambda j: j['created_at']
+        )
+        removed = []
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            self._jobs.pop(job['id'], None)
+            self._streams.pop(job['id'], None)
+            self._persist_seq.pop(job['id'], None)
+            removed.append(job['id'])
+        return removed
+
+    def _remove_files(self, job_ids):
+        with self._io_lock:
+            for job_id in job_ids:
+                self._written_seq.pop(job_id, None)
+                try:
+                    os.remove(self._job_path(job_id))
+                except OSError:
+                    pass
+
+    # ----- public API -----
+
+    def submit(self, project_id, agent, model_override=None, source='web', no_cache=False, full_run=False):
+        """
+        Yeni agent job'ı kuyruğa ekle
+
+        no_cache: LLM cache'inden okuma; full_run: test cache'lerini yok say
+        """
+        job = {
+            'id': uuid.uuid4().hex[:12],
+            'project_id': project_id,
+            'agent': agent,
+            'model_override': model_override or None,
+            'no_cache': bool(no_cache),
+            'full_run': bool(full_run),
+            'source': source,
+            'status': 'queued',
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'progress': {'chars': 0, 'chunks': 0, 'files': []},
+            'message': None,
+            'model': None,
+            'error': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            snapshot = self._snapshot(job)
+            removed = self._prune()
+            job_copy = dict(job)
+        self._write(snapshot)
+        self._remove_files(removed)
+        self._start(job)
+        return job_copy
+
+    def get(self, job_id):
+        """Job kaydının kopyası (yoksa None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, project_id=None, limit=50):
+        """Son job'lar (yeniden eskiye)"""
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()
+                    if project_id is None or j['project_id'] == project_id]
+        jobs.sort(key=lambda j: j['created_at'], reverse=True)
+        return jobs[:limit]
+
+    def cancel(self, job_id):
+        """
+        Job'ı iptal et
+
+        Kuyruktaki job hiç başlamaz; çalışan job bir sonraki token
+        parçasında ya da LLM retry / rate limit beklemesinde durdurulur
+        (state'e yazılmadan).
+        """
+        snapshot = None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job['status'] in FINISHED_STATUSES:
+                return False
+
+            self._cancel_events.setdefault(job_id, threading.Event()).set()
+            if job['status'] == 'queued':
+                snapshot = self._finish(job, 'cancelled', error='Cancelled before start')
+        self._write(snapshot)
+        return True
+
+    def stream(self, job_id, after_seq=0, timeout=15):
+        """
+        Job çıktısını parça parça döndüren generator
+
+        Yields:
+            ('token', seq, chunk) | ('keep-alive', None, None) | ('done', None, job)
+        """
+        seq = after_seq
+        while True:
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                buffer = self._streams.get(job_id)
+                chunks = [(s, c) for s, c in buffer if s > seq] if buffer else []
+                finished = job['status'] in FINISHED_STATUSES
+                if not chunks and not finished:
+                    self._changed.wait(timeout)
+                    buffer = self._streams.get(job_id)
+                    chunks = [(s, c) for s, c in buffer if s > seq] if buffer else []
+                    finished = job['status'] in FINISHED_STATUSES
+                job_copy = dict(job)
+
+            for s, chunk in chunks:
+                seq = s
+                yield ('token', s, chunk)
+
+            if finished and not chunks:
+                yield ('done', None, job_copy)
+                return
+            if not chunks:
+                yield ('keep-alive', None, None)
+
+    # ----- worker -----
+
+    def _start(self, job):
+        self._cancel_events.setdefault(job['id'], threading.Event())
+        self.executor.submit(self._run, job['id'])
+
+    def _finish(self, job, status, error=None, message=None, model=None):
+        """
+        Job'ı bitmiş duruma al (lock altında çağrılır)
+
+        Returns:
+            Snapshot; çağıran lock'u bıraktıktan sonra _write ile yazar
+        """
+        job['status'] = status
+        job['finished_at'] = datetime.now().isoformat()
+        job['error'] = error
+        job['message'] = message
+        if model:
+            job['model'] = model
+        self._cancel_events.pop(job['id'], None)
+        self._changed.notify_all()
+        return self._snapshot(job)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] != 'queued':
+                return
+            cancel_event = self._cancel_events.setdefault(job_id, threading.Event())
+            job['status'] = 'running'
+            job['started_at'] = datetime.now().isoformat()
+            self._streams[job_id] = deque(maxlen=STREAM_BUFFER_SIZE)
+            snapshot = self._snapshot(job)
+            self._changed.notify_all()
+        self._write(snapshot)
+
+        last_flush = [datetime.now()]
+
+        def on_token(chunk):
+            if cancel_event.is_set():
+                raise JobCancelled()
+            snapshot = None
+            with self._lock:
+                progress = job['progress']
+                progress['chars'] += len(chunk)
+                progress['chunks'] += 1
+                self._streams[job_id].append((progress['chunks'], chunk))
+                now = datetime.now()
+                if (now - last_flush[0]).total_seconds() >= PROGRESS_FLUSH_SECONDS:
+                    last_flush[0] = now
+                    snapshot = self._snapshot(job)
+                self._changed.notify_all()
+            self._write(snapshot)
+
+        def on_progress(event):
+            if event.get('type') != 'file':
+                return
+            with self._lock:
+                # Yazılan dosya listesi hemen diske (yarıda kalan job'da da görünsün)
+                job['progress'].setdefault('files', []).append(event['path'])
+                snapshot = self._snapshot(job)
+                self._changed.notify_all()
+            self._write(snapshot)
+
+        try:
+            result = self.runner(job['project_id'], job['agent'], job['model_override'], on_token,
+                                 on_progress=on_progress, cancel_event=cancel_event,
+                                 no_cache=job.get('no_cache', False),
+                                 full_run=job.get('full_run', False))
+        except JobCancelled:
+            with self._lock:
+                snapshot = self._finish(job, 'cancelled', error='Cancelled by user')
+            self._write(snapshot)
+            return
+        except Exception as e:
+            if cancel_event.is_set():
+                # LLM retry / rate limit beklemesi iptalle kesildi (LLMCancelled)
+                with self._lock:
+                    snapshot = self._finish(job, 'cancelled', error='Cancelled by user')
+                self._write(snapshot)
+                return
+            print(f"Agent job {job_id} crashed: {e}", flush=True)
+            with self._lock:
+                snapshot = self._finish(job, 'failed', error=str(e))
+            self._write(snapshot)
+            return
+
+        with self._lock:
+            if result.get('success'):
+                snapshot = self._finish(job, 'succeeded', message=result.get('message'), model=result.get('model'))
+            else:
+                snapshot = self._finish(job, 'failed',
+                                        error=result.get('message') or result.get('error'),
+                                        model=result.get('model'))
+        self._write(snapshot)
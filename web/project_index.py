@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Project Index
+Dashboard için registry + proje state özetlerinin bellek içi indeksi
+
+Arka plan thread'i POLL_INTERVAL_SECONDS aralıkla değişiklikleri yoklar:
+  - registry/projects.yaml: (mtime_ns, size, inode)
+  - yaml backend: her state.yaml'ın imzası
+  - sqlite backend: tek indeksli sorgudan revision + state.yaml imzası
+Sadece imzası değişen projelerin state'i tekrar okunur ve özetlenir.
+Dashboard her istekte hazır listeyi alır (dosya / DB erişimi yok).
+
+Web'in kendi yazmaları invalidate(project_id) ile anında yansır (sadece o
+proje tekrar okunur); agent ve script yazmaları en geç bir yoklama
+aralığı sonra görünür.
+"""
+
+import os
+import threading
+import time
+
+import state_manager
+import yaml_io
+from state_store import get_revision
+
+
+POLL_INTERVAL_SECONDS = 2.0
+
+
+def summarize_state(state: dict) -> dict:
+    """
+    Dashboard'un kullandığı alanların projeksiyonu
+
+    Returns:
+        {'phase', 'version', 'blocking', 'next_action', 'test_pass_rate',
+         'deployment', 'last_event', 'state_revision'}
+    """
+    version = state.get('version') or {}
+    blocking = state.get('blocking') or {}
+    next_action = state.get('next_action') or {}
+    deployment = state.get('deployment') or {}
+    last_event = state.get('last_event') or {}
+    return {
+        'phase': state.get('phase'),
+        'version': {'prp': version.get('prp'), 'code': version.get('code')},
+        'blocking': {'is_blocked': bool(blocking.get('is_blocked')), 'reason': blocking.get('reason')},
+        'next_action': {
+            'agent': next_action.get('agent'),
+            'action': next_action.get('action'),
+            'requires_human_approval': bool(next_action.get('requires_human_approval')),
+        },
+        'test_pass_rate': (state.get('health') or {}).get('test_pass_rate'),
+        'deployment': {
+            'status': deployment.get('status'),
+            'type': deployment.get('type'),
+            'port': deployment.get('port'),
+            'pid': deployment.get('pid'),
+            'url': deployment.get('url'),
+        },
+        'last_event': {
+            'agent': last_event.get('agent'),
+            'action': last_event.get('action'),
+            'result': last_event.get('result'),
+            'timestamp': last_event.get('timestamp'),
+        },
+        'state_revision': get_revision(state),
+    }
+
+
+def _stat_signature(path):
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class ProjectIndex:
+    """
+    Registry + state özetleri
+
+    snapshot() her çağrıda aynı (değişmeyen) listeyi döndürür; liste
+    sadece bir şey değiştiğinde yeniden kurulur. Elemanlar paylaşılır,
+    çağıranlar değiştirmemeli.
+    """
+
+    def __init__(self, registry_file: str, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.registry_file = registry_file
+        self.poll_interval = poll_interval
+
+        self._registry = []
+        self._registry_signature = None
+        self._signatures = {}   # {project_id: imza}
+        self._summaries = {}    # {project_id: summarize_state(...)}
+        self._projects = []
+
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.generation = 0
+        self.last_refresh = None
+        self.last_error = None
+
+    # ------------------------------------------------------------------
+    # Yoklama
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """İlk indeksi kur ve yoklama thread'ini başlat"""
+        if self._thread and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name='project-index', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.refresh()
+
+    def _load_registry(self):
+        signature = _stat_signature(self.registry_file)
+        if signature == self._registry_signature:
+            return False
+        try:
+            data = yaml_io.load_file(self.registry_file) if signature else None
+        except Exception as e:
+            print(f"Error loading registry: {e}")
+            return False
+        self._registry = (data or {}).get('projects') or []
+        self._registry_signature = signature
+        return True
+
+    def _state_signatures(self, project_ids):
+        """{project_id: imza}; imza değişmedikçe state tekrar okunmaz"""
+        revisions = {}
+        if state_manager.get_state_db_path():
+            # Ayrı yazıcılar (export_yaml: false) YAML'a dokunmayabilir; revision DB'den
+            revisions = {row['project_id']: row['revision'] for row in state_manager.query_states()}
+        return {
+            project_id: (revisions.get(project_id), _stat_signature(state_manager.get_state_path(project_id)))
+            for project_id in project_ids
+        }
+
+    def refresh(self) -> bool:
+        """
+        Değişenleri yeniden yükle
+
+        Returns:
+            İndeks değişti mi
+        """
+        with self._refresh_lock:
+            try:
+                changed = self._load_registry()
+                project_ids = [p['id'] for p in self._registry if p.get('id')]
+                signatures = self._state_signatures(project_ids)
+
+                stale = [pid for pid in project_ids if signatures[pid] != self._signatures.get(pid)]
+                removed = set(self._signatures) - set(project_ids)
+                if stale:
+                    states = state_manager.load_states(stale)
+                    for project_id in stale:
+                        if project_id in states:
+                            self._summaries[project_id] = summarize_state(states[project_id])
+                        else:
+                            self._summaries.pop(project_id, None)
+                for project_id in removed:
+                    self._summaries.pop(project_id, None)
+                self._signatures = signatures
+
+                if changed or stale or removed:
+                    self._rebuild()
+                self.last_refresh = time.time()
+                self.last_error = None
+                return bool(changed or stale or removed)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error refreshing project index: {e}")
+                return False
+
+    def _rebuild(self):
+        """Kilit altında çağrılır: dashboard listesini özetlerden yeniden kur"""
+        self._projects = [
+            dict(project, state=self._summaries[project['id']]) if project.get('id') in self._summaries
+            else dict(project)
+            for project in self._registry
+        ]
+        self.generation += 1
+
+    def _reload_project(self, project_id: str) -> bool:
+        """
+        Kilit altında çağrılır: tek projenin state'ini yeniden oku
+
+        Returns:
+            False: proje registry'de yok (tam yenileme gerekir)
+        """
+        if not any(project.get('id') == project_id for project in self._registry):
+            return False
+        # İmza okumadan önce alınır; arada gelen yazma sonraki yoklamada yakalanır
+        file_signature = _stat_signature(state_manager.get_state_path(project_id))
+        state = state_manager.load_states([project_id]).get(project_id)
+        revision = get_revision(state) if state and state_manager.get_state_db_path() else None
+        self._signatures[project_id] = (revision, file_signature)
+        if state:
+            self._summaries[project_id] = summarize_state(state)
+        else:
+            self._summaries.pop(project_id, None)
+        self._rebuild()
+        return True
+
+    def invalidate(self, project_id: str = None):
+        """Projenin (None: tümünün) özetini yoklamayı beklemeden yenile"""
+        if project_id is not None:
+            with self._refresh_lock:
+                try:
+                    if self._reload_project(project_id):
+                        return
+                except Exception as e:
+                    print(f"Error reloading {project_id} in project index: {e}")
+                    self._signatures.pop(project_id, None)
+                    return
+        with self._refresh_lock:
+            self._registry_signature = None
+            self._signatures = {}
+        self.refresh()
+
+    # ------------------------------------------------------------------
+    # Okuma
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> list:
+        """Dashboard listesi: [registry girdisi + 'state': özet]"""
+        if self.last_refresh is None or not (self._thread and self._thread.is_alive()):
+            # Thread yoksa (ör. CLI / test) isteğe bağlı yenile
+            self.refresh()
+        return self._projects
+
+    def status(self) -> dict:
+        return {
+            'projects': len(self._projects),
+            'generation': self.generation,
+            'last_refresh': self.last_refresh,
+            'poll_interval': self.poll_interval,
+            'polling': bool(self._thread and self._thread.is_alive()),
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+AI Factory - Resource Sampler
+/proc üzerinden sistem ve deployment kaynak örnekleri
+
+Arka plan thread'i SAMPLE_INTERVAL_SECONDS aralıkla okur:
+  - /proc/meminfo       RAM (MemAvailable bazlı kullanım)
+  - /proc/loadavg       1/5/15 dk yük, çalışan / toplam süreç
+  - /proc/<pid>/stat    Deployment süreci (+ alt süreçleri) CPU tick'leri
+  - /proc/<pid>/status  VmRSS, thread sayısı
+
+Son RING_SIZE örnek bellekte tutulur. Dashboard en son örneği okur;
+istek başına süreç açılmaz (eskiden her görüntülemede `free -m`).
+CPU yüzdesi iki örnek arasındaki tick farkından hesaplanır (tek çekirdek = %100).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+
+SAMPLE_INTERVAL_SECONDS = 5.0
+RING_SIZE = 120
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_meminfo(proc_root: str = '/proc') -> dict:
+    """{'total_mb', 'available_mb', 'used_mb', 'percent'}"""
+    values = {}
+    with open(os.path.join(proc_root, 'meminfo'), 'r') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            parts = rest.split()
+            if parts:
+                values[key] = int(parts[0])  # kB
+    total = values.get('MemTotal', 0)
+    available = values.get('MemAvailable', values.get('MemFree', 0))
+    used = max(total - available, 0)
+    return {
+        'total_mb': total // 1024,
+        'available_mb': available // 1024,
+        'used_mb': used // 1024,
+        'percent': round(used * 100 / total, 1) if total else 0,
+    }
+
+
+def read_loadavg(proc_root: str = '/proc') -> dict:
+    with open(os.path.join(proc_root, 'loadavg'), 'r') as f:
+        parts = f.read().split()
+    running, _, total = parts[3].partition('/')
+    return {
+        'load1': float(parts[0]),
+        'load5': float(parts[1]),
+        'load15': float(parts[2]),
+        'running': int(running),
+        'processes': int(total),
+    }
+
+
+def _read_cpu_ticks(pid: int, proc_root: str) -> Optional[int]:
+    """utime + stime (comm alanı boşluk / parantez içerebilir; son ')' sonrası bölünür)"""
+    try:
+        with open(os.path.join(proc_root, str(pid), 'stat'), 'r') as f:
+            data = f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    fields = data[data.rfind(')') + 2:].split()
+    # fields[0] = state (alan 3); utime = alan 14, stime = alan 15
+    return int(fields[11]) + int(fields[12])
+
+
+def _read_status(pid: int, proc_root: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(proc_root, str(pid), 'status'), 'r') as f:
+            lines = f.read().splitlines()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    status = {'rss_kb': 0, 'threads': 0}
+    for line in lines:
+        if line.startswith('VmRSS:'):
+            status['rss_kb'] = int(line.split()[1])
+        elif line.startswith('Threads:'):
+            status['threads'] = int(line.split()[1])
+    return status
+
+
+def _children(pid: int, proc_root: str) -> List[int]:
+    """Alt süreçler (deploy script'i sarmalayıcı shell olabilir)"""
+    try:
+        with open(os.path.join(proc_root, str(pid), 'task', str(pid), 'children'), 'r') as f:
+            return [int(p) for p in f.read().split()]
+    except (OSError, ValueError):
+        return []
+
+
+def _process_tree(pid: int, proc_root: str, limit: int = 64) -> List[int]:
+    pids, stack = [], [pid]
+    while stack and len(pids) < limit:
+        current = stack.pop()
+        if current in pids:
+            continue
+        pids.append(current)
+        stack.extend(_children(current, proc_root))
+    return pids
+
+
+class ResourceSampler:
+    """
+    Periyodik kaynak örnekleyici
+
+    Args:
+        targets: () -> {project_id: deployment dict ('pid', 'port', 'type')};
+                 her örnekte çağrılır, sadece çalışan deployment'lar
+    """
+
+    def __init__(self, targets: Callable[[], Dict[str, dict]] = None,
+                 interval: float = SAMPLE_INTERVAL_SECONDS, size: int = RING_SIZE,
+                 proc_root: str = '/proc'):
+        self.targets = targets or (lambda: {})
+        self.interval = interval
+        self.proc_root = proc_root
+        self._samples = deque(maxlen=size)
+        self._previous_ticks = {}  # {pid: (monotonic, ticks)}
+        self._sample_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='resource-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while True:
+            try:
+                self.sample()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error sampling resources: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def _sample_deployment(self, project_id: str, deployment: dict, now: float, ticks_seen: dict) -> dict:
+        entry = {'project_id': project_id, 'port': deployment.get('port'),
+                 'type': deployment.get('type'), 'pid': None, 'alive': False,
+                 'rss_mb': None, 'cpu_percent': None, 'threads': None, 'processes': 0}
+        try:
+            pid = int(deployment.get('pid'))
+        except (TypeError, ValueError):
+            return entry
+        entry['pid'] = pid
+
+        rss_kb = threads = ticks = 0
+        cpu_known = True
+        for member in _process_tree(pid, self.proc_root):
+            status = _read_status(member, self.proc_root)
+            member_ticks = _read_cpu_ticks(member, self.proc_root)
+            if status is None or member_ticks is None:
+                continue
+            entry['processes'] += 1
+            rss_kb += status['rss_kb']
+            threads += status['threads']
+            ticks += member_ticks
+            ticks_seen[member] = (now, member_ticks)
+            previous = self._previous_ticks.get(member)
+            if previous is None:
+                cpu_known = False
+            else:
+                ticks -= previous[1]
+
+        if not entry['processes']:
+            return entry
+        entry.update(alive=True, rss_mb=round(rss_kb / 1024, 1), threads=threads)
+        previous_time = min((self._previous_ticks[m][0] for m in ticks_seen if m in self._previous_ticks),
+                            default=None)
+        if cpu_known and previous_time is not None and now > previous_time:
+            entry['cpu_percent'] = round(ticks / _CLOCK_TICKS / (now - previous_time) * 100, 1)
+        return entry
+
+    def sample(self) -> dict:
+        """Bir örnek al, ring buffer'a ekle ve döndür"""
+        with self._sample_lock:
+            now = time.monotonic()
+            ticks_seen = {}
+            deployments = []
+            for project_id, deployment in sorted((self.targets() or {}).items()):
+                seen = {}
+                deployments.append(self._sample_deployment(project_id, deployment or {}, now, seen))
+                ticks_seen.update(seen)
+            # Ölen süreçlerin tick'leri unutulur
+            self._previous_ticks = ticks_seen
+
+            sample = {
+                'time': time.time(),
+                'memory': read_meminfo(self.proc_root),
+                'load': read_loadavg(self.proc_root),
+                'deployments': deployments,
+            }
+            self._samples.append(sample)
+            return sample
+
+    def latest(self) -> Optional[dict]:
+        """Son örnek (henüz yoksa senkron alınır)"""
+        if self._samples:
+            return self._samples[-1]
+        return self.sample()
+
+    def history(self, limit: int = None) -> List[dict]:
+        """Eskiden yeniye örnekler"""
+        samples = list(self._samples)
+        return samples[-limit:] if limit else samples
+
+    def status(self) -> dict:
+        return {
+            'interval': self.interval,
+            'size': self._samples.maxlen,
+            'samples': len(self._samples),
+            'sampling': bool(self._thread and self._thread.is_alive()),
+            'last_error': self.last_error,
+        }